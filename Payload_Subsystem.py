@@ -1,4 +1,12 @@
 from subsystems_base import Subsystem
+
+# Energy consumption per minute (% battery/min)
+PAYLOAD_CONSUMPTION = {
+    "SAR Radar": 1.5,
+    "Cloud Seeding Device": 2.0,
+    "Ionospheric Particle Collector": 1.0
+}
+
 class Payload_Subsystem (Subsystem):
     def __init__(self, payload_type: str = "SAR Radar"):
         """
@@ -9,18 +17,47 @@ class Payload_Subsystem (Subsystem):
         self.payload_type: str = payload_type
         self.power_subsystem = None
         self.comms_subsystem = None
+        self.monitor = None  # Optional streaming anomaly detector
+        self.eclipse_index = None  # Orbit geometry used when the shadow flag is not given
+        self.clock = None
         self.operating_in_earth_shadow: bool = False  # Simulates eclipse periods in LEO
 
         # Energy consumption per minute (% battery/min)
-        self.payload_consumption = {
-            "SAR Radar": 1.5,
-            "Cloud Seeding Device": 2.0,
-            "Ionospheric Particle Collector": 1.0
-        }
+        self.payload_consumption = dict(PAYLOAD_CONSUMPTION)
 
         # Total active time (in minutes)
         self.total_runtime: float = 0.0
 
+    def get_state(self) -> list:
+        """Payload type (index in payload_consumption, -1 if unknown), active flag, runtime and shadow flag."""
+        types = list(self.payload_consumption)
+        type_index = types.index(self.payload_type) if self.payload_type in types else -1
+        return [float(type_index), float(self.active), self.total_runtime, float(self.operating_in_earth_shadow)]
+
+    def set_state(self, state) -> None:
+        type_index, active, total_runtime, in_shadow = state
+        if type_index >= 0:
+            self.payload_type = list(self.payload_consumption)[int(type_index)]
+        self.active = bool(active)
+        self.total_runtime = total_runtime
+        self.operating_in_earth_shadow = bool(in_shadow)
+
+    def report_fields(self) -> dict:
+        """Payload type (index in payload_consumption), active flag, runtime and shadow flag."""
+        return {"pay": str(int(self.get_state()[0])), "act": "1" if self.active else "0",
+                "run": f"{self.total_runtime:g}", "shd": "1" if self.operating_in_earth_shadow else "0"}
+
+    def connect(self, spacecraft) -> None:
+        """Connects to the power and communication subsystems and to the orbit geometry of the spacecraft."""
+        self.attach_power(spacecraft.power_subsystem)
+        self.attach_comms(spacecraft.comms_subsystem)
+        self.attach_eclipse_index(spacecraft.get_eclipse_index(), spacecraft.clock)
+
+    def attach_eclipse_index(self, eclipse_index, clock) -> None:
+        """Uses precomputed eclipse windows and the mission clock to know when the payload is in Earth's shadow."""
+        self.eclipse_index = eclipse_index
+        self.clock = clock
+
     def attach_power(self, power_subsystem) -> None:
         """Connects to the power subsystem."""
         self.power_subsystem = power_subsystem
@@ -29,6 +66,10 @@ class Payload_Subsystem (Subsystem):
         """Connects to the communication subsystem."""
         self.comms_subsystem = comms_subsystem
 
+    def attach_monitor(self, monitor) -> None:
+        """Connects a streaming detector that receives every payload operation."""
+        self.monitor = monitor
+
     def activate_payload(self) -> None:
         """Activates the payload if enough power is available."""
         if not self.power_subsystem or not self.comms_subsystem:
@@ -37,7 +78,7 @@ class Payload_Subsystem (Subsystem):
         if self.active:
             return  # Already active
 
-        if self.power_subsystem.consume_energy(0.5, log=False):
+        if self.power_subsystem.consume_energy(0.5, log=False, consumer=self.payload_type):
             self.active = True
             battery = self.power_subsystem.get_battery_level()
             self.comms_subsystem.send_status(
@@ -63,20 +104,26 @@ class Payload_Subsystem (Subsystem):
                 skip_summary=True
             )
 
-    def update_operation(self, dt: float, in_earth_shadow: bool = False) -> None:
+    def update_operation(self, dt: float, in_earth_shadow: bool = None) -> None:
         """
         Updates the payload operation over a time interval (dt in minutes),
         taking into account whether the satellite is in Earth's shadow.
+        When in_earth_shadow is not given it comes from the eclipse index (False without one).
         """
         if not self.power_subsystem or not self.comms_subsystem:
             raise Exception("Subsystems not connected.")
 
+        if in_earth_shadow is None:
+            in_earth_shadow = self.eclipse_index is not None and self.eclipse_index.in_shadow(self.clock.now)
+
         self.operating_in_earth_shadow = in_earth_shadow
 
         if self.active:
             rate = self.payload_consumption.get(self.payload_type, 1.2)
             energy_needed = rate * dt
-            success = self.power_subsystem.consume_energy(energy_needed)
+            success = self.power_subsystem.consume_energy(energy_needed, consumer=self.payload_type)
+            if self.monitor is not None:
+                self.monitor.on_payload(dt, energy_needed, success)
 
             if success:
                 self.total_runtime += dt
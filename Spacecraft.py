@@ -1,12 +1,20 @@
-import math as m
-import time
-from power_subsystem import Power_Subsystem
-from altitude_control_subsystem import Altitude_Control_Subsystem
-from comms_subsystem import Communication_Subsystem
-from annomaly_detection_subsystem import AnomalyDetectionSubsystem
-from Payload_Subsystem import Payload_Subsystem
+from array import array
+from simulation_clock import Simulation_Clock, drain_levels
+from subsystems_base import get_subsystem_class
+
+# Attribute of the spacecraft -> registered subsystem (see subsystems_base.register_subsystem)
+DEFAULT_SUBSYSTEMS = {
+    "power_subsystem": "power",
+    "comms_subsystem": "comms",
+    "payload_subsystem": "payload",
+    "altitude_control": "altitude_control",
+    "anomaly_detection": "anomaly_detection",
+}
+
 class Spacecraft:
-    def __init__(self, norad_id, name, orbital_altitude, orbital_period, mass, country):
+    def __init__(self, norad_id, name, orbital_altitude, orbital_period, mass, country,
+                 power_subsystem=None, payload_subsystem=None, altitude_control=None, telemetry_sink=None,
+                 subsystems=None):
 
         """
         Definition of basic parameters of an spacecraft
@@ -19,6 +27,12 @@ class Spacecraft:
         orbital_period(hours): time that takes to complete an orbit
         mass(kg): initial mass of the spacecraft with full fuel
         country: country that deployed the spacecraft
+        power_subsystem, payload_subsystem, altitude_control: optional prebuilt subsystems
+        (used by Fleet to hand out views onto one row of its arrays)
+        telemetry_sink: where the comms subsystem writes its lines (console by default, see telemetry_sinks)
+        subsystems: replaces entries of DEFAULT_SUBSYSTEMS, e.g. {"payload_subsystem": "my_payload"}
+
+        The subsystems are imported and built the first time they are used.
         """
         self.norad_id = norad_id
         self.name = name
@@ -27,30 +41,124 @@ class Spacecraft:
         self.mass = mass
         self.country = country
 
-        #Attaching the subsystems
-        self.power_subsystem = Power_Subsystem()
-        self.comms_subsystem = Communication_Subsystem()
-        self.payload_subsystem = Payload_Subsystem()
+        #Mission clock shared by the subsystems (minutes)
+        self.clock = Simulation_Clock()
 
-        self.anomaly_detection = AnomalyDetectionSubsystem(self.comms_subsystem, self.power_subsystem, self.payload_subsystem)
-        
-        
-        #Altitude
+        #Encoder of the incremental reports (see enable_delta_reports)
+        self.delta_reports = None
 
-        self.altitude_control = Altitude_Control_Subsystem(orbital_altitude)
-        self.altitude_control.attach_power_system(self.power_subsystem)
-        self.altitude_control.attach_comms(self.comms_subsystem)
+        #Subsystems, built on first use by __getattr__
+        self.telemetry_sink = telemetry_sink
+        self.subsystems = dict(DEFAULT_SUBSYSTEMS, **(subsystems or {}))
+        for attribute, subsystem in (("power_subsystem", power_subsystem),
+                                     ("payload_subsystem", payload_subsystem),
+                                     ("altitude_control", altitude_control)):
+            if subsystem is not None:
+                self.add_subsystem(attribute, subsystem)
 
-        #Comms
+    def __getattr__(self, attribute):
+        """Builds a subsystem the first time it is used (only called when the attribute does not exist yet)"""
+        subsystems = self.__dict__.get("subsystems")
+        if subsystems is None or attribute not in subsystems:
+            raise AttributeError(f"'Spacecraft' object has no attribute '{attribute}'")
+        subsystem_class = get_subsystem_class(subsystems[attribute])
+        return self.add_subsystem(attribute, subsystem_class.build(self))
 
-        self.comms_subsystem.attach_power_system(self.power_subsystem)
-        
-        #Power
-        self.power_subsystem.attach_comms(self.comms_subsystem)
+    def add_subsystem(self, attribute, subsystem):
+        """Adds a subsystem and connects it with the others"""
+        setattr(self, attribute, subsystem)
+        subsystem.connect(self)
+        return subsystem
+
+    def get_eclipse_index(self):
+        """Eclipse windows of this orbit, computed once and shared by the spacecraft with the same orbit"""
+        from orbit_geometry import eclipse_index
+        return eclipse_index(self.orbital_altitude, self.orbital_period)
+
+    def snapshot(self):
+        """
+        Returns the whole state of the spacecraft as one flat array of floats:
+        clock, power, altitude control, payload and finally comms (its length varies with sent_chars)
+        """
+        return array("d", [self.clock.now,
+                           *self.power_subsystem.get_state(),
+                           *self.altitude_control.get_state(),
+                           *self.payload_subsystem.get_state(),
+                           *self.comms_subsystem.get_state()])
+
+    def restore(self, snapshot):
+        """Goes back to a state returned by snapshot(), the snapshot can be restored many times"""
+        self.clock.now = snapshot[0]
+        self.power_subsystem.set_state(snapshot[1:4])
+        self.altitude_control.set_state(snapshot[4:8])
+        self.payload_subsystem.set_state(snapshot[8:12])
+        self.comms_subsystem.set_state(snapshot[12:])
+
+    def set_telemetry_sink(self, sink):
+        """Changes where the telemetry of this spacecraft is written, e.g. Null_Sink() to run silently"""
+        self.telemetry_sink = sink
+        self.comms_subsystem.set_sink(sink)
+
+    def enable_downlink(self, frame_size=2048, level=6, hold=False):
+        """Sends the telemetry by priority in compressed frames (call flush_downlink at the end),
+        with hold the frames wait for flush_downlink or a ground contact"""
+        self.comms_subsystem.enable_downlink(frame_size, level, hold)
+
+    def flush_downlink(self):
+        self.comms_subsystem.flush_downlink()
+
+    def open_telemetry_log(self, path):
+        """Starts writing every message to a binary telemetry log, returns the writer (close it at the end)"""
+        from telemetry_log import Telemetry_Log_Writer
+        writer = Telemetry_Log_Writer(path)
+        self.comms_subsystem.attach_log(writer)
+        return writer
+
+    def enable_energy_ledger(self, chunk_size=4096, max_chunks=64):
+        """Starts recording every change of the battery by consumer, returns the energy_ledger.Energy_Ledger.
+        Entries must go forward in time, start a new ledger after restoring an earlier snapshot."""
+        from energy_ledger import Energy_Ledger
+        ledger = Energy_Ledger(chunk_size, max_chunks)
+        self.power_subsystem.attach_ledger(ledger)
+        return ledger
+
+    def record_commands(self, path, checkpoint_every=0):
+        """Starts recording the commands of this spacecraft to a log that command_log.replay re-executes,
+        returns the Command_Recorder (close it at the end)"""
+        from command_log import Command_Recorder
+        return Command_Recorder(self, path, checkpoint_every)
+
+    def enable_metrics(self, metrics=None, timers=True):
+        """
+        Counts energy per consumer, characters, charge cycles and ACS charging iterations in an
+        instrumentation.Metrics (a new one by default), and times the hot methods when timers is True.
+        Returns the metrics.
+        """
+        from instrumentation import HOT_METHODS, Metrics
+        if metrics is None:
+            metrics = Metrics()
+        for attribute in self.subsystems:
+            getattr(self, attribute).attach_metrics(metrics)
+        if timers:
+            for attribute, methods in HOT_METHODS.items():
+                for method in methods:
+                    metrics.instrument(getattr(self, attribute), method)
+        return metrics
 
-        #Payload
-        self.payload_subsystem.attach_power(self.power_subsystem)
-        self.payload_subsystem.attach_comms(self.comms_subsystem)
+    def disable_metrics(self):
+        """Removes the counters and timers, the subsystems go back to their uninstrumented methods"""
+        from instrumentation import HOT_METHODS
+        for attribute in self.subsystems:
+            subsystem = getattr(self, attribute)
+            subsystem.attach_metrics(None)
+            for method in HOT_METHODS.get(attribute, ()):
+                vars(subsystem).pop(method, None)
+
+    def start_profiler(self, metrics=None, interval=0.005):
+        """Samples which method of this spacecraft is running (e.g. report_status or simulate_orbit)
+        every interval seconds, returns the instrumentation.Method_Profiler (call stop() at the end)"""
+        from instrumentation import Method_Profiler, Metrics
+        return Method_Profiler(self, Metrics() if metrics is None else metrics, interval)
 
     def get_battery_status(self):
         self.comms_subsystem.send_status(
@@ -63,6 +171,22 @@ class Spacecraft:
         else:
             self.comms_subsystem.send_status("[Altitude] Desired altitude is not possible")
     
+    def altitude_cost(self, new_altitudes):
+        """Dry run of change_altitude for one or many altitudes, see Altitude_Control_Subsystem.altitude_cost.
+        Altitudes out of range are not feasible."""
+        import numpy as np
+        from altitude_control_subsystem import plain_cost
+        new_altitudes = np.asarray(new_altitudes, dtype=float)
+        valid = (new_altitudes > 50) & (new_altitudes <= 2000)
+        # A rejected altitude costs nothing: same as staying at the current one, without the charging check
+        cost = self.altitude_control.altitude_cost(np.where(valid, new_altitudes, self.altitude_control.altitude))
+        return plain_cost(cost._replace(feasible=cost.feasible & valid, low_battery=cost.low_battery & valid,
+                                        charging_minutes=np.where(valid, cost.charging_minutes, 0)))
+
+    def orientation_cost(self, orientations):
+        """Dry run of change_orientation for one [x, y, z] or an array of shape (n, 3)"""
+        return self.altitude_control.orientation_cost(orientations)
+
     def change_orientation(self, x, y, z):
         self.altitude_control.update_orientation([x,y,z])
 
@@ -72,29 +196,90 @@ class Spacecraft:
             f"[Battery] Remaining: {self.power_subsystem.get_battery_level():.3f}%",
         skip_summary=True)
 
+    def enable_delta_reports(self, keyframe_every=10):
+        """
+        report_status sends one compact message with only the fields that changed since the last report,
+        and every keyframe_every reports a keyframe with all of them (see status_reports)
+        """
+        from status_reports import Delta_Report_Encoder
+        self.delta_reports = Delta_Report_Encoder(keyframe_every)
+
+    def disable_delta_reports(self):
+        self.delta_reports = None
+
     def report_status(self):
+        if self.delta_reports is not None:
+            self.report_delta()
+            return
         self.comms_subsystem.send_status(f"Spacecraft: {self.name} (NORAD ID: {self.norad_id})")
         self.altitude_control.report_ACS()
         self.get_battery_status()
         self.payload_subsystem.get_status()
         self.check_anomalies()
 
+    def report_delta(self):
+        """Incremental report, the payload check only runs when the active flag is reported"""
+        fields = {"id": str(self.norad_id)}
+        for subsystem in (self.power_subsystem, self.altitude_control, self.payload_subsystem):
+            fields.update(subsystem.report_fields())
+        report, changed = self.delta_reports.encode(fields)
+        self.comms_subsystem.send_status(report)
+        if "act" in changed:
+            self.check_anomalies()
+
     def simulate_orbit(self):
         """
-        Simulates the orbital period of the spacecraft, consuming energy for each minute of the orbit
+        Simulates the orbital period of the spacecraft, consuming 0.2% of energy for each minute of the orbit.
+        The clock jumps between events (low battery, hourly reports, end of orbit) instead of every minute.
         """
         total_minutes = int(self.orbital_period * 60)
         self.comms_subsystem.send_status(f"[Orbit] Starting orbit simulation for {total_minutes} minutes.")
-        for minute in range(1, total_minutes + 1):
-            # Simulates the consumption of energy for each minute
-            self.power_subsystem.consume_energy(0.2, log=False)
-            if minute % 60 == 0 or minute == total_minutes:
-                self.comms_subsystem.send_status(
-                    f"[Orbit] Minute {minute}: Remaining battery: {self.power_subsystem.get_battery_level():.2f}%",
-                    skip_summary=True
-                )
+        self.clock.run_orbit(self.power_subsystem, self.comms_subsystem, total_minutes, rate=0.2)
         self.comms_subsystem.send_status("[Orbit] Orbit simulation completed.")
 
+    def iter_orbit(self, chunk_size=1024):
+        """
+        Same orbit as simulate_orbit, but instead of the hourly reports yields the state of every minute
+        in NumPy chunks with the columns of timeline.FIELDS. The orbit advances one chunk at a time,
+        so a generator that is not consumed to the end leaves the spacecraft after the last chunk taken.
+        """
+        import numpy as np
+        from timeline import sample
+        rate = 0.2
+        total_minutes = int(self.orbital_period * 60)
+        start = np.array(sample(self), dtype=float)
+        level, charging = self.power_subsystem.battery_level, self.power_subsystem.solar_charging
+
+        # Same battery levels as run_orbit, minute by minute from the start of the orbit
+        draining = level > 0
+        for first in range(1, total_minutes + 1, chunk_size):
+            minutes = np.arange(first, min(first + chunk_size, total_minutes + 1))
+            chunk = np.tile(start, (len(minutes), 1))
+            chunk[:, 0] += minutes
+            if draining:
+                levels = drain_levels(level, rate, len(minutes))
+                level = levels[-1]
+                chunk[:, 1] = levels
+                chunk[:, 2] = charging | (chunk[:, 1] < 30)
+            self.clock.run_orbit(self.power_subsystem, self.comms_subsystem, len(minutes), rate, reports=False)
+            yield chunk
+
+    def iter_timeline(self, duration, step=1):
+        """
+        Advances the payload, power (general consumption and solar charging) and the clock for duration
+        minutes, yielding a timeline.Timeline_Sample after every step. Nothing is kept, so it runs in constant
+        memory; use Null_Sink to skip the telemetry text and timeline.chunks for NumPy arrays.
+        """
+        from timeline import sample
+        elapsed = 0
+        while elapsed < duration:
+            dt = min(step, duration - elapsed)
+            self.payload_subsystem.update_operation(dt)
+            self.power_subsystem.update_power(dt)
+            self.clock.advance(dt)
+            elapsed += dt
+            yield sample(self)
+
     def activate_payload(self, payload_type):
         """
         Activates the payload subsystem with the specified payload type
@@ -106,13 +291,29 @@ class Spacecraft:
         self.payload_subsystem.set_payload_type(payload_type)
         self.payload_subsystem.activate_payload()
 
-    def update_payload_operation(self, dt, in_earth_shadow=False):
+    def update_payload_operation(self, dt, in_earth_shadow=None):
         """
         Updates the payload operation based on the time interval and whether the spacecraft is in Earth's shadow
+        (taken from the orbit geometry when it is not given)
         """
         self.payload_subsystem.update_operation(dt, in_earth_shadow)
+        self.clock.advance(dt)
         self.payload_subsystem.get_status()
 
+    def plan_payload_schedule(self, durations, payload_on, payload_type=None, min_battery=0.0):
+        """
+        Evaluates payload schedules from the current battery, payload and orbit position without running them
+        (see duty_cycle_planner.evaluate_schedules). Shadow periods come from the orbit geometry.
+        """
+        from duty_cycle_planner import evaluate_schedules, shadow_flags
+        payload = self.payload_subsystem
+        return evaluate_schedules(
+            durations, payload_on,
+            payload.payload_type if payload_type is None else payload_type,
+            shadow_flags(self.get_eclipse_index(), durations, self.clock.now),
+            self.power_subsystem.get_battery_level(), min_battery,
+            active=payload.payload_type if payload.active else None)
+
     def deactivate_payload(self):
         """
         Deactivates the payload subsystem
@@ -125,7 +326,5 @@ class Spacecraft:
         """
         self.anomaly_detection.check_active_payload()
 
-    def handle_eclipse(self, is_sunlight_phase, is_charging):
+    def handle_eclipse(self, is_sunlight_phase=None, is_charging=None):
         self.anomaly_detection.handle_eclipse(is_sunlight_phase, is_charging)
-
-sc = Spacecraft(1332, "LEO", 200, 2, 400, "USA")
\ No newline at end of file
@@ -1,11 +1,48 @@
-from power_subsystem import Power_Subsystem
+from collections import namedtuple
 from subsystems_base import Subsystem
+from simulation_clock import Simulation_Clock, charging_minutes
+
+# Result of a dry run: energy(%), whether the maneuver is performed, battery after it(%),
+# whether it goes below 30% and the minutes of the charging cycle that follows (0 if none)
+Maneuver_Cost = namedtuple("Maneuver_Cost", "energy feasible battery_after low_battery charging_minutes")
+
+
+def plain_cost(cost):
+    """The Maneuver_Cost of a single maneuver with Python numbers instead of 0-d NumPy arrays"""
+    import numpy as np
+    if np.ndim(cost.energy):
+        return cost
+    return Maneuver_Cost(*(np.asarray(value).item() for value in cost))
+
 
 class Altitude_Control_Subsystem(Subsystem):
     def __init__(self, altitude):
         self.orientation = [0, 0, 0] #Pitch, Roll, Yaw
         self.altitude = altitude
         self.power_system = None  # It will be connected from Spacecraft
+        self.clock = Simulation_Clock()
+
+    def get_state(self):
+        """Altitude and orientation (pitch, roll, yaw) as floats"""
+        return [self.altitude, *self.orientation]
+
+    def set_state(self, state):
+        # Whole numbers go back to int so the reports look the same as before the snapshot
+        altitude, *orientation = [int(value) if value.is_integer() else value for value in state]
+        self.altitude = altitude
+        self.orientation = orientation
+
+    def report_fields(self):
+        return {"alt": f"{self.altitude:g}", "ori": ",".join(f"{angle:g}" for angle in self.orientation)}
+
+    @classmethod
+    def build(cls, spacecraft):
+        return cls(spacecraft.orbital_altitude)
+
+    def connect(self, spacecraft):
+        self.attach_power_system(spacecraft.power_subsystem)
+        self.attach_comms(spacecraft.comms_subsystem)
+        self.attach_clock(spacecraft.clock)
 
     def attach_power_system(self, power_system):
         """Method to connect the power subsystem to the altitude system in order to consume battery when 
@@ -13,6 +50,10 @@ class Altitude_Control_Subsystem(Subsystem):
         """
         self.power_system = power_system
     
+    def attach_clock(self, clock):
+        """Shares the mission clock of the spacecraft, the charging cycles advance it"""
+        self.clock = clock
+
     def attach_comms(self, comm_system):
         """Allows the altitude subsystem to use the comms subsystem to send messages"""
         self.comm_system = comm_system
@@ -29,7 +70,7 @@ class Altitude_Control_Subsystem(Subsystem):
         self.comm_system.send_status(f"[Altitude] Maneuvering from {self.altitude} km to {target_altitude} km, (Δ={delta} km)")
         self.comm_system.send_status(f"[Altitude] Battery needed: {energy_needed:.2f}%")
 
-        if self.power_system.consume_energy(energy_needed): # Calls the power subsystem to consume energy
+        if self.power_system.consume_energy(energy_needed, consumer="altitude"): # Calls the power subsystem to consume energy
             self.altitude = target_altitude
             self.comm_system.send_status(f"[Altitude] Maneuver completed. New altitud: {self.altitude} km")
         else:
@@ -39,12 +80,11 @@ class Altitude_Control_Subsystem(Subsystem):
 
         if self.power_system.get_battery_level() < 30: # Calls the power subsytem if the battery is low to start solar charge
             self.comm_system.send_status("[Power] Charging...")
-            minuto = 1
             max_minutos = 1000  # Security limit to avoid infinite loops
-            while self.power_system.battery_level < 95 and minuto <= max_minutos:
-                self.comm_system.send_status(f"[Time] → Minute {minuto}", skip_summary=True)
-                self.power_system.update_power(1)  # 1 minute simulated
-                minuto += 1
+            # Jumps straight to the 95% cap instead of simulating minute by minute
+            minuto = self.clock.run_charging_cycle(self.power_system, self.comm_system, max_minutos) + 1
+            if self.metrics is not None:
+                self.metrics.add("acs_charging_iterations", minuto - 1)
             if minuto > max_minutos:
                 self.comm_system.send_status("[ERROR] Charging loop exceeded safe limit.", skip_summary=True)
             self.comm_system.send_status("[Power] Charging cycle completed. Battery at 95%.")
@@ -67,7 +107,7 @@ class Altitude_Control_Subsystem(Subsystem):
         self.comm_system.send_status(f"[Orientation] Orienting from: {self.orientation} to {target_orientation}")
         self.comm_system.send_status(f"[Orientation] Battery required: {energy_needed:.2f}%")
 
-        if self.power_system.consume_energy(energy_needed):
+        if self.power_system.consume_energy(energy_needed, consumer="orientation"):
             self.orientation = target_orientation
             self.comm_system.send_status(f"[Orientation] Orientation completed. New orientation: {self.orientation}")
         else:
@@ -77,16 +117,50 @@ class Altitude_Control_Subsystem(Subsystem):
 
         if self.power_system.get_battery_level() < 30:
             self.comm_system.send_status("[Power] Charging...", skip_summary=True)
-            minuto = 1
             max_minutos = 1000
-            while self.power_system.battery_level < 95 and minuto <= max_minutos:
-                self.comm_system.send_status(f"[Time] → Minute {minuto}", skip_summary=True)
-                self.power_system.update_power(1)
-                minuto += 1
+            minuto = self.clock.run_charging_cycle(self.power_system, self.comm_system, max_minutos) + 1
+            if self.metrics is not None:
+                self.metrics.add("acs_charging_iterations", minuto - 1)
             if minuto > max_minutos:
                 self.comm_system.send_status("[ERROR] Charging loop exceeded safe limit.", skip_summary=True)
             self.comm_system.send_status("[Power] Charging cycle completed.")
 
+    def altitude_cost(self, target_altitudes):
+        """
+        Dry run of update_altitude for one or many target altitudes (km) at once, nothing is changed.
+        Returns a Maneuver_Cost of NumPy arrays, or of Python numbers for one target altitude.
+        The energy of the telemetry messages is not included.
+        """
+        import numpy as np
+        energy = np.abs(np.asarray(target_altitudes, dtype=float) - self.altitude) * 0.1
+        return self._maneuver_cost(energy)
+
+    def orientation_cost(self, target_orientations):
+        """Dry run of update_orientation for one orientation [pitch, roll, yaw] or an array of shape (n, 3)"""
+        import numpy as np
+        delta = np.abs(np.asarray(target_orientations, dtype=float) - np.asarray(self.orientation, dtype=float))
+        return self._maneuver_cost(delta.sum(axis=-1) / 10.0)
+
+    def _maneuver_cost(self, energy):
+        import numpy as np
+        power = self.power_system
+        battery = power.get_battery_level()
+        feasible = np.full(energy.shape, battery > 0)  # consume_energy works while there is battery left
+        battery_after = np.maximum(battery - energy, 0) if battery > 0 else np.full(energy.shape, battery)
+        low_battery = battery_after < 30
+
+        charging = np.zeros(energy.shape, dtype=int)
+        cycle = dict(charge_rate=power.charge_rate, consumption_rate=power.consumption_rate,
+                     eclipse_index=power.eclipse_index, start=self.clock.now)
+        if power.solar_charging or battery > 0:
+            # consume_energy starts the charging below 30%, so the cycle only charges up to 95%
+            charging[low_battery] = [charging_minutes(float(level), True, **cycle)
+                                     for level in battery_after[low_battery]]
+        else:
+            # Empty battery without charging: the maneuver does nothing, the cycle is simulated once (cached)
+            charging[low_battery] = charging_minutes(battery, False, **cycle)
+        return plain_cost(Maneuver_Cost(energy, feasible, battery_after, low_battery, charging))
+
     def report_ACS(self):
         self.comm_system.send_status(f"[Altitude] Current altitude: {self.altitude} km")
         self.comm_system.send_status(f"[Orientation] Current orientation: {self.orientation}")
@@ -0,0 +1,71 @@
+import unittest
+
+import numpy as np
+from Spacecraft import Spacecraft
+from telemetry_sinks import Null_Sink
+
+
+def make_spacecraft():
+    spacecraft = Spacecraft(1, "Maneuver", 500, 2, 400, "USA", telemetry_sink=Null_Sink())
+    # The dry runs leave out the energy of the telemetry messages: without a link they cost nothing
+    spacecraft.comms_subsystem.connected = False
+    spacecraft.enable_metrics(timers=False)
+    return spacecraft
+
+
+class Maneuver_Cost_Test(unittest.TestCase):
+    def check_against_real_runs(self, spacecraft, cost, targets, run, consumer):
+        start = spacecraft.snapshot()
+        metrics = spacecraft.power_subsystem.metrics
+        for k, target in enumerate(targets):
+            spacecraft.restore(start)
+            metrics.reset()
+            run(spacecraft, target)
+            with self.subTest(target=target):
+                charging = metrics.counter("acs_charging_iterations")
+                self.assertEqual(cost.charging_minutes[k], charging)
+                self.assertEqual(bool(cost.low_battery[k]), charging > 0)
+                # consume_energy is only counted when the maneuver is performed
+                self.assertEqual(bool(cost.feasible[k]), ("energy_consumed", consumer) in metrics.counters)
+                if not charging:
+                    self.assertEqual(spacecraft.power_subsystem.battery_level, cost.battery_after[k])
+        spacecraft.restore(start)
+
+    def test_altitude_cost_matches_the_maneuvers(self):
+        spacecraft = make_spacecraft()
+        targets = [500, 520, 900, 1200, 1500, 2000, 40, 2500, 100, 60]
+        for battery_level in (100.0, 62.5, 30.0, 12.0, 0.0):
+            spacecraft.power_subsystem.battery_level = battery_level
+            cost = spacecraft.altitude_cost(targets)
+            self.check_against_real_runs(spacecraft, cost, targets,
+                                         lambda sc, target: sc.change_altitude(target), "altitude")
+
+    def test_orientation_cost_matches_the_maneuvers(self):
+        spacecraft = make_spacecraft()
+        targets = np.random.default_rng(0).uniform(-180, 180, (30, 3)).round(1).tolist()
+        for battery_level in (100.0, 45.0):
+            spacecraft.power_subsystem.battery_level = battery_level
+            cost = spacecraft.orientation_cost(targets)
+            np.testing.assert_allclose(cost.energy, [sum(abs(angle) for angle in target) / 10 for target in targets])
+            self.check_against_real_runs(spacecraft, cost, targets,
+                                         lambda sc, target: sc.change_orientation(*target), "orientation")
+
+    def test_single_maneuver_gives_python_numbers(self):
+        spacecraft = make_spacecraft()
+        spacecraft.power_subsystem.battery_level = 40.0
+        for cost, many in ((spacecraft.altitude_cost(1500), spacecraft.altitude_cost([1500])),
+                           (spacecraft.altitude_cost(10), spacecraft.altitude_cost([10])),
+                           (spacecraft.orientation_cost([10, 20, 30]), spacecraft.orientation_cost([[10, 20, 30]]))):
+            self.assertEqual([type(value) for value in cost], [float, bool, float, bool, int])
+            self.assertEqual(cost, tuple(value[0] for value in many))
+
+    def test_dry_run_changes_nothing(self):
+        spacecraft = make_spacecraft()
+        before = spacecraft.snapshot()
+        spacecraft.altitude_cost(np.linspace(60, 2000, 1000))
+        spacecraft.orientation_cost([10, 20, 30])
+        self.assertEqual(spacecraft.snapshot(), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
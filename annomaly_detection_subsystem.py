@@ -5,6 +5,26 @@ class AnomalyDetectionSubsystem (Subsystem):
         self.comms = comms_subsystem
         self.power = power_subsystem
         self.payload = payload_subsystem
+        self.stream = None
+
+    @classmethod
+    def build(cls, spacecraft):
+        return cls(spacecraft.comms_subsystem, spacecraft.power_subsystem, spacecraft.payload_subsystem)
+
+    def attach_stream(self, detector):
+        """
+        Connects a Streaming_Anomaly_Detector to the power, payload and comms events.
+        If the detector has no on_alert function, the alerts are sent through comms.
+        """
+        self.stream = detector
+        if detector.on_alert is None:
+            detector.on_alert = self.send_stream_alert
+        self.power.attach_monitor(detector)
+        self.payload.attach_monitor(detector)
+        self.comms.attach_monitor(detector)
+
+    def send_stream_alert(self, rule, value):
+        self.comms.send_status(f"[ALERT] {rule.name}: {rule.metric} {rule.mode} {rule.threshold} ({value:.2f})")
 
     def check_active_payload(self):
     
@@ -23,11 +43,17 @@ class AnomalyDetectionSubsystem (Subsystem):
             f"[STATUS] {payload_type} functioning normally. Payload is active."
         )
 
-    def handle_eclipse(self, is_sunlight_phase, is_charging):
+    def handle_eclipse(self, is_sunlight_phase=None, is_charging=None):
         """
         Detects eclipse or solar panel malfunction.
         If the spacecraft is in sunlight phase but not charging, switch to battery and send alert.
+        Flags that are not given come from the eclipse index of the power subsystem (panels charging in sunlight).
         """
+        eclipse_index = getattr(self.power, "eclipse_index", None)
+        if is_sunlight_phase is None:
+            is_sunlight_phase = eclipse_index is None or not eclipse_index.in_shadow(self.power.clock.now)
+        if is_charging is None:
+            is_charging = is_sunlight_phase
         if is_sunlight_phase and not is_charging:
             self.comms.send_status("[ECLIPSE/MALFUNCTION] No power charging detected during sunlight phase. Possible eclipse or solar panel malfunction. Switching to battery power.")
             self.power.switch_to_battery()
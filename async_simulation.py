@@ -0,0 +1,260 @@
+import asyncio
+import heapq
+import itertools
+from collections import deque
+
+
+class Virtual_Clock:
+    def __init__(self):
+        """
+        Virtual mission clock (minutes) for asyncio coroutines. Nothing really sleeps: when every
+        task is waiting, the clock jumps to the next wake-up time. A spacecraft without tasks costs nothing.
+        Create it inside the running event loop (simulate() does it).
+        If a task raises, run() cancels the other tasks and raises that exception.
+        close() undoes what the simulated objects changed (simulate() calls it at the end).
+        """
+        self.now = 0.0
+        self._timers = []  # (wake-up time, order, future)
+        self._order = itertools.count()
+        self._running = 0  # Tasks that are not waiting on the clock or on a queue
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.tasks = set()  # Tasks spawned that have not finished
+        self.error = None  # First exception raised by a task
+        self._closers = []  # Called by close(), last registered first
+
+    def spawn(self, coroutine):
+        """Schedules a coroutine driven by this clock and returns its task"""
+        self._running += 1
+        self._idle.clear()
+        task = asyncio.get_running_loop().create_task(self._track(coroutine))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def _track(self, coroutine):
+        try:
+            return await coroutine
+        except Exception as error:
+            # Kept for run() instead of being lost in the task, the clock must not stop silently
+            if self.error is None:
+                self.error = error
+            self._idle.set()
+        finally:
+            self._set_waiting()
+
+    def _set_waiting(self):
+        self._running -= 1
+        if self._running == 0:
+            self._idle.set()
+
+    def wake(self, future):
+        """Resolves a future awaited with wait_for, the waiting task counts as running again"""
+        if not future.done():
+            self._running += 1
+            self._idle.clear()
+            future.set_result(None)
+
+    async def wait_for(self, future):
+        """Waits for a future that some other task will resolve with wake()"""
+        self._set_waiting()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if not future.done() or future.cancelled():
+                self._running += 1  # Balances the decrement of _track
+            raise
+
+    async def sleep(self, minutes):
+        """Waits minutes of virtual time"""
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._timers, (self.now + minutes, next(self._order), future))
+        await self.wait_for(future)
+
+    async def run(self, until=None):
+        """Advances the clock until no task is waiting on it, or until the given time"""
+        while True:
+            await self._idle.wait()
+            if self.error is not None:
+                await self._cancel_tasks()
+                raise self.error
+            while self._timers and self._timers[0][2].cancelled():
+                heapq.heappop(self._timers)
+            if not self._timers or (until is not None and self._timers[0][0] > until):
+                break
+            wake_up = self._timers[0][0]
+            self.now = wake_up
+            while self._timers and self._timers[0][0] == wake_up:
+                self.wake(heapq.heappop(self._timers)[2])
+        if until is not None:
+            self.now = max(self.now, until)
+
+    def on_close(self, callback):
+        """Registers a function to call when the simulation ends"""
+        self._closers.append(callback)
+
+    def close(self):
+        while self._closers:
+            self._closers.pop()()
+
+    async def _cancel_tasks(self):
+        tasks = [task for task in self.tasks if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class Downlink_Queue:
+    def __init__(self, clock, maxsize=32):
+        """Bounded queue of messages waiting to be transmitted, a full queue makes the sender wait"""
+        self.clock = clock
+        self.maxsize = maxsize
+        self._items = deque()
+        self._putters = deque()
+        self._getters = deque()
+
+    def __len__(self):
+        return len(self._items)
+
+    def put_nowait(self, item):
+        """Queues an item without waiting, even over maxsize (for callers that cannot wait)"""
+        self._items.append(item)
+        if self._getters:
+            self.clock.wake(self._getters.popleft())
+
+    async def put(self, item):
+        while len(self._items) >= self.maxsize:
+            future = asyncio.get_running_loop().create_future()
+            self._putters.append(future)
+            await self.clock.wait_for(future)
+        self._items.append(item)
+        if self._getters:
+            self.clock.wake(self._getters.popleft())
+
+    async def get(self):
+        while not self._items:
+            future = asyncio.get_running_loop().create_future()
+            self._getters.append(future)
+            await self.clock.wait_for(future)
+        item = self._items.popleft()
+        if self._putters:
+            self.clock.wake(self._putters.popleft())
+        return item
+
+
+class Async_Spacecraft:
+    def __init__(self, spacecraft, clock, downlink_size=32, chars_per_minute=600):
+        """
+        Runs the operations of a Spacecraft as coroutines on a Virtual_Clock.
+        Every message of the comms subsystem goes through the bounded downlink queue: send_status waits
+        while it is full, the messages of the subsystems themselves (a synchronous call cannot wait)
+        are queued anyway and make the next send_status wait longer.
+        A maneuver that ends in a charging cycle keeps its task busy for the minutes of the cycle.
+        The original send_status is put back when the clock is closed.
+
+        downlink_size: messages that fit in the downlink queue
+        chars_per_minute: speed of the downlink
+        """
+        self.spacecraft = spacecraft
+        self.clock = clock
+        self.chars_per_minute = chars_per_minute
+        self.downlink = Downlink_Queue(clock, downlink_size)
+        self._downlink_task = None
+
+        comms = spacecraft.comms_subsystem
+        self._send_now = comms.send_status
+        self._own_send = "send_status" in vars(comms)  # Already wrapped at instance level (e.g. by the metrics)
+        comms.send_status = self._queue_status
+        clock.on_close(self.close)
+
+    def close(self):
+        """Gives the comms subsystem its send_status back"""
+        comms = self.spacecraft.comms_subsystem
+        if self._own_send:
+            comms.send_status = self._send_now
+        else:
+            vars(comms).pop("send_status", None)
+
+    def _sync_clock(self):
+        # Never backwards: a charging cycle may have moved the mission clock ahead of the virtual one
+        if self.clock.now > self.spacecraft.clock.now:
+            self.spacecraft.clock.now = self.clock.now
+
+    def _queue_status(self, status, skip_summary=False):
+        """Replaces send_status of the comms subsystem while the simulation runs"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return self._send_now(status, skip_summary)  # Outside the simulation
+        self.start_downlink()
+        self.downlink.put_nowait((status, skip_summary))
+
+    def start_downlink(self):
+        """Starts the task that transmits the queued messages (called by the first send_status)"""
+        if self._downlink_task is None:
+            self._downlink_task = self.clock.spawn(self._transmit())
+
+    async def _transmit(self):
+        while True:
+            status, skip_summary = await self.downlink.get()
+            self._sync_clock()
+            self._send_now(status, skip_summary)
+            await self.clock.sleep(len(str(status)) / self.chars_per_minute)
+
+    async def send_status(self, status, skip_summary=False):
+        """Queues a message for the downlink, waits while the queue is full"""
+        self.start_downlink()
+        await self.downlink.put((status, skip_summary))
+
+    async def run_payload(self, duration, step=1, in_earth_shadow=False):
+        """Operates the payload for duration minutes, updating it every step minutes"""
+        elapsed = 0
+        while elapsed < duration and self.spacecraft.payload_subsystem.active:
+            dt = min(step, duration - elapsed)
+            await self.clock.sleep(dt)
+            self._sync_clock()
+            self.spacecraft.payload_subsystem.update_operation(dt, in_earth_shadow)
+            elapsed += dt
+
+    async def run_power(self, duration, step=1):
+        """General consumption and solar charging for duration minutes, updated every step minutes"""
+        elapsed = 0
+        while elapsed < duration:
+            dt = min(step, duration - elapsed)
+            await self.clock.sleep(dt)
+            self._sync_clock()
+            self.spacecraft.power_subsystem.update_power(dt)
+            elapsed += dt
+
+    async def _maneuver(self, at, maneuver, *args):
+        if at is not None:
+            await self.clock.sleep(max(at - self.clock.now, 0))
+        self._sync_clock()
+        maneuver(*args)
+        # The charging cycle that may follow moved the mission clock, the task waits the same virtual time
+        busy = self.spacecraft.clock.now - self.clock.now
+        if busy > 0:
+            await self.clock.sleep(busy)
+
+    async def change_altitude(self, new_altitude, at=None):
+        """Performs the maneuver at the given time (now by default)"""
+        await self._maneuver(at, self.spacecraft.change_altitude, new_altitude)
+
+    async def change_orientation(self, x, y, z, at=None):
+        await self._maneuver(at, self.spacecraft.change_orientation, x, y, z)
+
+
+def simulate(setup, until=None):
+    """
+    Runs a co-simulation in one event loop: setup(clock) spawns the coroutines on the clock,
+    then the clock is advanced until every task has finished or until the given time
+    """
+    async def main():
+        clock = Virtual_Clock()
+        try:
+            setup(clock)
+            await clock.run(until)
+        finally:
+            clock.close()
+        return clock
+    return asyncio.run(main())
@@ -0,0 +1,127 @@
+import unittest
+
+from Spacecraft import Spacecraft
+from async_simulation import Async_Spacecraft, simulate
+from telemetry_sinks import Null_Sink, Ring_Buffer_Sink
+
+
+def make_spacecraft(sink=None):
+    return Spacecraft(1, "Async", 200, 2, 400, "USA", telemetry_sink=sink or Null_Sink())
+
+
+class Virtual_Clock_Test(unittest.TestCase):
+    def test_jumps_between_wake_ups(self):
+        woken = []
+
+        async def sleeper(clock, minutes):
+            await clock.sleep(minutes)
+            woken.append(clock.now)
+
+        clock = simulate(lambda clock: [clock.spawn(sleeper(clock, minutes)) for minutes in (30, 5, 1e6)])
+        self.assertEqual(woken, [5, 30, 1e6])
+        self.assertEqual(clock.now, 1e6)
+
+    def test_until(self):
+        clock = simulate(lambda clock: clock.spawn(clock.sleep(100)), until=40)
+        self.assertEqual(clock.now, 40)
+
+    def test_task_exception_is_raised(self):
+        finished = []
+
+        async def failing(clock):
+            await clock.sleep(3)
+            raise RuntimeError("failure")
+
+        async def other(clock):
+            await clock.sleep(100)
+            finished.append(clock.now)
+
+        with self.assertRaisesRegex(RuntimeError, "failure"):
+            simulate(lambda clock: (clock.spawn(failing(clock)), clock.spawn(other(clock))))
+        self.assertEqual(finished, [])
+
+
+class Async_Spacecraft_Test(unittest.TestCase):
+    def test_maneuver_with_ledger(self):
+        spacecraft = make_spacecraft()
+        ledger = spacecraft.enable_energy_ledger()
+        maneuver_end = []
+
+        def setup(clock):
+            simulated = Async_Spacecraft(spacecraft, clock)
+            clock.spawn(simulated.run_power(60))
+
+            async def maneuver():
+                await simulated.change_altitude(1000, at=5)  # Ends with a charging cycle
+                maneuver_end.append(clock.now)
+            clock.spawn(maneuver())
+
+        clock = simulate(setup)
+        self.assertGreaterEqual(clock.now, 60)
+        self.assertGreater(maneuver_end[0], 5)  # The charging cycle took virtual time
+        self.assertGreaterEqual(spacecraft.clock.now, maneuver_end[0])
+        self.assertAlmostEqual(ledger.energy(), spacecraft.power_subsystem.battery_level - 100.0)
+
+    def test_every_message_goes_through_the_queue(self):
+        sink = Ring_Buffer_Sink(10000)
+        spacecraft = make_spacecraft(sink)
+        queued = []
+
+        def setup(clock):
+            simulated = Async_Spacecraft(spacecraft, clock, chars_per_minute=60)
+            downlink_put = simulated.downlink.put_nowait
+            simulated.downlink.put_nowait = lambda item: (queued.append(item), downlink_put(item))
+            spacecraft.activate_payload("SAR Radar")
+            clock.spawn(simulated.run_payload(10))
+            clock.spawn(simulated.run_power(10))
+
+        clock = simulate(setup)
+        self.assertEqual(len(queued), spacecraft.comms_subsystem.messages_sent)
+        transmitting = [line for line in sink.messages() if line.startswith("[Comms] Transmitting")]
+        self.assertEqual(len(transmitting), len(queued))
+        # About a minute per message at 60 characters per minute
+        self.assertGreater(clock.now, len(queued) * 0.5)
+
+    def test_send_status_waits_for_a_full_queue(self):
+        spacecraft = make_spacecraft()
+        sent = []
+
+        def setup(clock):
+            simulated = Async_Spacecraft(spacecraft, clock, downlink_size=1, chars_per_minute=10)
+
+            async def sender():
+                for k in range(3):
+                    await simulated.send_status(f"[Ping] {k}")  # 8 characters, 0.8 minutes each
+                    sent.append(clock.now)
+            clock.spawn(sender())
+
+        simulate(setup)
+        self.assertEqual(sent[0], 0)
+        self.assertGreater(sent[2], sent[1])
+
+    def test_consecutive_runs(self):
+        spacecraft = make_spacecraft()
+        metrics = spacecraft.enable_metrics()
+        timed_send = spacecraft.comms_subsystem.send_status
+
+        def setup(clock):
+            simulated = Async_Spacecraft(spacecraft, clock)
+            clock.spawn(simulated.send_status("[Ping] run"))
+
+        simulate(setup)
+        simulate(setup)
+        self.assertEqual(spacecraft.comms_subsystem.messages_sent, 2)
+        self.assertIs(spacecraft.comms_subsystem.send_status, timed_send)
+        self.assertEqual(metrics.timers[("send_status", "")][0], 2)
+        spacecraft.disable_metrics()
+        self.assertNotIn("send_status", vars(spacecraft.comms_subsystem))
+
+    def test_outside_the_simulation(self):
+        spacecraft = make_spacecraft()
+        simulate(lambda clock: Async_Spacecraft(spacecraft, clock))
+        spacecraft.send_message("after")  # Sent right away, there is no event loop
+        self.assertEqual(spacecraft.comms_subsystem.messages_sent, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,193 @@
+"""
+Benchmarks of the simulation hot paths.
+
+    python benchmarks/bench_simulation.py                       # prints the timings
+    python benchmarks/bench_simulation.py --save baseline.json  # stores them as a baseline
+    python benchmarks/bench_simulation.py --compare baseline.json --threshold 0.2
+
+In compare mode every benchmark that is more than threshold slower than the baseline is
+flagged and the exit code is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from Spacecraft import Spacecraft
+from fleet import Fleet
+from telemetry_sinks import Null_Sink
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+    return register
+
+
+def new_spacecraft(orbital_period=2):
+    return Spacecraft(1332, "LEO", 200, orbital_period, 400, "USA", telemetry_sink=Null_Sink())
+
+
+def simulate_orbit(orbital_period):
+    def run():
+        new_spacecraft(orbital_period).simulate_orbit()
+    return run
+
+
+for hours in (2, 24, 240):
+    benchmark(f"simulate_orbit[{hours}h]")(simulate_orbit(hours))
+
+
+def send_status(skip_summary, messages=10000):
+    def run():
+        sc = new_spacecraft()
+        sc.power_subsystem.battery_level = 1e9  # Never runs out of battery
+        for _ in range(messages):
+            sc.comms_subsystem.send_status("[Bench] Telemetry message of medium size", skip_summary=skip_summary)
+    return run
+
+
+benchmark("send_status[skip_summary]")(send_status(True))
+benchmark("send_status[with_summary]")(send_status(False))
+
+
+@benchmark("acs_charging_loop")
+def acs_charging_loop():
+    sc = new_spacecraft()
+    for _ in range(100):
+        sc.power_subsystem.battery_level = 0.5
+        sc.power_subsystem.solar_charging = False
+        sc.change_altitude(250 if sc.altitude_control.altitude == 200 else 200)
+
+
+@benchmark("payload_update_operation[10000x1min]")
+def payload_update_operation():
+    sc = new_spacecraft()
+    sc.power_subsystem.battery_level = 1e9
+    sc.activate_payload("SAR Radar")
+    for _ in range(10000):
+        sc.payload_subsystem.update_operation(1)
+
+
+@benchmark("report_status[1000]")
+def report_status():
+    sc = new_spacecraft()
+    for _ in range(1000):
+        sc.report_status()
+
+
+def fleet_step(size, steps=100):
+    def run():
+        fleet = Fleet(size)
+        fleet.activate_payload()
+        for _ in range(steps):
+            fleet.step(1)
+    return run
+
+
+def simulated_duration(minutes):
+    def run():
+        sc = new_spacecraft()
+        sc.activate_payload("Ionospheric Particle Collector")
+        for _ in range(minutes):
+            sc.payload_subsystem.update_operation(1)
+            sc.power_subsystem.update_power(1)
+    return run
+
+
+# Scaling curves
+for size in (100, 1000, 10000, 100000):
+    benchmark(f"fleet_scaling[{size}]")(fleet_step(size))
+for minutes in (1000, 10000, 100000):
+    benchmark(f"duration_scaling[{minutes}min]")(simulated_duration(minutes))
+
+
+FIRST_STEP = (
+    "from Spacecraft import Spacecraft; from telemetry_sinks import Null_Sink; "
+    "Spacecraft(1332, 'LEO', 200, 2, 400, 'USA', telemetry_sink=Null_Sink()).simulate_orbit()"
+)
+
+
+@benchmark("import_to_first_step")
+def import_to_first_step():
+    """A fresh interpreter that imports Spacecraft and runs one orbit, like a short-lived worker"""
+    subprocess.run([sys.executable, "-c", FIRST_STEP], cwd=REPO, check=True)
+
+
+@benchmark("interpreter_startup")
+def interpreter_startup():
+    """Reference for import_to_first_step: the same interpreter doing nothing"""
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+
+
+def measure(function, repeat):
+    """Best wall-clock time of repeat runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmarks(names=None, repeat=3):
+    results = {}
+    for name, function in BENCHMARKS.items():
+        if names and not any(selected in name for selected in names):
+            continue
+        results[name] = measure(function, repeat)
+        print(f"{name:40s} {results[name] * 1000:10.2f} ms")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Returns the names of the benchmarks more than threshold slower than the baseline"""
+    regressions = []
+    for name, seconds in results.items():
+        if name not in baseline:
+            continue
+        ratio = seconds / baseline[name] if baseline[name] > 0 else 1.0
+        flag = "SLOWER" if ratio > 1 + threshold else ""
+        print(f"{name:40s} {ratio:6.2f}x {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("names", nargs="*", help="only run the benchmarks whose name contains one of these")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", metavar="FILE", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare the results with a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.names, args.repeat)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "benchmarks": results}, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["benchmarks"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) slower than the baseline: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from benchmarks import bench_simulation
+
+
+class Benchmarks_Test(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "baseline.json")
+
+    def main(self, *argv):
+        with contextlib.redirect_stdout(io.StringIO()) as printed:
+            code = bench_simulation.main(list(argv))
+        return code, printed.getvalue()
+
+    def test_compare_flags_regressions(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            regressions = bench_simulation.compare({"a": 1.0, "b": 1.3, "c": 5.0, "new": 1.0},
+                                                   {"a": 1.0, "b": 1.0, "c": 0.0}, threshold=0.2)
+        self.assertEqual(regressions, ["b"])
+
+    def test_save_and_compare(self):
+        code, printed = self.main("report_status", "--repeat", "1", "--save", self.path)
+        self.assertEqual(code, 0)
+        self.assertIn("report_status[1000]", printed)
+        with open(self.path) as f:
+            saved = json.load(f)
+        self.assertEqual(list(saved["benchmarks"]), ["report_status[1000]"])
+
+        self.assertEqual(self.main("report_status", "--repeat", "1", "--compare", self.path,
+                                   "--threshold", "100")[0], 0)
+        saved["benchmarks"]["report_status[1000]"] = 1e-9  # A baseline nothing can match
+        with open(self.path, "w") as f:
+            json.dump(saved, f)
+        code, printed = self.main("report_status", "--repeat", "1", "--compare", self.path)
+        self.assertEqual(code, 1)
+        self.assertIn("SLOWER", printed)
+
+
+if __name__ == "__main__":
+    unittest.main()
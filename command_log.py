@@ -0,0 +1,309 @@
+import hashlib
+import struct
+
+# Public Spacecraft methods that are recorded, the code of a command is its position + 1 (0 is a checksum)
+RECORDED_COMMANDS = (
+    "change_altitude", "change_orientation", "activate_payload", "deactivate_payload",
+    "update_payload_operation", "handle_eclipse", "simulate_orbit", "send_message", "report_status",
+    "check_anomalies", "get_battery_status", "enable_downlink", "flush_downlink", "enable_delta_reports",
+    "disable_delta_reports", "iter_orbit", "iter_timeline",
+)
+_COMMAND_CODES = {name: code for code, name in enumerate(RECORDED_COMMANDS, 1)}
+# Commands that return a generator: the call is recorded, then every item taken from it as a NEXT_ITEM
+# command with the number of the generator (0 for the first one recorded)
+GENERATOR_COMMANDS = ("iter_orbit", "iter_timeline")
+NEXT_ITEM = 255
+
+MAGIC = b"SCCL"
+VERSION = 3  # 2: the comms state includes the characters sent, 3: setup of downlink, delta reports and ledger
+HEADER = struct.Struct("<4sH")
+COMMAND = struct.Struct("<BBB")  # Code, positional arguments, keyword arguments
+CHECKSUM = struct.Struct("<BI8s")  # 0, commands executed, digest
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+_LENGTH = struct.Struct("<I")
+
+
+def state_checksum(spacecraft):
+    """8-byte digest of the whole state of a spacecraft (its snapshot)"""
+    return hashlib.blake2b(spacecraft.snapshot().tobytes(), digest_size=8).digest()
+
+
+def _setup(spacecraft):
+    """Configuration made before the recording that the snapshot does not hold:
+    [downlink, delta reports, energy ledger], None for the ones that are not enabled"""
+    comms = spacecraft.comms_subsystem
+    downlink = comms.downlink
+    if downlink is not None:
+        downlink = (downlink.frame_size, downlink.level, comms.downlink_hold, downlink.queued(),
+                    downlink.frames_sent, downlink.raw_bytes, downlink.compressed_bytes)
+    reports = spacecraft.delta_reports
+    if reports is not None:
+        reports = (reports.keyframe_every, reports.count, list(reports._last.items()))
+    ledger = spacecraft.power_subsystem.ledger
+    if ledger is not None:
+        ledger = (ledger.chunk_size, ledger.max_chunks)
+    return [downlink, reports, ledger]
+
+
+def _apply_setup(spacecraft, setup):
+    downlink, reports, ledger = setup
+    if downlink is not None:
+        frame_size, level, hold, queued, frames_sent, raw_bytes, compressed_bytes = downlink
+        spacecraft.enable_downlink(frame_size, level, hold)
+        downlink = spacecraft.comms_subsystem.downlink
+        for priority, status, queued_at in queued:
+            downlink.push(status, priority, queued_at)
+        downlink.frames_sent = frames_sent
+        downlink.raw_bytes = raw_bytes
+        downlink.compressed_bytes = compressed_bytes
+    if reports is not None:
+        keyframe_every, count, last = reports
+        spacecraft.enable_delta_reports(keyframe_every)
+        spacecraft.delta_reports.count = count
+        spacecraft.delta_reports._last = dict(last)
+    if ledger is not None:
+        spacecraft.enable_energy_ledger(*ledger)  # Starts empty: only the recorded commands are in it
+
+
+class Replay_Mismatch(ValueError):
+    """The replayed state differs from the checksum recorded at that point of the log"""
+
+
+def _encode(value, out):
+    # Tagged values so the replay passes exactly the same types (900 and 900.0 print differently)
+    if value is None:
+        out += b"N"
+    elif value is True or value is False:
+        out += b"T" if value else b"F"
+    elif isinstance(value, int):
+        out += b"i" + _INT.pack(value)
+    elif isinstance(value, float):
+        out += b"d" + _FLOAT.pack(value)
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        out += b"s" + _LENGTH.pack(len(data)) + data
+    elif isinstance(value, (list, tuple)):
+        out += (b"l" if isinstance(value, list) else b"t") + _LENGTH.pack(len(value))
+        for item in value:
+            _encode(item, out)
+    else:
+        raise TypeError(f"Cannot record an argument of type {type(value).__name__}")
+
+
+def _decode(data, offset):
+    """Returns the value at offset and the offset after it"""
+    tag = data[offset:offset + 1]
+    offset += 1
+    if tag == b"N":
+        return None, offset
+    if tag in (b"T", b"F"):
+        return tag == b"T", offset
+    if tag == b"i":
+        return _INT.unpack_from(data, offset)[0], offset + _INT.size
+    if tag == b"d":
+        return _FLOAT.unpack_from(data, offset)[0], offset + _FLOAT.size
+    length = _LENGTH.unpack_from(data, offset)[0]
+    offset += _LENGTH.size
+    if tag == b"s":
+        return data[offset:offset + length].decode("utf-8"), offset + length
+    items = []
+    for _ in range(length):
+        item, offset = _decode(data, offset)
+        items.append(item)
+    return (items if tag == b"l" else tuple(items)), offset
+
+
+class Command_Recorder:
+    def __init__(self, spacecraft, path, checkpoint_every=0):
+        """
+        Records every call to the RECORDED_COMMANDS of one spacecraft in a compact binary log.
+        The log starts with the parameters, the snapshot and the setup of the spacecraft (downlink with its
+        queued messages, delta reports and energy ledger), so recording can start at any point of a mission. Calls made by other commands (e.g. report_status calls check_anomalies) are not
+        recorded, the replay makes them again. The generators of iter_orbit and iter_timeline record every
+        item taken from them, so the replay advances them just as far.
+
+        checkpoint_every: also records the state checksum after every this many commands (0: only at close)
+        """
+        self.spacecraft = spacecraft
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self.count = 0
+        self._depth = 0
+        self._generators = 0
+        self._file = open(path, "wb")
+
+        out = bytearray(HEADER.pack(MAGIC, VERSION))
+        for value in (spacecraft.norad_id, spacecraft.name, spacecraft.orbital_altitude,
+                      spacecraft.orbital_period, spacecraft.mass, spacecraft.country):
+            _encode(value, out)
+        snapshot = spacecraft.snapshot()
+        out += _LENGTH.pack(len(snapshot)) + snapshot.tobytes()
+        _encode(_setup(spacecraft), out)
+        self._file.write(out)
+
+        for name in RECORDED_COMMANDS:
+            setattr(spacecraft, name, self._wrap(name, getattr(spacecraft, name)))
+
+    def _wrap(self, name, method):
+        code = _COMMAND_CODES[name]
+
+        def wrapper(*args, **kwargs):
+            if self._depth:
+                return method(*args, **kwargs)
+            out = bytearray(COMMAND.pack(code, len(args), len(kwargs)))
+            for value in args:
+                _encode(value, out)
+            for key, value in kwargs.items():
+                _encode(key, out)
+                _encode(value, out)
+            self._file.write(out)
+            self.count += 1
+
+            self._depth += 1
+            try:
+                result = method(*args, **kwargs)
+            finally:
+                self._depth -= 1
+                self._counted()
+            if name in GENERATOR_COMMANDS:
+                self._generators += 1
+                return self._record_items(self._generators - 1, result)
+            return result
+        return wrapper
+
+    def _counted(self):
+        if self.checkpoint_every and self.count % self.checkpoint_every == 0:
+            self.checkpoint()
+
+    def _record_items(self, number, generator):
+        while True:
+            self._depth += 1
+            try:
+                item = next(generator)
+            except StopIteration:
+                return
+            finally:
+                self._depth -= 1
+            if not self._file.closed:
+                out = bytearray(COMMAND.pack(NEXT_ITEM, 1, 0))
+                _encode(number, out)
+                self._file.write(out)
+                self.count += 1
+                self._counted()
+            yield item
+
+    def checkpoint(self):
+        """Records the checksum of the current state, the replay checks it after the same command"""
+        self._file.write(CHECKSUM.pack(0, self.count, state_checksum(self.spacecraft)))
+
+    def close(self):
+        """Records the final checksum and stops recording"""
+        if self._file.closed:
+            return
+        self.checkpoint()
+        self._file.close()
+        for name in RECORDED_COMMANDS:
+            vars(self.spacecraft).pop(name, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Command_Replayer:
+    def __init__(self, path, sink=None, verify=True):
+        """
+        Re-executes a command log on a new spacecraft at full speed, with the telemetry discarded
+        (Null_Sink) unless another sink is given. When verify is True every recorded checksum is
+        compared with the replayed state and a difference raises Replay_Mismatch.
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a command log")
+        offset = HEADER.size
+        self.parameters = []
+        for _ in range(6):
+            value, offset = _decode(data, offset)
+            self.parameters.append(value)
+        length = _LENGTH.unpack_from(data, offset)[0]
+        offset += _LENGTH.size
+        self.initial_snapshot = struct.unpack_from(f"<{length}d", data, offset)
+        offset += 8 * length
+        self.setup, offset = _decode(data, offset)
+
+        # (method name, args, kwargs) of every command and {commands executed: checksum}
+        self.commands = []
+        self.checksums = {}
+        while offset < len(data):
+            if data[offset] == 0:
+                _, count, digest = CHECKSUM.unpack_from(data, offset)
+                self.checksums[count] = digest
+                offset += CHECKSUM.size
+                continue
+            code, n_args, n_kwargs = COMMAND.unpack_from(data, offset)
+            offset += COMMAND.size
+            args = []
+            for _ in range(n_args):
+                value, offset = _decode(data, offset)
+                args.append(value)
+            kwargs = {}
+            for _ in range(n_kwargs):
+                key, offset = _decode(data, offset)
+                kwargs[key], offset = _decode(data, offset)
+            self.commands.append(("next" if code == NEXT_ITEM else RECORDED_COMMANDS[code - 1], args, kwargs))
+
+        self.sink = sink
+        self.verify = verify
+        self.reset()
+
+    def __len__(self):
+        return len(self.commands)
+
+    def reset(self):
+        """Goes back to the state before the first command"""
+        from array import array
+        from Spacecraft import Spacecraft
+        from telemetry_sinks import Null_Sink
+        self.spacecraft = Spacecraft(*self.parameters, telemetry_sink=self.sink or Null_Sink())
+        self.spacecraft.restore(array("d", self.initial_snapshot))
+        _apply_setup(self.spacecraft, self.setup)
+        self.position = 0
+        self._generators = []
+
+    def step(self):
+        """Executes the next command and returns its name"""
+        name, args, kwargs = self.commands[self.position]
+        if name == "next":
+            next(self._generators[args[0]])
+        else:
+            result = getattr(self.spacecraft, name)(*args, **kwargs)
+            if name in GENERATOR_COMMANDS:
+                self._generators.append(result)
+        self.position += 1
+        if self.verify and self.position in self.checksums:
+            if state_checksum(self.spacecraft) != self.checksums[self.position]:
+                raise Replay_Mismatch(f"State differs from the recording after command {self.position} ({name})")
+        return name
+
+    def fast_forward(self, n):
+        """Executes the commands until n of them have run (starting again if n is behind), returns the spacecraft"""
+        if n < self.position:
+            self.reset()
+        while self.position < min(n, len(self.commands)):
+            self.step()
+        return self.spacecraft
+
+    def run(self):
+        """Executes every remaining command, returns the spacecraft"""
+        return self.fast_forward(len(self.commands))
+
+
+def replay(path, until=None, verify=True):
+    """Replays a command log silently (up to command until) and returns the spacecraft"""
+    replayer = Command_Replayer(path, verify=verify)
+    return replayer.run() if until is None else replayer.fast_forward(until)
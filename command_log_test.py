@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+
+from Spacecraft import Spacecraft
+from command_log import Command_Replayer, Replay_Mismatch, replay, state_checksum
+from telemetry_sinks import Null_Sink, Ring_Buffer_Sink
+
+
+def make_spacecraft(sink=None):
+    return Spacecraft(25544, "ISS", 420, 1.5, 420000, "International", telemetry_sink=sink or Null_Sink())
+
+
+def mission(spacecraft, rounds=6):
+    for k in range(rounds):
+        spacecraft.activate_payload(["SAR Radar", "Cloud Seeding Device"][k % 2])
+        spacecraft.update_payload_operation(3, in_earth_shadow=k % 3 == 0)
+        spacecraft.change_orientation(k % 40, 5.5, -3)
+        spacecraft.change_altitude(500 + k)
+        spacecraft.handle_eclipse()
+        spacecraft.report_status()
+        spacecraft.simulate_orbit()
+        spacecraft.deactivate_payload()
+        spacecraft.send_message("hello é")
+
+
+class Command_Log_Test(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "mission.log")
+
+    def record(self, spacecraft, actions, checkpoint_every=5):
+        recorder = spacecraft.record_commands(self.path, checkpoint_every)
+        actions(spacecraft)
+        recorder.close()
+        return recorder
+
+    def test_replay_matches_checksums(self):
+        spacecraft = make_spacecraft(Ring_Buffer_Sink(100000))
+        spacecraft.change_altitude(600)  # Before the recording, restored from the initial snapshot
+        recorder = self.record(spacecraft, mission)
+
+        replayer = Command_Replayer(self.path, sink=Ring_Buffer_Sink(100000))
+        self.assertEqual(len(replayer), recorder.count)
+        replayed = replayer.run()
+        self.assertEqual(state_checksum(replayed), state_checksum(spacecraft))
+        self.assertEqual(replayed.telemetry_sink.messages()[-20:], spacecraft.telemetry_sink.messages()[-20:])
+
+    def test_fast_forward(self):
+        spacecraft = make_spacecraft()
+        self.record(spacecraft, mission)
+        replayer = Command_Replayer(self.path)
+        battery = replayer.fast_forward(20).power_subsystem.battery_level
+        replayer.fast_forward(40)
+        self.assertEqual(replayer.fast_forward(20).power_subsystem.battery_level, battery)
+        self.assertEqual(replay(self.path, until=20).power_subsystem.battery_level, battery)
+
+    def test_tampered_log(self):
+        self.record(make_spacecraft(), mission)
+        with open(self.path, "rb") as f:
+            data = bytearray(f.read())
+        k = data.find(b"SAR Radar", 100)
+        data[k:k + 9] = b"Cloud See"
+        with open(self.path, "wb") as f:
+            f.write(data)
+        with self.assertRaises((Replay_Mismatch, ValueError)):
+            replay(self.path)
+
+    def test_setup_before_recording(self):
+        spacecraft = make_spacecraft(Ring_Buffer_Sink(100000))
+        spacecraft.enable_downlink(frame_size=512, hold=True)
+        spacecraft.enable_delta_reports(keyframe_every=4)
+        spacecraft.enable_energy_ledger(chunk_size=64)
+        spacecraft.report_status()
+        spacecraft.send_message("[ALERT] queued before the recording")
+        spacecraft.change_orientation(5, 0, 0)  # In the ledger, before the recording
+        self.assertGreater(len(spacecraft.comms_subsystem.downlink), 0)
+
+        def actions(spacecraft):
+            mission(spacecraft, rounds=3)
+            spacecraft.flush_downlink()
+
+        self.record(spacecraft, actions, checkpoint_every=1)
+        replayer = Command_Replayer(self.path, sink=Ring_Buffer_Sink(100000))
+        replayed = replayer.run()
+        self.assertEqual(replayed.snapshot(), spacecraft.snapshot())
+        self.assertEqual(replayed.delta_reports.count, spacecraft.delta_reports.count)
+        self.assertEqual(replayed.comms_subsystem.downlink.frames_sent, spacecraft.comms_subsystem.downlink.frames_sent)
+        self.assertEqual(replayed.telemetry_sink.messages()[-30:], spacecraft.telemetry_sink.messages()[-30:])
+        # The replayed ledger starts with the recording
+        ledger = replayed.power_subsystem.ledger
+        self.assertEqual(ledger.chunk_size, 64)
+        self.assertGreater(len(ledger), 0)
+        self.assertLess(len(ledger), len(spacecraft.power_subsystem.ledger))
+
+    def test_recording_stops_at_close(self):
+        spacecraft = make_spacecraft()
+        recorder = self.record(spacecraft, lambda spacecraft: spacecraft.change_altitude(500))
+        spacecraft.change_altitude(700)
+        self.assertEqual(recorder.count, 1)
+        self.assertEqual(replay(self.path).altitude_control.altitude, 500)
+
+
+if __name__ == "__main__":
+    unittest.main()
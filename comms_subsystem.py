@@ -1,62 +1,217 @@
 from subsystems_base import Subsystem
+from telemetry_log import KIND_MESSAGE, KIND_STATUS, KIND_SUMMARY
+from telemetry_sinks import Console_Sink
 class Communication_Subsystem (Subsystem):
-    def __init__(self):
+    def __init__(self, sink=None):
         super().__init__()
         self.connected = True
         self.power_subsystem = None
         self.sent_chars = []  # Creates an empty list ready to save the total length
+        self.pending_chars = 0  # Running sum of sent_chars
+        self.total_chars = 0  # Running total of every character sent
         self._messages_before_summary = 4
         self._in_summary = False
+        self.messages_sent = 0  # Total of messages transmitted
+        self.sink = sink or Console_Sink()  # Where the transmitted lines are written (console by default)
+        self.telemetry_log = None  # Optional binary log of every message (see telemetry_log)
+        self.clock = None  # Mission clock used to timestamp the log records
+        self.monitor = None  # Optional streaming anomaly detector
+        self.downlink = None  # Optional priority queue of compressed frames (see enable_downlink)
+        self.downlink_hold = False  # Frames wait for flush_downlink or a ground contact instead of leaving when full
+        self._flushing = False
+
+    def get_state(self):
+        """Messages sent, characters sent, number of characters waiting for the summary and their lengths"""
+        return [float(self.messages_sent), float(self.total_chars), float(len(self.sent_chars)), *self.sent_chars]
+
+    def set_state(self, state):
+        self.messages_sent = int(state[0])
+        self.total_chars = int(state[1])
+        self.sent_chars[:] = [int(chars) for chars in state[3:3 + int(state[2])]]
+        self.pending_chars = sum(self.sent_chars)
+
+    @classmethod
+    def build(cls, spacecraft):
+        return cls(spacecraft.telemetry_sink)
+
+    def connect(self, spacecraft):
+        self.attach_power_system(spacecraft.power_subsystem)
+        self.attach_clock(spacecraft.clock)
 
     def attach_power_system(self, power_subsystem):  # Attach to power subsystem to consume battery
         self.power_subsystem = power_subsystem
 
+    def attach_clock(self, clock):
+        """Shares the mission clock of the spacecraft to timestamp the telemetry log"""
+        self.clock = clock
+
+    def attach_monitor(self, monitor):
+        """Connects a streaming detector that receives the size of every message"""
+        self.monitor = monitor
+
+    def attach_log(self, telemetry_log):
+        """Writes a structured record of every message to a Telemetry_Log_Writer"""
+        self.telemetry_log = telemetry_log
+
+    def _log(self, status, kind, chars, energy):
+        """kind is KIND_STATUS, KIND_MESSAGE (paid its energy) or KIND_SUMMARY (see telemetry_log)"""
+        self.telemetry_log.append(self.clock.now if self.clock else 0.0, status, kind,
+                                  self.power_subsystem.get_battery_level(), chars, energy)
+
+    def set_sink(self, sink):
+        """Changes where the transmitted lines are written (see telemetry_sinks)"""
+        self.sink.flush()
+        self.sink = sink
+
     def send_status(self, status, skip_summary=False):
         """Performs the action of sending a message, also replaces the function print"""
+        sink = self.sink
         if not self.connected:
-            print("[Comms] Error: Connection lost")
+            sink.write("[Comms] Error: Connection lost")
             return
 
         if self.power_subsystem is None:
-            print("[Comms] Power subsystem not found")
+            sink.write("[Comms] Power subsystem not found")
             return
 
         char_count = len(status) # Gets the quantity of elements in the list
         self.sent_chars.append(char_count)
+        self.pending_chars += char_count
+        self.total_chars += char_count
+        self.messages_sent += 1
+        if self.monitor is not None:
+            self.monitor.on_message(char_count)
+        if self.metrics is not None:
+            self.metrics.add("chars_transmitted", char_count)
+
+        if self.downlink is not None:
+            # Energy is charged when the frame that contains the message is transmitted
+            self.downlink.push(status, self._priority(status, skip_summary), self.clock.now if self.clock else 0.0)
+            if self.telemetry_log is not None:
+                self._log(status, KIND_STATUS, char_count, 0.0)
+            if self.downlink.frame_ready() and not self._flushing and not self.downlink_hold:
+                self.flush_downlink(partial=False)
+            return
 
-        print(f"[Comms] Transmitting ({char_count} chars): {status}")
+        if sink.enabled:
+            sink.write("[Comms] Transmitting ({} chars): {}", char_count, status)
 
     # Consumes energy only if the message is not a summary
+        energy = 0.0
         if not skip_summary:
             estimated_consumption = 0.005 * char_count
-            if self.power_subsystem.consume_energy(estimated_consumption, log=False):
-                print(f"[Power] Message energy cost: -{estimated_consumption:.4f}%, Battery Level: {self.power_subsystem.get_battery_level():.2f}%")
+            if self.power_subsystem.consume_energy(estimated_consumption, log=False, consumer="comms"):
+                energy = estimated_consumption
+                if sink.enabled:
+                    sink.write("[Power] Message energy cost: -{:.4f}%, Battery Level: {:.2f}%",
+                               estimated_consumption, self.power_subsystem.get_battery_level())
             else:
-                print("[Power] Not enough battery to send this message.")
+                sink.write("[Power] Not enough battery to send this message.")
+
+        if self.telemetry_log is not None:
+            self._log(status, KIND_STATUS if skip_summary else KIND_MESSAGE, char_count, energy)
 
         if len(self.sent_chars) >= self._messages_before_summary and not skip_summary:
             self.summarize()
 
+    def enable_downlink(self, frame_size=2048, level=6, hold=False):
+        """
+        Queues the messages by priority (alerts first, "[Time]" chatter last) and transmits them in frames
+        compressed with zlib. Each frame costs 0.005% per compressed byte and replaces the per-message cost
+        and the summaries. With hold the frames are only transmitted by flush_downlink or transmit_frame
+        (e.g. during the contacts of a ground_segment.Ground_Segment).
+        """
+        from downlink import Priority_Downlink, message_priority
+        self.downlink = Priority_Downlink(frame_size, level)
+        self.downlink_hold = hold
+        self._priority = message_priority
+
+    def disable_downlink(self):
+        """Transmits what is queued and goes back to sending every message immediately"""
+        if self.downlink is not None:
+            self.flush_downlink()
+            self.downlink = None
+
+    def flush_downlink(self, partial=True):
+        """Transmits the queued frames, the last one even if it is not full when partial is True"""
+        if self.downlink is None:
+            return
+        self._flushing = True
+        try:
+            while len(self.downlink) and (partial or self.downlink.frame_ready()):
+                self.transmit_frame()
+        finally:
+            self._flushing = False
+
+    def transmit_frame(self):
+        """Transmits the next frame of the downlink queue and pays its energy, returns its messages and frame"""
+        sink = self.sink
+        messages, frame = self.downlink.pop_frame()
+        if sink.enabled:
+            for status in messages:
+                sink.write("[Comms] Transmitting ({} chars): {}", len(status), status)
+            sink.write("[Comms] Frame {}: {} messages, {} chars compressed to {} bytes",
+                       self.downlink.frames_sent, len(messages), sum(len(status) for status in messages),
+                       len(frame))
+
+        estimated_consumption = 0.005 * len(frame)
+        if self.metrics is not None:
+            self.metrics.add("frame_bytes", len(frame))
+        if self.power_subsystem.consume_energy(estimated_consumption, log=False, consumer="comms"):
+            if self.telemetry_log is not None:
+                self._log("[Comms]", KIND_SUMMARY, len(frame), estimated_consumption)
+            if sink.enabled:
+                sink.write("[Power] Frame energy cost: -{:.4f}%, Battery Level: {:.2f}%",
+                           estimated_consumption, self.power_subsystem.get_battery_level())
+        else:
+            sink.write("[Power] Not enough battery to send this frame.")
+        self.sent_chars.clear()
+        self.pending_chars = 0
+        return messages, frame
+
+    def record_chars(self, chars, messages=1):
+        """
+        Records messages that were folded by the simulation clock instead of transmitted: they count as sent
+        and their chars go to the next summary, so it costs the same energy as if they had been sent.
+        sent_chars gets their total followed by zeros, one entry per message up to _messages_before_summary
+        (only that many can matter), so the summary also comes after the same message.
+        With the downlink the folded messages are free: they are never queued, so no frame carries them.
+        """
+        if not messages:
+            return
+        if self.downlink is None:
+            self.sent_chars.append(chars)
+            self.sent_chars.extend([0] * (min(messages, self._messages_before_summary) - 1))
+            self.pending_chars += chars
+        self.total_chars += chars
+        self.messages_sent += messages
+        if self.metrics is not None:
+            self.metrics.add("chars_folded", chars)
+            self.metrics.add("messages_folded", messages)
+
     def summarize(self):
         """Method that counts all the characters used in send_status, 
         and measures the battery that costs to send them"""
         self._in_summary = True
 
-        total_chars = sum(self.sent_chars)
+        total_chars = self.pending_chars
         estimated_consumption = 0.0005 * total_chars  # Consumption per character
 
-        print(f"[Comms] Total characters: {total_chars}")
+        self.sink.write("[Comms] Total characters: {}", total_chars)
 
         if self.power_subsystem:
-            if self.power_subsystem.consume_energy(estimated_consumption, log=False):
+            if self.power_subsystem.consume_energy(estimated_consumption, log=False, consumer="comms"):
+                if self.telemetry_log is not None:
+                    self._log("[Comms]", KIND_SUMMARY, total_chars, estimated_consumption)
                 self.send_status(
                     f"[Power] Action Consumption: -{estimated_consumption:.2f}%, Battery Level: {self.power_subsystem.get_battery_level():.2f}%",
                     skip_summary=True
                 )
             else:
-                print("[Power] There's not enough battery to send.\n")
+                self.sink.write("[Power] There's not enough battery to send.\n")
 
         self.sent_chars.clear()  # Clears the log of characters summarized
+        self.pending_chars = 0
         self._in_summary = False  # Gets out of the summarize method
 
 
@@ -0,0 +1,101 @@
+import heapq
+import itertools
+import zlib
+
+# Lower numbers are transmitted first
+PRIORITY_ALERT = 0    # Alerts, errors and eclipse events
+PRIORITY_NORMAL = 1   # Messages that pay their energy (sent without skip_summary)
+PRIORITY_ROUTINE = 2  # Internal updates (sent with skip_summary)
+PRIORITY_CHATTER = 3  # "[Time] → Minute" ticks
+
+ALERT_TAGS = ("[ALERT]", "[ERROR]", "[ECLIPSE")
+
+
+def message_priority(status, skip_summary=False):
+    """Priority of a message in the downlink queue"""
+    if status.startswith(ALERT_TAGS):
+        return PRIORITY_ALERT
+    if status.startswith("[Time]"):
+        return PRIORITY_CHATTER
+    return PRIORITY_ROUTINE if skip_summary else PRIORITY_NORMAL
+
+
+class Priority_Downlink:
+    def __init__(self, frame_size=2048, level=6):
+        """
+        Queue of messages ordered by priority (then by arrival) that are packed into frames of about
+        frame_size characters and compressed with zlib (level 1-9) before being transmitted
+        """
+        self.frame_size = frame_size
+        self.level = level
+        self._queue = []  # (priority, order, message, time it was queued)
+        self._order = itertools.count()
+        self.queued_chars = 0
+        self.last_queued_at = []  # Times the messages of the last frame were queued
+        self._next = None  # (queue entries, raw, frame) built by next_frame_size, not transmitted yet
+        # Running totals
+        self.frames_sent = 0
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+
+    def __len__(self):
+        return len(self._queue) + (len(self._next[0]) if self._next else 0)
+
+    def push(self, status, priority=PRIORITY_NORMAL, queued_at=0.0):
+        if self._next is not None:
+            self._unbuild()  # The new message may belong in the next frame
+        heapq.heappush(self._queue, (priority, next(self._order), status, queued_at))
+        self.queued_chars += len(status) + 1  # One separator per message
+
+    def queued(self):
+        """(priority, message, time it was queued) of every queued message, in transmission order"""
+        entries = sorted(self._queue + (self._next[0] if self._next else []))
+        return [(priority, status, queued_at) for priority, _, status, queued_at in entries]
+
+    def frame_ready(self):
+        return self.queued_chars >= self.frame_size
+
+    def peek(self):
+        """Priority and queue time of the next message"""
+        priority, _, _, queued_at = self._next[0][0] if self._next else self._queue[0]
+        return priority, queued_at
+
+    def _build(self):
+        """Takes the most important messages that fit in one frame (at least one) and compresses them"""
+        entries = []
+        size = 0
+        while self._queue and (not entries or size + len(self._queue[0][2]) + 1 <= self.frame_size):
+            entries.append(heapq.heappop(self._queue))
+            size += len(entries[-1][2]) + 1
+        raw = "\n".join(entry[2] for entry in entries).encode("utf-8")
+        self._next = (entries, raw, zlib.compress(raw, self.level))
+
+    def _unbuild(self):
+        for entry in self._next[0]:
+            heapq.heappush(self._queue, entry)
+        self._next = None
+
+    def next_frame_size(self):
+        """Compressed bytes of the next frame. The frame is built now and pop_frame transmits it
+        unless another message is pushed before"""
+        if self._next is None:
+            self._build()
+        return len(self._next[2])
+
+    def pop_frame(self):
+        """Takes the most important messages that fit in one frame (at least one)
+        and returns them with the compressed frame"""
+        if self._next is None:
+            self._build()
+        entries, raw, frame = self._next
+        self._next = None
+        messages = [entry[2] for entry in entries]
+        self.last_queued_at = [entry[3] for entry in entries]
+        self.queued_chars -= sum(len(status) + 1 for status in messages)
+        self.frames_sent += 1
+        self.raw_bytes += len(raw)
+        self.compressed_bytes += len(frame)
+        return messages, frame
+
+    def compression_ratio(self):
+        return self.raw_bytes / self.compressed_bytes if self.compressed_bytes else 1.0
@@ -0,0 +1,90 @@
+import unittest
+import zlib
+
+from Spacecraft import Spacecraft
+from downlink import (PRIORITY_ALERT, PRIORITY_CHATTER, PRIORITY_NORMAL, PRIORITY_ROUTINE, Priority_Downlink,
+                      message_priority)
+from telemetry_sinks import Null_Sink
+
+
+class Priority_Downlink_Test(unittest.TestCase):
+    def test_message_priority(self):
+        self.assertEqual(message_priority("[ALERT] Battery low"), PRIORITY_ALERT)
+        self.assertEqual(message_priority("[ECLIPSE/MALFUNCTION] Charging", True), PRIORITY_ALERT)
+        self.assertEqual(message_priority("[Time] → Minute 3", True), PRIORITY_CHATTER)
+        self.assertEqual(message_priority("[Power] Charging...", True), PRIORITY_ROUTINE)
+        self.assertEqual(message_priority("[Power] Charging..."), PRIORITY_NORMAL)
+
+    def test_frames_follow_priority_then_arrival(self):
+        downlink = Priority_Downlink(frame_size=64)
+        pushed = [(f"[Time] → Minute {k}", PRIORITY_CHATTER) for k in range(5)]
+        pushed += [(f"[Power] Routine {k}", PRIORITY_ROUTINE) for k in range(5)]
+        pushed += [(f"[ALERT] Alert {k}", PRIORITY_ALERT) for k in range(3)]
+        for status, priority in pushed:
+            downlink.push(status, priority)
+
+        received = []
+        while len(downlink):
+            messages, frame = downlink.pop_frame()
+            raw = "\n".join(messages)
+            self.assertEqual(zlib.decompress(frame).decode("utf-8"), raw)
+            self.assertTrue(len(raw) + 1 <= 64 or len(messages) == 1)
+            received += messages
+        expected = sorted(pushed, key=lambda item: item[1])  # Stable, so the arrival order is kept
+        self.assertEqual(received, [status for status, _ in expected])
+        self.assertEqual(downlink.queued_chars, 0)
+
+    def test_message_larger_than_a_frame(self):
+        downlink = Priority_Downlink(frame_size=16)
+        downlink.push("x" * 100)
+        downlink.push("short")
+        self.assertTrue(downlink.frame_ready())
+        self.assertEqual(downlink.pop_frame()[0], ["x" * 100])
+        self.assertEqual(downlink.pop_frame()[0], ["short"])
+
+
+class Comms_Downlink_Test(unittest.TestCase):
+    def test_frames_pay_their_compressed_bytes(self):
+        spacecraft = Spacecraft(1, "Downlink", 200, 2, 400, "USA", telemetry_sink=Null_Sink())
+        spacecraft.enable_downlink(frame_size=512)
+        downlink = spacecraft.comms_subsystem.downlink
+        battery = spacecraft.power_subsystem.battery_level
+        for k in range(200):
+            spacecraft.comms_subsystem.send_status(f"[Power] Battery Level: {90 - k / 10:.2f}%", skip_summary=True)
+        self.assertGreater(downlink.frames_sent, 0)  # Full frames go out as the messages arrive
+        spacecraft.flush_downlink()
+
+        self.assertEqual(len(downlink), 0)
+        self.assertGreater(downlink.compression_ratio(), 2)
+        self.assertAlmostEqual(battery - spacecraft.power_subsystem.battery_level, 0.005 * downlink.compressed_bytes)
+        self.assertEqual(spacecraft.comms_subsystem.messages_sent, 200)
+
+    def test_folded_messages_are_free(self):
+        spacecraft = Spacecraft(1, "Downlink", 200, 2, 400, "USA", telemetry_sink=Null_Sink())
+        spacecraft.enable_downlink(hold=True)
+        comms, power = spacecraft.comms_subsystem, spacecraft.power_subsystem
+        power.battery_level = 20.0
+        power.solar_charging = True
+        minutes = spacecraft.clock.run_charging_cycle(power, comms)
+        self.assertEqual(power.battery_level, 95)
+        # Only the "Battery at 95%" message is queued, the per-minute ones are counted but not sent
+        self.assertEqual(len(comms.downlink), 1)
+        self.assertEqual(comms.messages_sent, 2 * minutes)
+        chars = len(comms.downlink.queued()[0][1])
+        self.assertEqual((comms.sent_chars, comms.pending_chars), ([chars], chars))
+        spacecraft.flush_downlink()
+        self.assertAlmostEqual(95 - power.battery_level, 0.005 * comms.downlink.compressed_bytes)
+
+    def test_disable_sends_what_is_queued(self):
+        spacecraft = Spacecraft(1, "Downlink", 200, 2, 400, "USA", telemetry_sink=Null_Sink())
+        spacecraft.enable_downlink(frame_size=4096, hold=True)
+        spacecraft.send_message("queued until the downlink is disabled")
+        downlink = spacecraft.comms_subsystem.downlink
+        self.assertEqual(downlink.frames_sent, 0)
+        spacecraft.comms_subsystem.disable_downlink()
+        self.assertEqual(downlink.frames_sent, 1)
+        self.assertIsNone(spacecraft.comms_subsystem.downlink)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+from collections import namedtuple
+
+import numpy as np
+from Payload_Subsystem import PAYLOAD_CONSUMPTION
+
+PAYLOAD_TYPES = list(PAYLOAD_CONSUMPTION)
+_RATES = np.array([PAYLOAD_CONSUMPTION[name] for name in PAYLOAD_TYPES])
+
+Schedule_Result = namedtuple(
+    "Schedule_Result",
+    "battery feasible first_failure total_runtime shadow_runtime final_battery"
+)
+
+
+def _payload_codes(payload_type, shape):
+    """Index in PAYLOAD_TYPES of a payload name, a list of names or a list of indices"""
+    types = np.asarray(payload_type)
+    if types.dtype.kind in "UO":
+        names, inverse = np.unique(types, return_inverse=True)
+        for name in names:
+            if name not in PAYLOAD_CONSUMPTION:
+                raise ValueError(f"Unsupported payload type: {name}")
+        types = np.array([PAYLOAD_TYPES.index(name) for name in names])[inverse.reshape(types.shape)]
+    return np.broadcast_to(types, shape)
+
+
+def shadow_flags(eclipse_index, durations, start=0.0):
+    """Whether each interval starts in Earth's shadow, from an orbit_geometry.Eclipse_Index"""
+    durations = np.asarray(durations, dtype=float)
+    starts = start + np.cumsum(durations, axis=-1) - durations
+    return eclipse_index.in_shadow_many(starts)
+
+
+def evaluate_schedules(durations, payload_on, payload_type="SAR Radar", in_shadow=False,
+                       battery_level=100.0, min_battery=0.0, baseline_rate=0.0, activation_cost=0.5,
+                       active=None):
+    """
+    Evaluates payload schedules in one vectorized pass, with the same rules as
+    Payload_Subsystem.activate_payload/update_operation but without sending any message.
+
+    Every argument is one value per interval (shape (intervals,)) or per schedule and interval
+    (shape (schedules, intervals)); single values are used for every interval.
+
+    durations(min): length of each interval
+    payload_on: whether the payload operates during the interval (switching it on costs activation_cost)
+    payload_type: payload name or index in PAYLOAD_TYPES
+    in_shadow: whether the interval is in Earth's shadow (only used for shadow_runtime)
+    battery_level(%): battery at the start of the schedule
+    min_battery(%): a schedule is feasible if the battery never goes below this level
+    baseline_rate(%/min): consumption of the rest of the spacecraft
+    active: payload type that is already on at the start, if any (the first interval does not pay the activation)
+
+    Changing the payload type between two intervals that are on pays the activation again, as set_payload_type
+    resets the payload.
+
+    Returns a Schedule_Result with the battery after every interval, feasibility, first interval that goes
+    below min_battery (-1 if none), runtime of the payload, runtime in shadow and final battery.
+    """
+    durations = np.asarray(durations, dtype=float)
+    payload_on = np.asarray(payload_on, dtype=bool)
+    shape = np.broadcast_shapes(durations.shape, payload_on.shape, np.shape(payload_type), np.shape(in_shadow))
+    durations = np.broadcast_to(durations, shape)
+    payload_on = np.broadcast_to(payload_on, shape)
+    in_shadow = np.broadcast_to(np.asarray(in_shadow, dtype=bool), shape)
+    codes = _payload_codes(payload_type, shape)
+
+    # Energy demanded by every interval: activation when the payload is switched on (changing the payload type
+    # resets it, so it is activated again), operation and baseline
+    continued = np.empty(shape, dtype=bool)
+    continued[..., 0] = False if active is None else codes[..., 0] == _payload_codes(active, ())
+    continued[..., 1:] = payload_on[..., :-1] & (codes[..., 1:] == codes[..., :-1])
+    activation = activation_cost * (payload_on & ~continued)
+    energy = activation + payload_on * _RATES[codes] * durations + baseline_rate * durations
+
+    initial = np.asarray(battery_level, dtype=float)[..., None]
+    unclamped = initial - np.cumsum(energy, axis=-1)
+    battery = np.maximum(unclamped, 0.0)
+
+    # consume_energy works while there is battery left after the activation, then the payload stops
+    battery_before = np.concatenate([np.broadcast_to(initial, shape[:-1] + (1,)), battery[..., :-1]], axis=-1)
+    running = payload_on & (battery_before - activation > 0)
+    total_runtime = np.sum(durations * running, axis=-1)
+    shadow_runtime = np.sum(durations * (running & in_shadow), axis=-1)
+
+    below = unclamped < min_battery
+    feasible = ~below.any(axis=-1)
+    first_failure = np.where(feasible, -1, np.argmax(below, axis=-1))
+
+    return Schedule_Result(battery, feasible, first_failure, total_runtime, shadow_runtime, battery[..., -1])
+
+
+def rank_schedules(result):
+    """Indices of the schedules from best to worst: feasible first, then longest runtime, then most battery left"""
+    return np.lexsort((-result.final_battery, -result.total_runtime, ~result.feasible))
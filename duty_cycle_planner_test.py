@@ -0,0 +1,76 @@
+import random
+import unittest
+
+import numpy as np
+from Spacecraft import Spacecraft
+from duty_cycle_planner import PAYLOAD_TYPES, evaluate_schedules, rank_schedules
+from orbit_geometry import Eclipse_Index
+from telemetry_sinks import Null_Sink
+
+
+def run_schedule(spacecraft, durations, payload_on, payload_types):
+    """Runs a schedule on the spacecraft, returns the battery after every interval and the runtime"""
+    payload = spacecraft.payload_subsystem
+    battery = []
+    runtime = 0.0
+    for dt, on, payload_type in zip(durations, payload_on, payload_types):
+        if on and (payload.payload_type != payload_type or not payload.active):
+            spacecraft.activate_payload(payload_type)
+        elif not on and payload.active:
+            spacecraft.deactivate_payload()
+        runtime_before = payload.total_runtime
+        payload.update_operation(dt)
+        runtime += payload.total_runtime - runtime_before
+        spacecraft.clock.advance(dt)
+        battery.append(spacecraft.power_subsystem.get_battery_level())
+    return battery, runtime
+
+
+class Evaluate_Schedules_Test(unittest.TestCase):
+    def test_matches_simulation(self):
+        rng = random.Random(7)
+        for trial in range(60):
+            with self.subTest(trial=trial):
+                durations = [float(rng.randint(1, 9)) for _ in range(25)]
+                payload_on = [rng.random() < 0.6 for _ in range(25)]
+                if trial % 2:
+                    payload_types = [rng.choice(PAYLOAD_TYPES) for _ in range(25)]
+                else:
+                    payload_types = [rng.choice(PAYLOAD_TYPES)] * 25
+                spacecraft = Spacecraft(1, "Test", 500, 1.6, 100, "CO", telemetry_sink=Null_Sink())
+                spacecraft.power_subsystem.battery_level = rng.uniform(20, 100)
+                if trial % 3 == 0:
+                    spacecraft.activate_payload(payload_types[0])
+                # Messages would also consume energy, the planner does not include them
+                spacecraft.comms_subsystem.send_status = lambda status, skip_summary=False: None
+
+                result = spacecraft.plan_payload_schedule(durations, payload_on, payload_types, min_battery=5)
+                battery, runtime = run_schedule(spacecraft, durations, payload_on, payload_types)
+                np.testing.assert_allclose(result.battery, battery)
+                self.assertAlmostEqual(float(result.total_runtime), runtime)
+                below = [k for k, level in enumerate(battery) if level < 5]
+                self.assertEqual(int(result.first_failure), below[0] if below else -1)
+
+    def test_many_schedules(self):
+        durations = np.full((3, 4), 10.0)
+        payload_on = np.array([[True, True, True, True], [True, False, True, False], [False] * 4])
+        result = evaluate_schedules(durations, payload_on, "SAR Radar", battery_level=50.0, min_battery=10.0)
+        np.testing.assert_array_equal(result.feasible, [False, True, True])
+        np.testing.assert_array_equal(result.total_runtime, [40.0, 20.0, 0.0])
+        self.assertEqual(list(rank_schedules(result)), [1, 2, 0])
+
+
+class Shadow_Flags_Test(unittest.TestCase):
+    def test_in_shadow_many_matches_in_shadow(self):
+        index = Eclipse_Index(420, 1.5, horizon=600)
+        times = np.arange(0, 2000, 0.5)  # Also after the horizon
+        expected = [index.in_shadow(float(t)) for t in times]
+        np.testing.assert_array_equal(index.in_shadow_many(times), expected)
+
+    def test_no_eclipses(self):
+        index = Eclipse_Index(420, 1.5, beta=90)
+        self.assertFalse(index.in_shadow_many([0, 45, 1e6]).any())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import bisect
+from array import array
+
+
+class _Prefix_Series:
+    def __init__(self, chunk_size, max_chunks):
+        """Times and running sums of one consumer, stored in chunks of chunk_size entries"""
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.total = 0.0
+        self._starts = []  # First time of each chunk kept
+        self._bases = []  # Running sum before each chunk kept
+        self._times = []
+        self._sums = []  # Running sum up to each entry (included)
+        # Chunks that were dropped only keep their last time and the running sum after them,
+        # merged two by two when there are max_chunks of them
+        self._dropped_ends = array("d")
+        self._dropped_sums = array("d")
+
+    def append(self, time, delta):
+        if not self._times or len(self._times[-1]) == self.chunk_size:
+            if len(self._times) == self.max_chunks:
+                times = self._times.pop(0)
+                sums = self._sums.pop(0)
+                self._starts.pop(0)
+                self._bases.pop(0)
+                if len(self._dropped_ends) >= self.max_chunks:
+                    keep = slice((len(self._dropped_ends) - 1) % 2, None, 2)  # The most recent is kept
+                    self._dropped_ends = self._dropped_ends[keep]
+                    self._dropped_sums = self._dropped_sums[keep]
+                self._dropped_ends.append(times[-1])
+                self._dropped_sums.append(sums[-1])
+            self._starts.append(time)
+            self._bases.append(self.total)
+            self._times.append(array("d"))
+            self._sums.append(array("d"))
+        self.total += delta
+        self._times[-1].append(time)
+        self._sums[-1].append(self.total)
+
+    def before(self, time):
+        """Sum of the deltas recorded before time, rounded to whole chunks in the dropped history"""
+        k = bisect.bisect_left(self._starts, time) - 1
+        if k < 0:
+            j = bisect.bisect_left(self._dropped_ends, time)
+            return self._dropped_sums[j - 1] if j else 0.0
+        i = bisect.bisect_left(self._times[k], time)
+        return self._sums[k][i - 1] if i else self._bases[k]
+
+
+class Energy_Ledger:
+    def __init__(self, chunk_size=4096, max_chunks=64):
+        """
+        Append-only record of every change of the battery: time(min), consumer and delta(%), negative
+        when energy is consumed and positive when charging.
+
+        Each consumer keeps running sums, so the energy of a consumer in any time window is two binary
+        searches. Entries are stored in chunks of chunk_size and only the last max_chunks chunks are kept,
+        older chunks only keep their totals (queries that reach into them are rounded to whole chunks).
+        Those totals are merged two by two when there are max_chunks of them, so the memory is bounded
+        however long the mission is and older history is rounded to coarser periods.
+        """
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.consumers = []  # Consumer code -> name
+        self._codes = {}
+        self._series = []  # Consumer code -> _Prefix_Series
+        self._chunks = []  # (times, consumer codes, deltas) of the entries kept
+        self.count = 0
+        self.last_time = float("-inf")
+
+    def __len__(self):
+        return self.count
+
+    def _code(self, consumer):
+        code = self._codes.get(consumer)
+        if code is None:
+            code = self._codes[consumer] = len(self.consumers)
+            self.consumers.append(consumer)
+            self._series.append(_Prefix_Series(self.chunk_size, self.max_chunks))
+        return code
+
+    def append(self, time, consumer, delta):
+        if time < self.last_time:
+            raise ValueError("Ledger entries must be appended in time order")
+        self.last_time = time
+        code = self._code(consumer)
+        self._series[code].append(time, delta)
+
+        if not self._chunks or len(self._chunks[-1][0]) == self.chunk_size:
+            if len(self._chunks) == self.max_chunks:
+                self._chunks.pop(0)
+            self._chunks.append((array("d"), array("H"), array("d")))
+        times, codes, deltas = self._chunks[-1]
+        times.append(time)
+        codes.append(code)
+        deltas.append(delta)
+        self.count += 1
+
+    def energy(self, consumer=None, start=None, end=None):
+        """
+        Sum of the deltas of a consumer (every consumer when None) recorded from start (included)
+        to end (excluded), the whole mission by default
+        """
+        codes = range(len(self.consumers)) if consumer is None else [self._codes.get(consumer)]
+        total = 0.0
+        for code in codes:
+            if code is None:
+                continue
+            series = self._series[code]
+            total += (series.total if end is None else series.before(end)) - \
+                     (0.0 if start is None else series.before(start))
+        return total
+
+    def by_consumer(self, start=None, end=None):
+        """Energy of every consumer in the window, e.g. {"comms": -3.2, "charging": 40.0}"""
+        return {consumer: self.energy(consumer, start, end) for consumer in self.consumers}
+
+    def columns(self):
+        """Entries kept as three columns: times, consumer codes (see consumers) and deltas"""
+        times, codes, deltas = array("d"), array("H"), array("d")
+        for chunk_times, chunk_codes, chunk_deltas in self._chunks:
+            times.extend(chunk_times)
+            codes.extend(chunk_codes)
+            deltas.extend(chunk_deltas)
+        return times, codes, deltas
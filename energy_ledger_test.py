@@ -0,0 +1,69 @@
+import random
+import unittest
+
+from Spacecraft import Spacecraft
+from energy_ledger import Energy_Ledger
+from telemetry_sinks import Null_Sink
+
+
+def brute_force(entries, consumer=None, start=None, end=None):
+    return sum(delta for time, name, delta in entries
+               if (consumer is None or name == consumer) and (start is None or time >= start)
+               and (end is None or time < end))
+
+
+class Energy_Ledger_Test(unittest.TestCase):
+    def test_windows_match_brute_force(self):
+        rng = random.Random(3)
+        ledger = Energy_Ledger(chunk_size=16, max_chunks=1000)
+        entries = []
+        time = 0.0
+        for _ in range(2000):
+            time += rng.choice((0.0, 0.5, 1.0))
+            entry = (time, rng.choice(("comms", "orbit", "charging")), rng.uniform(-2, 2))
+            ledger.append(*entry)
+            entries.append(entry)
+        for _ in range(200):
+            start, end = sorted(rng.uniform(0, time + 1) for _ in range(2))
+            for consumer in (None, "comms", "orbit", "missing"):
+                self.assertAlmostEqual(ledger.energy(consumer, start, end),
+                                       brute_force(entries, consumer, start, end))
+        self.assertAlmostEqual(ledger.energy(), brute_force(entries))
+        self.assertEqual(len(ledger.columns()[0]), len(entries))
+
+    def test_bounded_memory(self):
+        ledger = Energy_Ledger(chunk_size=8, max_chunks=4)
+        for minute in range(20000):
+            ledger.append(float(minute), "orbit", -0.2)
+        series = ledger._series[0]
+        self.assertLessEqual(len(series._dropped_ends), 4)
+        self.assertEqual(len(ledger.columns()[0]), 32)
+        self.assertAlmostEqual(ledger.energy("orbit"), -0.2 * 20000)
+        # The entries kept are exact, older history is rounded to the merged periods
+        self.assertAlmostEqual(ledger.energy("orbit", 19990, 20000), -2.0)
+        self.assertAlmostEqual(ledger.energy("orbit", None, 19990), -0.2 * 19990)
+
+    def test_out_of_order(self):
+        ledger = Energy_Ledger()
+        ledger.append(5.0, "comms", -1.0)
+        with self.assertRaises(ValueError):
+            ledger.append(4.0, "comms", -1.0)
+
+    def test_spacecraft_ledger_matches_battery(self):
+        spacecraft = Spacecraft(25544, "ISS", 420, 3, 420000, "International", telemetry_sink=Null_Sink())
+        ledger = spacecraft.enable_energy_ledger(chunk_size=64)
+        start = spacecraft.power_subsystem.battery_level
+        spacecraft.activate_payload("SAR Radar")
+        spacecraft.change_altitude(1500)  # Goes below 30%, so a charging cycle follows
+        spacecraft.update_payload_operation(10)
+        spacecraft.simulate_orbit()
+        spacecraft.send_message("working")
+        spacecraft.report_status()
+        self.assertAlmostEqual(ledger.energy(), spacecraft.power_subsystem.battery_level - start)
+        self.assertAlmostEqual(sum(ledger.by_consumer().values()), ledger.energy())
+        self.assertLess(ledger.energy("altitude"), 0)
+        self.assertGreater(ledger.energy("charging"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,254 @@
+import numpy as np
+from power_subsystem import Power_Subsystem
+from Payload_Subsystem import Payload_Subsystem, PAYLOAD_CONSUMPTION
+from altitude_control_subsystem import Altitude_Control_Subsystem
+from simulation_clock import Simulation_Clock
+
+# Every supported payload, in a fixed order
+PAYLOAD_TYPES = list(PAYLOAD_CONSUMPTION)
+
+
+def consume_energy_arrays(battery, solar_charging, amount, mask=None):
+    """
+    Batched version of Power_Subsystem.consume_energy, works in place over the arrays.
+    Returns a boolean mask with the rows that were able to consume energy.
+    """
+    ok = battery > 0
+    if mask is not None:
+        ok &= mask
+    consumed = np.minimum(battery, amount)
+    battery -= np.where(ok, consumed, 0.0)
+    # Check again if battery is low after the action
+    solar_charging |= ok & (battery < 30)
+    return ok
+
+
+def update_power_arrays(battery, solar_charging, dt, consumption_rate=0.5, charge_rate=2.5):
+    """Batched version of Power_Subsystem.update_power (consumption, 30% trigger and 95% cap)"""
+    # Only consume if not charging
+    battery -= np.where(solar_charging, 0.0, consumption_rate * dt)
+    np.maximum(battery, 0, out=battery)
+
+    # Activates solar charging when battery is less than 30%
+    solar_charging |= battery < 30
+
+    # Recharges the battery of the rows that are charging
+    battery += np.where(solar_charging, charge_rate * dt, 0.0)
+    full = solar_charging & (battery >= 95)
+    battery[full] = 95
+    solar_charging &= ~full
+
+
+def update_operation_arrays(battery, solar_charging, active, total_runtime, rates, dt):
+    """Batched version of Payload_Subsystem.update_operation for the active payloads"""
+    success = consume_energy_arrays(battery, solar_charging, rates * dt, active)
+    total_runtime += np.where(success, dt, 0.0)
+    # Payloads that could not get the energy are stopped
+    active &= success
+    return success
+
+
+class Fleet:
+    def __init__(self, size, orbital_altitude=200, payload_type="SAR Radar", battery_level=100.0):
+        """
+        Stores the state of many spacecraft in NumPy arrays, one row per spacecraft,
+        so that all of them are advanced in a single batched step
+
+        Arguments:
+
+        size: number of spacecraft in the fleet
+        orbital_altitude(km): altitude of every spacecraft (a number or one value per row)
+        payload_type: payload installed in every spacecraft
+        battery_level(%): initial battery of every spacecraft (a number or one value per row)
+        """
+        if payload_type not in PAYLOAD_CONSUMPTION:
+            raise ValueError(f"Unsupported payload type: {payload_type}")
+
+        self.size = size
+        self.consumption_rate = 0.5  # Consuption per minute
+        self.charge_rate = 2.5       # Charge per minute
+        self.payload_types = PAYLOAD_TYPES
+        self.payload_consumption = dict(PAYLOAD_CONSUMPTION)
+        self._type_rates = np.array([PAYLOAD_CONSUMPTION[name] for name in PAYLOAD_TYPES])
+
+        #Power
+        self.battery = np.empty(size)
+        self.battery[:] = battery_level
+        self.solar_charging = np.zeros(size, dtype=bool)
+
+        #Altitude and orientation (pitch, roll, yaw)
+        self.altitude = np.empty(size)
+        self.altitude[:] = orbital_altitude
+        self.orientation = np.zeros((size, 3))
+
+        #Payload
+        self.payload_type = np.full(size, PAYLOAD_TYPES.index(payload_type), dtype=np.int8)
+        self.payload_active = np.zeros(size, dtype=bool)
+        self.payload_runtime = np.zeros(size)
+        self.in_earth_shadow = np.zeros(size, dtype=bool)
+
+    def __len__(self):
+        return self.size
+
+    def payload_rates(self):
+        """Energy consumption per minute of the payload of every spacecraft"""
+        return self._type_rates[self.payload_type]
+
+    def consume_energy(self, amount, mask=None):
+        """Consumes an amount of energy (a number or one value per row) from the selected rows"""
+        return consume_energy_arrays(self.battery, self.solar_charging, amount, mask)
+
+    def update_power(self, dt):
+        """Updates the power of every spacecraft over dt minutes"""
+        update_power_arrays(self.battery, self.solar_charging, dt, self.consumption_rate, self.charge_rate)
+
+    def update_operation(self, dt, in_earth_shadow=False):
+        """Updates the payload operation of every spacecraft over dt minutes"""
+        self.in_earth_shadow[:] = in_earth_shadow
+        return update_operation_arrays(self.battery, self.solar_charging, self.payload_active,
+                                       self.payload_runtime, self.payload_rates(), dt)
+
+    def step(self, dt, in_earth_shadow=False):
+        """Advances the whole fleet dt minutes: payload operation followed by the power update"""
+        self.update_operation(dt, in_earth_shadow)
+        self.update_power(dt)
+
+    def set_payload_type(self, payload_type, mask=None):
+        """Changes the payload type of the selected rows and resets their payload state"""
+        if payload_type not in PAYLOAD_CONSUMPTION:
+            raise ValueError(f"Unsupported payload type: {payload_type}")
+        rows = slice(None) if mask is None else mask
+        self.payload_type[rows] = PAYLOAD_TYPES.index(payload_type)
+        self.payload_active[rows] = False
+        self.payload_runtime[rows] = 0.0
+        self.in_earth_shadow[rows] = False
+
+    def activate_payload(self, mask=None):
+        """Activates the payload of the selected rows if enough power is available"""
+        inactive = ~self.payload_active
+        if mask is not None:
+            inactive &= mask
+        self.payload_active |= self.consume_energy(0.5, inactive)
+
+    def deactivate_payload(self, mask=None):
+        """Deactivates the payload of the selected rows"""
+        rows = slice(None) if mask is None else mask
+        self.payload_active[rows] = False
+        self.payload_runtime[rows] = 0.0
+        self.in_earth_shadow[rows] = False
+
+    def spacecraft(self, index, norad_id=None, name=None, orbital_period=2, mass=400, country="USA"):
+        """
+        Returns a Spacecraft whose power, payload and altitude subsystems read and write
+        the row index of the fleet arrays, so the single-object API keeps working
+        """
+        from Spacecraft import Spacecraft
+        if norad_id is None:
+            norad_id = index
+        if name is None:
+            name = f"Fleet-{index}"
+        return Spacecraft(norad_id, name, float(self.altitude[index]), orbital_period, mass, country,
+                          power_subsystem=Fleet_Power_View(self, index),
+                          payload_subsystem=Fleet_Payload_View(self, index),
+                          altitude_control=Fleet_Altitude_View(self, index))
+
+
+class Fleet_Power_View(Power_Subsystem):
+    def __init__(self, fleet, index):
+        """Power subsystem that stores its battery and charging flag in one row of a Fleet"""
+        self._fleet = fleet
+        self._index = index
+        self.consumption_rate = fleet.consumption_rate
+        self.charge_rate = fleet.charge_rate
+        self.monitor = None
+        self.ledger = None
+
+    @property
+    def battery_level(self):
+        return float(self._fleet.battery[self._index])
+
+    @battery_level.setter
+    def battery_level(self, value):
+        self._fleet.battery[self._index] = value
+
+    @property
+    def solar_charging(self):
+        return bool(self._fleet.solar_charging[self._index])
+
+    @solar_charging.setter
+    def solar_charging(self, value):
+        self._fleet.solar_charging[self._index] = value
+
+
+class Fleet_Payload_View(Payload_Subsystem):
+    def __init__(self, fleet, index):
+        """Payload subsystem that stores its state in one row of a Fleet"""
+        self._fleet = fleet
+        self._index = index
+        self.power_subsystem = None
+        self.comms_subsystem = None
+        self.monitor = None
+        self.payload_consumption = fleet.payload_consumption
+
+    @property
+    def payload_type(self):
+        return self._fleet.payload_types[self._fleet.payload_type[self._index]]
+
+    @payload_type.setter
+    def payload_type(self, value):
+        self._fleet.payload_type[self._index] = self._fleet.payload_types.index(value)
+
+    @property
+    def active(self):
+        return bool(self._fleet.payload_active[self._index])
+
+    @active.setter
+    def active(self, value):
+        self._fleet.payload_active[self._index] = value
+
+    @property
+    def total_runtime(self):
+        return float(self._fleet.payload_runtime[self._index])
+
+    @total_runtime.setter
+    def total_runtime(self, value):
+        self._fleet.payload_runtime[self._index] = value
+
+    @property
+    def operating_in_earth_shadow(self):
+        return bool(self._fleet.in_earth_shadow[self._index])
+
+    @operating_in_earth_shadow.setter
+    def operating_in_earth_shadow(self, value):
+        self._fleet.in_earth_shadow[self._index] = value
+
+
+class Fleet_Altitude_View(Altitude_Control_Subsystem):
+    def __init__(self, fleet, index):
+        """Altitude control subsystem that stores altitude and orientation in one row of a Fleet"""
+        self._fleet = fleet
+        self._index = index
+        self.power_system = None  # It will be connected from Spacecraft
+        self.clock = Simulation_Clock()
+
+    @staticmethod
+    def _number(value):
+        # Whole numbers are ints, as in Altitude_Control_Subsystem, so the reports read the same
+        value = float(value)
+        return int(value) if value.is_integer() else value
+
+    @property
+    def altitude(self):
+        return self._number(self._fleet.altitude[self._index])
+
+    @altitude.setter
+    def altitude(self, value):
+        self._fleet.altitude[self._index] = value
+
+    @property
+    def orientation(self):
+        return [self._number(value) for value in self._fleet.orientation[self._index]]
+
+    @orientation.setter
+    def orientation(self, value):
+        self._fleet.orientation[self._index] = value
@@ -0,0 +1,77 @@
+import unittest
+
+import numpy as np
+from Spacecraft import Spacecraft
+from fleet import PAYLOAD_TYPES, Fleet
+from telemetry_sinks import Null_Sink, Ring_Buffer_Sink
+
+
+def make_spacecraft(battery_level, payload_type):
+    spacecraft = Spacecraft(1, "Single", 200, 2, 400, "USA", telemetry_sink=Null_Sink())
+    spacecraft.power_subsystem.battery_level = battery_level
+    spacecraft.payload_subsystem.payload_type = payload_type
+    spacecraft.payload_subsystem.active = True
+    return spacecraft
+
+
+class Fleet_Test(unittest.TestCase):
+    def test_step_matches_the_subsystems(self):
+        rng = np.random.default_rng(0)
+        size = 200
+        fleet = Fleet(size, battery_level=rng.uniform(0, 100, size))
+        fleet.battery[::17] = 0.0  # These payloads stop on the first step
+        fleet.payload_type[:] = rng.integers(len(PAYLOAD_TYPES), size=size)
+        fleet.payload_active[:] = True
+        single = [make_spacecraft(float(fleet.battery[k]), PAYLOAD_TYPES[fleet.payload_type[k]]) for k in range(size)]
+
+        for k, dt in enumerate((1.0, 0.5, 2.5, 1.0, 3.0) * 12):
+            in_earth_shadow = k % 3 == 0
+            fleet.step(dt, in_earth_shadow)
+            for spacecraft in single:
+                spacecraft.payload_subsystem.update_operation(dt, in_earth_shadow)
+                spacecraft.power_subsystem.update_power(dt)
+
+        self.assertEqual(fleet.battery.tolist(), [s.power_subsystem.battery_level for s in single])
+        self.assertEqual(fleet.solar_charging.tolist(), [s.power_subsystem.solar_charging for s in single])
+        self.assertEqual(fleet.payload_active.tolist(), [s.payload_subsystem.active for s in single])
+        self.assertEqual(fleet.payload_runtime.tolist(), [s.payload_subsystem.total_runtime for s in single])
+        self.assertFalse(fleet.payload_active.all())  # Some payloads ran out of power
+
+    def test_activate_and_deactivate(self):
+        fleet = Fleet(4, battery_level=[100.0, 0.0, 50.0, 0.2])
+        fleet.activate_payload(np.array([True, True, False, True]))
+        self.assertEqual(fleet.payload_active.tolist(), [True, False, False, True])
+        self.assertEqual(fleet.battery.tolist(), [99.5, 0.0, 50.0, 0.0])
+        self.assertEqual(fleet.solar_charging.tolist(), [False, False, False, True])
+        fleet.deactivate_payload()
+        self.assertFalse(fleet.payload_active.any())
+        with self.assertRaises(ValueError):
+            fleet.set_payload_type("Unknown")
+
+    def test_spacecraft_view(self):
+        fleet = Fleet(3, orbital_altitude=200)
+        view = fleet.spacecraft(1)
+        view.set_telemetry_sink(Ring_Buffer_Sink(10000))
+        single = Spacecraft(1, "Fleet-1", 200, 2, 400, "USA", telemetry_sink=Ring_Buffer_Sink(10000))
+        for spacecraft in (view, single):
+            spacecraft.activate_payload("Cloud Seeding Device")
+            spacecraft.update_payload_operation(5, in_earth_shadow=True)
+            spacecraft.change_altitude(1500)
+            spacecraft.change_orientation(10, 20, 30)
+            spacecraft.change_orientation(10.5, 20, 30)
+            spacecraft.simulate_orbit()
+            spacecraft.report_status()
+
+        self.assertEqual(view.telemetry_sink.messages(), single.telemetry_sink.messages())
+        self.assertIsInstance(view.altitude_control.altitude, int)
+
+        self.assertEqual(fleet.battery[1], single.power_subsystem.battery_level)
+        self.assertEqual(fleet.altitude[1], single.altitude_control.altitude)
+        self.assertEqual(fleet.orientation[1].tolist(), single.altitude_control.orientation)
+        self.assertEqual(fleet.payload_runtime[1], single.payload_subsystem.total_runtime)
+        self.assertEqual(PAYLOAD_TYPES[fleet.payload_type[1]], "Cloud Seeding Device")
+        self.assertEqual(fleet.battery[[0, 2]].tolist(), [100.0, 100.0])  # The other rows are untouched
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import heapq
+import itertools
+from array import array
+from collections import namedtuple
+
+# Contact window of a station with some spacecraft (None: every spacecraft of the segment)
+Contact = namedtuple("Contact", "start end station spacecraft")
+
+
+class Ground_Station:
+    def __init__(self, name, bandwidth):
+        """
+        name: identifier of the station
+        bandwidth(bytes/min): compressed bytes that the station receives per minute of contact
+        """
+        self.name = name
+        self.bandwidth = bandwidth
+        self.bytes_received = 0
+
+
+class Ground_Segment:
+    def __init__(self):
+        """
+        Multiplexes the downlink queues of many spacecraft into the contact windows of the ground stations.
+        The spacecraft keep their messages queued (enable_downlink with hold) and, during a contact, the
+        station takes frames from the spacecraft whose next message is most important (then oldest),
+        until its bandwidth for that part of the window is used. Each frame is paid by the power subsystem
+        of its spacecraft, through Communication_Subsystem.transmit_frame.
+
+        Contacts of the same station should not overlap, each one uses the whole bandwidth.
+        A frame larger than what one advance can transmit is transmitted over the following advances
+        of the same contact.
+        """
+        self.spacecraft = []
+        self._contacts = []  # (start, order, Contact) of the contacts that have not started
+        self._open = []  # [contact, bytes carried] of the contacts that started and have not finished
+        self._order = itertools.count()
+        self.now = 0.0
+        # Statistics
+        self.latencies = array("d")  # Minutes from send_status to reception of every message
+        self.frames = 0
+        self.bytes_sent = 0
+        self.max_backlog = 0  # Most messages waiting at the end of an advance
+
+    def add_spacecraft(self, spacecraft, frame_size=2048, level=6):
+        """Holds the telemetry of a spacecraft in its downlink queue until a contact"""
+        spacecraft.enable_downlink(frame_size, level, hold=True)
+        self.spacecraft.append(spacecraft)
+        return spacecraft
+
+    def add_contact(self, station, start, end, spacecraft=None):
+        """Schedules a contact window (minutes) of a station with some spacecraft (all by default)"""
+        contact = Contact(start, end, station, spacecraft)
+        heapq.heappush(self._contacts, (start, next(self._order), contact))
+        return contact
+
+    def advance(self, now):
+        """
+        Uses the contact time between the last advance and now. Call it as the simulation advances,
+        only the messages queued so far can be transmitted.
+        """
+        while self._contacts and self._contacts[0][0] < now:
+            self._open.append([heapq.heappop(self._contacts)[2], 0.0])
+        for entry in self._open:
+            contact = entry[0]
+            start = max(contact.start, self.now)
+            end = min(contact.end, now)
+            if end > start:
+                entry[1] = self._serve(contact, start, end, entry[1])
+        self._open = [entry for entry in self._open if entry[0].end > now]
+        self.now = now
+        self.max_backlog = max(self.max_backlog, self.backlog()[0])
+
+    def _serve(self, contact, start, end, carried):
+        """Transmits during start to end, carried bytes of a frame that did not fit were already received
+        in the previous advances. Returns the bytes to carry to the next advance."""
+        station = contact.station
+        capacity = carried + station.bandwidth * (end - start)
+        members = self.spacecraft if contact.spacecraft is None else contact.spacecraft
+        # (priority, queue time, order, comms) of the next message of every spacecraft with traffic
+        ready = [(*comms.downlink.peek(), k, comms) for k, comms in
+                 enumerate(spacecraft.comms_subsystem for spacecraft in members) if len(comms.downlink)]
+        heapq.heapify(ready)
+
+        sent = 0
+        blocked = False
+        while ready:
+            _, _, k, comms = heapq.heappop(ready)
+            downlink = comms.downlink
+            if downlink.next_frame_size() > capacity - sent:
+                blocked = True
+                continue  # Smaller frames of other spacecraft may still fit
+            _, frame = comms.transmit_frame()
+            sent += len(frame)
+            received = start + max(sent - carried, 0) / station.bandwidth
+            self.latencies.extend(max(received - queued_at, 0.0) for queued_at in downlink.last_queued_at)
+            self.frames += 1
+            if len(downlink):
+                heapq.heappush(ready, (*downlink.peek(), k, comms))
+
+        station.bytes_received += sent
+        self.bytes_sent += sent
+        # The unused time goes to the frame that did not fit, it continues in the next advance
+        return capacity - sent if blocked else 0.0
+
+    def backlog(self):
+        """Messages and characters waiting in the downlink queues"""
+        messages = chars = 0
+        for spacecraft in self.spacecraft:
+            downlink = spacecraft.comms_subsystem.downlink
+            messages += len(downlink)
+            chars += downlink.queued_chars
+        return messages, chars
+
+    def statistics(self):
+        """Latency (minutes) of the received messages and the backlog"""
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        messages, chars = self.backlog()
+        return {
+            "frames": self.frames,
+            "bytes": self.bytes_sent,
+            "messages": count,
+            "latency_mean": sum(latencies) / count if count else 0.0,
+            "latency_p95": latencies[min(int(0.95 * count), count - 1)] if count else 0.0,
+            "latency_max": latencies[-1] if count else 0.0,
+            "backlog_messages": messages,
+            "backlog_chars": chars,
+            "max_backlog_messages": self.max_backlog,
+        }
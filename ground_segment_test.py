@@ -0,0 +1,99 @@
+import unittest
+
+from Spacecraft import Spacecraft
+from ground_segment import Ground_Segment, Ground_Station
+from telemetry_sinks import Null_Sink
+
+
+def queue_messages(spacecraft, count, text="[Status] message number {} with some text"):
+    for k in range(count):
+        spacecraft.comms_subsystem.send_status(text.format(k), skip_summary=True)
+
+
+class Ground_Segment_Test(unittest.TestCase):
+    def setUp(self):
+        self.segment = Ground_Segment()
+        self.spacecraft = [self.segment.add_spacecraft(Spacecraft(k, f"Sat-{k}", 500, 1.5, 100, "CO",
+                                                                  telemetry_sink=Null_Sink()))
+                           for k in range(3)]
+
+    def test_nothing_is_sent_outside_contacts(self):
+        queue_messages(self.spacecraft[0], 50)
+        self.segment.add_contact(Ground_Station("GS", 1000), 10, 20)
+        self.segment.advance(10)
+        self.assertEqual(self.segment.frames, 0)
+        self.segment.advance(30)
+        self.assertEqual(self.segment.backlog(), (0, 0))
+
+    def test_frame_larger_than_one_advance(self):
+        # Each compressed frame is larger than what the station receives in one minute
+        for bandwidth in (1500, 100, 20):
+            with self.subTest(bandwidth=bandwidth):
+                segment = Ground_Segment()
+                spacecraft = segment.add_spacecraft(Spacecraft(1, "Sat", 500, 1.5, 100, "CO",
+                                                               telemetry_sink=Null_Sink()))
+                queue_messages(spacecraft, 120)
+                station = Ground_Station("GS", bandwidth)
+                segment.add_contact(station, 0, 100)
+                for minute in range(1, 101):
+                    segment.advance(minute)
+                statistics = segment.statistics()
+                self.assertEqual(statistics["backlog_messages"], 0)
+                self.assertEqual(statistics["messages"], 120)
+                self.assertLessEqual(station.bytes_received, bandwidth * 100)
+                self.assertLessEqual(statistics["latency_max"], station.bytes_received / bandwidth)
+
+    def test_bandwidth_limit(self):
+        for spacecraft in self.spacecraft:
+            queue_messages(spacecraft, 400)
+        station = Ground_Station("GS", 300)
+        self.segment.add_contact(station, 0, 10)
+        for minute in range(1, 12):
+            self.segment.advance(minute)
+        self.assertLessEqual(station.bytes_received, 300 * 10)
+        self.assertGreater(self.segment.backlog()[0], 0)
+
+    def test_alerts_first(self):
+        queue_messages(self.spacecraft[0], 200)
+        queue_messages(self.spacecraft[1], 1, "[ALERT] Battery {} low")
+        self.segment.add_contact(Ground_Station("GS", 100), 0, 10, [self.spacecraft[0], self.spacecraft[1]])
+        self.segment.advance(2)
+        self.assertEqual(len(self.spacecraft[1].comms_subsystem.downlink), 0)
+        self.assertGreater(len(self.spacecraft[0].comms_subsystem.downlink), 0)
+
+    def test_frames_are_paid_by_their_spacecraft(self):
+        queue_messages(self.spacecraft[2], 100)
+        before = [spacecraft.power_subsystem.battery_level for spacecraft in self.spacecraft]
+        self.segment.add_contact(Ground_Station("GS", 10000), 0, 5)
+        self.segment.advance(5)
+        after = [spacecraft.power_subsystem.battery_level for spacecraft in self.spacecraft]
+        self.assertEqual(after[:2], before[:2])
+        self.assertAlmostEqual(before[2] - after[2], 0.005 * self.segment.bytes_sent)
+
+
+class Next_Frame_Test(unittest.TestCase):
+    def test_next_frame_size_is_the_frame_popped(self):
+        spacecraft = Spacecraft(1, "Sat", 500, 1.5, 100, "CO", telemetry_sink=Null_Sink())
+        spacecraft.enable_downlink(frame_size=256, hold=True)
+        queue_messages(spacecraft, 30)
+        downlink = spacecraft.comms_subsystem.downlink
+        size = downlink.next_frame_size()
+        self.assertEqual(len(downlink), 30)
+        messages, frame = downlink.pop_frame()
+        self.assertEqual(len(frame), size)
+        self.assertEqual(len(downlink), 30 - len(messages))
+
+    def test_push_after_next_frame_size(self):
+        spacecraft = Spacecraft(1, "Sat", 500, 1.5, 100, "CO", telemetry_sink=Null_Sink())
+        spacecraft.enable_downlink(frame_size=256, hold=True)
+        queue_messages(spacecraft, 30)
+        downlink = spacecraft.comms_subsystem.downlink
+        downlink.next_frame_size()
+        spacecraft.comms_subsystem.send_status("[ALERT] Late alert")
+        self.assertEqual(downlink.peek()[0], 0)
+        messages, _ = downlink.pop_frame()
+        self.assertEqual(messages[0], "[ALERT] Late alert")
+
+
+if __name__ == "__main__":
+    unittest.main()
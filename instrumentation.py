@@ -0,0 +1,147 @@
+import functools
+import time
+
+# Methods timed by Spacecraft.enable_metrics: subsystem attribute -> methods
+HOT_METHODS = {
+    "power_subsystem": ("consume_energy", "update_power"),
+    "comms_subsystem": ("send_status", "summarize"),
+}
+
+
+class Metrics:
+    def __init__(self, timer=time.perf_counter):
+        """
+        Counters and timers of a simulation. Nothing is measured until it is attached to the subsystems
+        (Spacecraft.enable_metrics), a spacecraft without metrics only pays an "is None" check.
+
+        Every counter and timer has a name and an optional label, e.g. add("energy_consumed", 0.5, "comms")
+        """
+        self.timer = timer
+        self.counters = {}  # (name, label) -> value
+        self.timers = {}  # (name, label) -> [calls, total seconds, max seconds]
+
+    def add(self, name, value=1, label=""):
+        key = (name, label)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def counter(self, name, label=""):
+        """Value of a counter, 0 when nothing was added to it"""
+        return self.counters.get((name, label), 0)
+
+    def observe(self, name, seconds, label=""):
+        """Records one call of a timer that took seconds"""
+        stats = self.timers.get((name, label))
+        if stats is None:
+            self.timers[(name, label)] = [1, seconds, seconds]
+        else:
+            stats[0] += 1
+            stats[1] += seconds
+            if seconds > stats[2]:
+                stats[2] = seconds
+
+    def timed(self, function, name, label=""):
+        """Returns function wrapped so every call is counted and timed"""
+        timer = self.timer
+        observe = self.observe
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = timer()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                observe(name, timer() - start, label)
+        return wrapper
+
+    def instrument(self, obj, method, label=""):
+        """Times a method of one object only (the class and the other objects are not changed)"""
+        setattr(obj, method, self.timed(getattr(obj, method), method, label))
+
+    def reset(self):
+        self.counters.clear()
+        self.timers.clear()
+
+    def snapshot(self):
+        """Copy of every counter and timer as plain dicts: {"counters": {name: {label: value}}, "timers": ...}"""
+        counters = {}
+        for (name, label), value in self.counters.items():
+            counters.setdefault(name, {})[label] = value
+        timers = {}
+        for (name, label), (calls, total, slowest) in self.timers.items():
+            timers.setdefault(name, {})[label] = {"calls": calls, "seconds": total, "max_seconds": slowest}
+        return {"counters": counters, "timers": timers}
+
+    def to_prometheus(self, prefix="spacecraft"):
+        """Text exposition format of Prometheus: counters as <prefix>_<name>_total, timers as summaries"""
+        lines = []
+        for name, labels in sorted(self.snapshot()["counters"].items()):
+            metric = f"{prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for label, value in sorted(labels.items()):
+                lines.append(f"{metric}{_labels(label)} {value:g}")
+        for name, labels in sorted(self.snapshot()["timers"].items()):
+            metric = f"{prefix}_{name}_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for label, stats in sorted(labels.items()):
+                lines.append(f"{metric}_count{_labels(label)} {stats['calls']}")
+                lines.append(f"{metric}_sum{_labels(label)} {stats['seconds']:.9f}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path, prefix="spacecraft"):
+        """Dumps to_prometheus() to a file, e.g. for the textfile collector of node_exporter"""
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(self.to_prometheus(prefix))
+
+
+def _labels(label):
+    if not label:
+        return ""
+    key, _, value = label.rpartition("=")
+    return '{%s="%s"}' % (key or "subsystem", value)
+
+
+class Method_Profiler:
+    def __init__(self, spacecraft, metrics, interval=0.005):
+        """
+        Sampling profiler of one spacecraft: a background thread looks every interval seconds at the
+        thread that created the profiler and counts a sample for the outermost Spacecraft method running
+        on this spacecraft (counter "method_samples" labelled method=<name>).
+        Sampling does not slow down the simulation loop itself. The thread only gets to run when the
+        interpreter switches threads (sys.getswitchinterval(), 5 ms by default), shorter intervals add nothing.
+        """
+        import threading
+        self.spacecraft = spacecraft
+        self.metrics = metrics
+        self.interval = interval
+        self._codes = {function.__code__: name for name, function in vars(type(spacecraft)).items()
+                       if callable(function) and hasattr(function, "__code__") and not name.startswith("_")}
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _sample(self, frame):
+        method = None
+        while frame is not None:
+            name = self._codes.get(frame.f_code)
+            if name is not None and frame.f_locals.get("self") is self.spacecraft:
+                method = name
+            frame = frame.f_back
+        return method
+
+    def _run(self):
+        import sys
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            method = self._sample(frame)
+            if method is not None:
+                self.metrics.add("method_samples", 1, f"method={method}")
+
+    def estimated_seconds(self):
+        """Time attributed to each method: samples times the sampling interval"""
+        samples = self.metrics.snapshot()["counters"].get("method_samples", {})
+        return {label.partition("=")[2]: count * self.interval for label, count in samples.items()}
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
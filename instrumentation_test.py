@@ -0,0 +1,103 @@
+import itertools
+import os
+import tempfile
+import time
+import unittest
+
+from Spacecraft import Spacecraft
+from instrumentation import Metrics
+from telemetry_sinks import Null_Sink
+
+
+def make_spacecraft():
+    return Spacecraft(1, "Metrics", 200, 2, 400, "USA", telemetry_sink=Null_Sink())
+
+
+def mission(spacecraft):
+    spacecraft.activate_payload("SAR Radar")
+    for k in range(20):
+        spacecraft.update_payload_operation(1, in_earth_shadow=k % 2 == 0)
+        spacecraft.power_subsystem.update_power(1)
+    spacecraft.change_altitude(1500)
+    spacecraft.change_orientation(40, 10, 5)
+    spacecraft.simulate_orbit()
+    spacecraft.send_message("hello")
+    spacecraft.report_status()
+
+
+class Metrics_Test(unittest.TestCase):
+    def test_counters_match_the_simulation(self):
+        plain = make_spacecraft()
+        mission(plain)
+        spacecraft = make_spacecraft()
+        ledger = spacecraft.enable_energy_ledger()
+        metrics = spacecraft.enable_metrics()
+        mission(spacecraft)
+
+        self.assertEqual(spacecraft.snapshot(), plain.snapshot())  # Measuring does not change the results
+        counters = metrics.snapshot()["counters"]
+        # The orbits fold their per-minute messages into the accounting without sending them one by one
+        self.assertEqual(counters["chars_transmitted"][""] + counters["chars_folded"][""],
+                         spacecraft.comms_subsystem.total_chars)
+        self.assertGreaterEqual(counters["charge_cycles"][""], 1)
+        self.assertGreater(counters["acs_charging_iterations"][""], 0)
+        for consumer, energy in counters["energy_consumed"].items():
+            self.assertAlmostEqual(energy, -ledger.energy(consumer), msg=consumer)
+        timers = metrics.snapshot()["timers"]
+        self.assertEqual(timers["send_status"][""]["calls"] + counters["messages_folded"][""],
+                         spacecraft.comms_subsystem.messages_sent)
+
+    def test_disable_metrics(self):
+        spacecraft = make_spacecraft()
+        metrics = spacecraft.enable_metrics()
+        spacecraft.disable_metrics()
+        mission(spacecraft)
+        self.assertEqual(metrics.counters, {})
+        self.assertEqual(metrics.timers, {})
+        self.assertNotIn("send_status", vars(spacecraft.comms_subsystem))
+
+    def test_counter(self):
+        metrics = Metrics()
+        metrics.add("energy_consumed", 1.5, "comms")
+        self.assertEqual(metrics.counter("energy_consumed", "comms"), 1.5)
+        self.assertEqual(metrics.counter("energy_consumed"), 0)
+        self.assertEqual(metrics.counter("charge_cycles"), 0)
+
+    def test_timers(self):
+        ticks = itertools.count()
+        metrics = Metrics(timer=lambda: next(ticks) * 0.5)
+        double = metrics.timed(lambda x: 2 * x, "double")
+        self.assertEqual([double(1), double(2)], [2, 4])
+        self.assertEqual(metrics.snapshot()["timers"], {"double": {"": {"calls": 2, "seconds": 1.0,
+                                                                         "max_seconds": 0.5}}})
+
+    def test_prometheus(self):
+        metrics = Metrics()
+        metrics.add("energy_consumed", 1.5, "comms")
+        metrics.add("energy_consumed", 2, "method=orbit")
+        metrics.observe("send_status", 0.25)
+        text = metrics.to_prometheus()
+        self.assertIn("# TYPE spacecraft_energy_consumed_total counter\n", text)
+        self.assertIn('spacecraft_energy_consumed_total{subsystem="comms"} 1.5\n', text)
+        self.assertIn('spacecraft_energy_consumed_total{method="orbit"} 2\n', text)
+        self.assertIn("spacecraft_send_status_seconds_count 1\n", text)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics.prom")
+            metrics.write_prometheus(path)
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(f.read(), text)
+
+
+class Method_Profiler_Test(unittest.TestCase):
+    def test_samples_the_running_method(self):
+        spacecraft = make_spacecraft()
+        profiler = spacecraft.start_profiler(interval=0.001)
+        start = time.perf_counter()
+        while time.perf_counter() - start < 0.3:
+            spacecraft.report_status()
+        profiler.stop()
+        self.assertGreater(profiler.estimated_seconds().get("report_status", 0), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import itertools
+import os
+import random
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+Mission_Result = namedtuple(
+    "Mission_Result",
+    "scenario min_battery minutes_below_30 charge_cycles payload_runtime messages_sent final_battery"
+)
+
+# Parameters of a scenario that are not given take these values
+DEFAULT_SCENARIO = {
+    "orbital_altitude": 200,      # km
+    "orbital_period": 2,          # hours
+    "payload_type": "SAR Radar",
+    "maneuvers": (),              # ("altitude", km) or ("orientation", (pitch, roll, yaw))
+    "eclipse_fraction": None,     # Fraction of every orbit spent in Earth's shadow (None: from the orbit geometry)
+    "orbits": 1,                  # Duration of the mission in orbits
+    "step": 1,                    # Minutes per simulation step
+}
+
+
+def grid_scenarios(**axes):
+    """
+    Builds one scenario per combination of the given values, e.g.
+    grid_scenarios(orbital_altitude=[300, 500], payload_type=["SAR Radar", "Cloud Seeding Device"])
+    """
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[name] for name in names))]
+
+
+def random_scenarios(count, seed=0, **distributions):
+    """
+    Draws count scenarios. Each parameter is a (low, high) tuple for a uniform value,
+    a list to choose from, or a fixed value. All the draws happen here with the given seed,
+    so the results do not depend on how the scenarios are split between workers.
+    """
+    rng = random.Random(seed)
+    scenarios = []
+    for _ in range(count):
+        scenario = {}
+        for name, distribution in distributions.items():
+            if isinstance(distribution, tuple) and len(distribution) == 2:
+                scenario[name] = rng.uniform(*distribution)
+            elif isinstance(distribution, list):
+                scenario[name] = rng.choice(distribution)
+            else:
+                scenario[name] = distribution
+        scenarios.append(scenario)
+    return scenarios
+
+
+class _Battery_Watch:
+    """Power monitor that only keeps the lowest battery level (see Power_Subsystem.attach_monitor)"""
+    def __init__(self, power):
+        self.power = power
+        self.min_battery = power.battery_level
+
+    def on_consume(self, consumed):
+        self.min_battery = min(self.min_battery, self.power.battery_level)
+
+    def on_tick(self, dt, battery_before, battery_after, charging, using_solar):
+        self.min_battery = min(self.min_battery, battery_after)
+
+
+def run_scenario(scenario, index=0):
+    """Runs one scenario on a silent Spacecraft and returns its Mission_Result"""
+    from Spacecraft import Spacecraft
+    from orbit_geometry import Eclipse_Index
+    from telemetry_sinks import Null_Sink
+
+    params = dict(DEFAULT_SCENARIO, **scenario)
+    sc = Spacecraft(index, f"Scenario-{index}", params["orbital_altitude"], params["orbital_period"],
+                    400, "USA", telemetry_sink=Null_Sink())
+    power = sc.power_subsystem
+    # Charge cycles are counted where they start (Power_Subsystem.start_solar_charging), also the ones
+    # that start and end inside a maneuver, and the lowest battery is seen after every consumption
+    metrics = sc.enable_metrics(timers=False)
+    watch = _Battery_Watch(power)
+    power.attach_monitor(watch)
+
+    period = params["orbital_period"] * 60
+    step = params["step"]
+    total_minutes = int(period * params["orbits"])
+    eclipses = power.eclipse_index
+    if params["eclipse_fraction"] is not None:
+        # The same windows for the charging, the payload and the loop below (centered at half an orbit)
+        eclipses = Eclipse_Index(params["orbital_altitude"], params["orbital_period"], total_minutes,
+                                 fraction=params["eclipse_fraction"])
+        power.attach_eclipse_index(eclipses, sc.clock)
+        sc.payload_subsystem.attach_eclipse_index(eclipses, sc.clock)
+
+    sc.activate_payload(params["payload_type"])
+    for kind, target in params["maneuvers"]:
+        if kind == "altitude":
+            sc.change_altitude(target)
+        else:
+            sc.change_orientation(*target)
+
+    minutes_below_30 = 0
+    sunlight = True
+    elapsed = 0
+    while elapsed < total_minutes:
+        dt = min(step, total_minutes - elapsed)
+        in_shadow = eclipses.in_shadow(sc.clock.now)
+        if in_shadow == sunlight:
+            sunlight = not in_shadow
+            sc.handle_eclipse(sunlight, sunlight)
+        sc.payload_subsystem.update_operation(dt, in_shadow)
+        power.update_power(dt)
+        sc.clock.advance(dt)
+        elapsed += dt
+        if power.battery_level < 30:
+            minutes_below_30 += dt
+
+    return Mission_Result(index, watch.min_battery, minutes_below_30, metrics.counter("charge_cycles"),
+                          sc.payload_subsystem.total_runtime, sc.comms_subsystem.messages_sent,
+                          power.battery_level)
+
+
+def _run_indexed(item):
+    index, scenario = item
+    return run_scenario(scenario, index)
+
+
+def _silence_worker():
+    """Workers never write to the console"""
+    sys.stdout = open(os.devnull, "w")
+
+
+def run_scenarios(scenarios, max_workers=None, chunksize=None):
+    """
+    Runs every scenario in a process pool and returns their results in the same order.
+    max_workers=1 runs them in this process.
+    """
+    items = list(enumerate(scenarios))
+    if max_workers == 1:
+        return [_run_indexed(item) for item in items]
+
+    workers = max_workers or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, len(items) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_silence_worker) as executor:
+        return list(executor.map(_run_indexed, items, chunksize=chunksize))
@@ -0,0 +1,54 @@
+import unittest
+
+from mission_runner import grid_scenarios, random_scenarios, run_scenario, run_scenarios
+
+
+class Run_Scenario_Test(unittest.TestCase):
+    def test_charge_cycle_inside_maneuver(self):
+        # The maneuver drains the battery to about 18% and the charging cycle ends inside change_altitude
+        result = run_scenario({"maneuvers": [("altitude", 1000)], "orbits": 0})
+        self.assertEqual(result.charge_cycles, 1)
+        self.assertLess(result.min_battery, 30)
+        self.assertGreater(result.final_battery, 90)
+
+    def test_no_charging(self):
+        result = run_scenario({"orbital_period": 0.5, "payload_type": "Ionospheric Particle Collector"})
+        self.assertEqual(result.charge_cycles, 0)
+        self.assertEqual(result.minutes_below_30, 0)
+        self.assertEqual(result.min_battery, result.final_battery)
+        self.assertEqual(result.payload_runtime, 30)
+
+    def test_float_step(self):
+        result = run_scenario({"orbital_period": 0.5, "payload_type": "Ionospheric Particle Collector", "step": 2.5})
+        self.assertEqual(result.payload_runtime, 30)
+        self.assertEqual(result, run_scenario({"orbital_period": 0.5, "payload_type": "Ionospheric Particle Collector",
+                                               "step": 2.5}))
+
+    def test_eclipse_fraction(self):
+        # The charging waits in the shadow: without eclipses the battery is charged as soon as it is below 30%
+        results = [run_scenario({"orbits": 3, "eclipse_fraction": fraction}) for fraction in (0.0, 0.2, 0.4)]
+        self.assertEqual(results[0].minutes_below_30, 0)
+        self.assertGreater(results[2].minutes_below_30, 0)
+        self.assertGreater(results[0].payload_runtime, results[1].payload_runtime)
+        self.assertGreater(results[1].payload_runtime, results[2].payload_runtime)
+
+    def test_cycles_during_orbits(self):
+        result = run_scenario({"orbits": 5, "eclipse_fraction": 0.3})
+        self.assertGreater(result.charge_cycles, 1)
+        self.assertLess(result.min_battery, 30)
+
+
+class Run_Scenarios_Test(unittest.TestCase):
+    def test_pool_matches_sequential(self):
+        scenarios = grid_scenarios(orbital_altitude=[300, 500], maneuvers=[(), [("orientation", (90, 90, 90))]],
+                                   payload_type=["SAR Radar", "Cloud Seeding Device"])
+        scenarios += random_scenarios(6, seed=4, orbits=(1, 3), eclipse_fraction=(0.0, 0.4))
+        self.assertEqual(run_scenarios(scenarios, max_workers=2), run_scenarios(scenarios, max_workers=1))
+
+    def test_random_scenarios_are_reproducible(self):
+        self.assertEqual(random_scenarios(5, seed=1, orbits=(1, 2), payload_type=["SAR Radar"]),
+                         random_scenarios(5, seed=1, orbits=(1, 2), payload_type=["SAR Radar"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import bisect
+import functools
+import math as m
+
+EARTH_RADIUS = 6371.0  # km
+DEFAULT_HORIZON = 30 * 24 * 60  # Minutes of eclipse windows precomputed (30 days)
+
+
+def eclipse_fraction(orbital_altitude, beta=0.0):
+    """
+    Fraction of a circular orbit spent in Earth's shadow with a cylindrical shadow model.
+
+    orbital_altitude(km): altitude over the surface of Earth
+    beta(deg): angle between the orbit plane and the direction of the Sun
+    """
+    r = EARTH_RADIUS + orbital_altitude
+    beta = m.radians(beta)
+    if abs(m.sin(beta)) >= EARTH_RADIUS / r:
+        return 0.0  # The orbit never enters the shadow
+    return m.acos(m.sqrt(orbital_altitude ** 2 + 2 * EARTH_RADIUS * orbital_altitude) / (r * m.cos(beta))) / m.pi
+
+
+class Eclipse_Index:
+    def __init__(self, orbital_altitude, orbital_period, horizon=DEFAULT_HORIZON, beta=0.0, fraction=None):
+        """
+        Sorted eclipse windows of an orbit for the first horizon minutes of the mission.
+        The orbit starts at the point closest to the Sun, so every eclipse is centered at half an orbit.
+
+        orbital_altitude(km), orbital_period(hours), horizon(min), beta(deg)
+        fraction: fraction of every orbit in shadow, instead of the one of eclipse_fraction
+        """
+        self.period = orbital_period * 60
+        self.horizon = horizon
+        self.fraction = eclipse_fraction(orbital_altitude, beta) if fraction is None else fraction
+        half = self.fraction * self.period / 2
+        self._first_start = self.period / 2 - half
+        self._duration = 2 * half
+
+        # Start and end of every window: in shadow when an odd number of transitions have passed
+        self.transitions = []
+        if self._duration > 0:
+            for k in range(int(horizon // self.period) + 1):
+                start = k * self.period + self._first_start
+                self.transitions.append(start)
+                self.transitions.append(start + self._duration)
+
+    def __len__(self):
+        """Number of eclipse windows precomputed"""
+        return len(self.transitions) // 2
+
+    def _periodic(self, t):
+        # Used after the horizon: same answer from the phase inside the orbit (t can be a NumPy array)
+        phase = (t % self.period) - self._first_start
+        return (phase >= 0) & (phase < self._duration)
+
+    def in_shadow(self, t):
+        """Whether the spacecraft is in Earth's shadow at minute t"""
+        if not self.transitions:
+            return False
+        if t > self.transitions[-1]:
+            return self._periodic(t)
+        return bisect.bisect_right(self.transitions, t) % 2 == 1
+
+    def in_shadow_many(self, times):
+        """in_shadow for many minutes at once, returns a NumPy array of booleans with the shape of times"""
+        import numpy as np
+        times = np.asarray(times, dtype=float)
+        if not self.transitions:
+            return np.zeros(times.shape, dtype=bool)
+        in_shadow = np.searchsorted(self.transitions, times, side="right") % 2 == 1
+        later = times > self.transitions[-1]
+        if later.any():
+            in_shadow[later] = self._periodic(times[later])
+        return in_shadow
+
+    def next_transition(self, t):
+        """Minute of the first eclipse entry or exit after t (None if the orbit has no eclipses)"""
+        if not self.transitions:
+            return None
+        i = bisect.bisect_right(self.transitions, t)
+        if i < len(self.transitions):
+            return self.transitions[i]
+        orbit_start = (t // self.period) * self.period
+        for candidate in (orbit_start + self._first_start, orbit_start + self._first_start + self._duration,
+                          orbit_start + self.period + self._first_start):
+            if candidate > t:
+                return candidate
+
+    def windows(self, start, end):
+        """Eclipse windows (entry, exit) that overlap the minutes start to end"""
+        i = bisect.bisect_right(self.transitions, start)
+        i -= i % 2
+        result = []
+        while i < len(self.transitions) and self.transitions[i] < end:
+            result.append((self.transitions[i], self.transitions[i + 1]))
+            i += 2
+        return result
+
+
+@functools.lru_cache(maxsize=256)
+def eclipse_index(orbital_altitude, orbital_period, horizon=DEFAULT_HORIZON, beta=0.0, fraction=None):
+    """Eclipse_Index shared by every spacecraft with the same orbit configuration"""
+    return Eclipse_Index(orbital_altitude, orbital_period, horizon, beta, fraction)
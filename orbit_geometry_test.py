@@ -0,0 +1,83 @@
+import math as m
+import unittest
+
+import numpy as np
+from Spacecraft import Spacecraft
+from orbit_geometry import EARTH_RADIUS, Eclipse_Index, eclipse_fraction, eclipse_index
+from telemetry_sinks import Null_Sink
+
+
+class Eclipse_Fraction_Test(unittest.TestCase):
+    def test_fraction(self):
+        self.assertAlmostEqual(eclipse_fraction(0), 0.5)
+        self.assertGreater(eclipse_fraction(400), eclipse_fraction(2000))
+        self.assertGreater(eclipse_fraction(400), eclipse_fraction(400, beta=40))
+        # Beyond the critical angle the orbit is always in sunlight
+        critical = m.degrees(m.asin(EARTH_RADIUS / (EARTH_RADIUS + 400)))
+        self.assertEqual(eclipse_fraction(400, beta=critical + 0.1), 0.0)
+
+
+class Eclipse_Index_Test(unittest.TestCase):
+    def setUp(self):
+        self.index = Eclipse_Index(500, 1.5, horizon=24 * 60)
+
+    def test_in_shadow_matches_the_orbit_phase(self):
+        times = np.linspace(0, 3 * self.index.horizon, 20001)
+        expected = [bool(self.index._periodic(t)) for t in times]
+        self.assertEqual([bool(self.index.in_shadow(t)) for t in times], expected)
+        self.assertEqual(self.index.in_shadow_many(times).tolist(), expected)
+        self.assertEqual(self.index.in_shadow_many(times.reshape(-1, 1)).shape, (len(times), 1))
+        self.assertAlmostEqual(np.mean(expected), self.index.fraction, places=2)
+
+    def test_next_transition(self):
+        for t in np.linspace(0, 2 * self.index.horizon, 997):
+            following = self.index.next_transition(t)
+            self.assertGreater(following, t)
+            self.assertLessEqual(following - t, self.index.period)
+            # Nothing changes before the transition, the state flips right at it
+            self.assertEqual(self.index.in_shadow((t + following) / 2), self.index.in_shadow(t))
+            self.assertNotEqual(self.index.in_shadow(following + 1e-6), self.index.in_shadow(following - 1e-6))
+            if following <= self.index.transitions[-1]:
+                self.assertNotEqual(self.index.in_shadow(following), self.index.in_shadow(t))
+
+    def test_windows(self):
+        windows = self.index.windows(100, 400)
+        self.assertTrue(windows)
+        for entry, exit in windows:
+            self.assertLess(entry, 400)
+            self.assertGreater(exit, 100)
+            self.assertTrue(self.index.in_shadow((entry + exit) / 2))
+
+    def test_orbit_without_eclipses(self):
+        index = Eclipse_Index(500, 1.5, beta=80)
+        self.assertEqual(len(index), 0)
+        self.assertFalse(index.in_shadow(10))
+        self.assertIsNone(index.next_transition(10))
+        self.assertFalse(index.in_shadow_many([0, 10, 1e7]).any())
+
+    def test_shared_index(self):
+        self.assertIs(eclipse_index(500, 1.5), eclipse_index(500, 1.5))
+
+
+class Solar_Charging_Test(unittest.TestCase):
+    def test_charging_waits_in_the_eclipse(self):
+        spacecraft = Spacecraft(1, "Eclipse", 500, 1.5, 400, "USA", telemetry_sink=Null_Sink())
+        power = spacecraft.power_subsystem
+        entry, exit = power.eclipse_index.windows(0, 90)[0]
+        spacecraft.clock.now = m.floor(entry) - 3
+        power.battery_level = 20.0
+        power.solar_charging = True
+        spacecraft.handle_eclipse(True, False)  # Panel malfunction reported by the operators
+        levels = {}
+        while spacecraft.clock.now < exit + 3:
+            spacecraft.clock.advance(1)
+            before = power.battery_level
+            power.update_power(1)
+            levels[spacecraft.clock.now] = power.battery_level - before
+        self.assertEqual({minute for minute, charged in levels.items() if not charged},
+                         {minute for minute in levels if entry <= minute < exit})
+        self.assertFalse(power.using_solar)  # The updates leave the flag of handle_eclipse alone
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,6 +5,10 @@ class Power_Subsystem (Subsystem):
         self.solar_charging = False
         self.consumption_rate = 0.5  # Consuption per minute
         self.charge_rate = 2.5      # Charge per minute
+        self.monitor = None  # Optional streaming anomaly detector that observes every power event
+        self.ledger = None  # Optional energy_ledger.Energy_Ledger of every change of the battery
+        self.eclipse_index = None  # Orbit geometry that tells when the solar panels are in sunlight
+        self.clock = None
 
     def switch_to_solar(self):
         self.using_solar = True
@@ -15,15 +19,74 @@ class Power_Subsystem (Subsystem):
     def is_charging(self):
         return self.using_solar
 
+    def get_state(self):
+        """Battery, charging flag and solar flag (-1 when it was never set) as floats"""
+        return [self.battery_level, float(self.solar_charging), float(getattr(self, "using_solar", -1))]
+
+    def set_state(self, state):
+        self.battery_level, solar_charging, using_solar = state
+        self.solar_charging = bool(solar_charging)
+        if using_solar >= 0:
+            self.using_solar = bool(using_solar)
+        elif "using_solar" in self.__dict__:
+            del self.using_solar
+
+    def connect(self, spacecraft):
+        self.attach_comms(spacecraft.comms_subsystem)
+        self.attach_eclipse_index(spacecraft.get_eclipse_index(), spacecraft.clock)
+
+    def report_fields(self):
+        return {"bat": f"{self.battery_level:.2f}", "chg": "1" if self.solar_charging else "0"}
+
+    def attach_eclipse_index(self, eclipse_index, clock):
+        """Uses precomputed eclipse windows to pause the solar charging while the spacecraft is in shadow"""
+        self.eclipse_index = eclipse_index
+        self.clock = clock
+
     def attach_comms(self, comms_subsystem):
         """Connects the communication subsystem"""
         self.comms_subsystem = comms_subsystem
 
+    def attach_monitor(self, monitor):
+        """Connects a streaming detector that receives every consumption and every time step"""
+        self.monitor = monitor
+
+    def attach_ledger(self, ledger):
+        """Records who consumes or charges the battery, and when, in an Energy_Ledger"""
+        self.ledger = ledger
+
+    def record_energy(self, consumer, delta, time=None):
+        """Adds a change of the battery (negative when consumed) to the ledger, at the current mission time
+        unless another time is given"""
+        if self.ledger is not None and delta:
+            if time is None:
+                time = self.clock.now if self.clock is not None else 0.0
+            self.ledger.append(time, consumer, delta)
+
+    def in_sunlight(self, t=None):
+        """Whether the solar panels can charge at minute t (now by default): always without an eclipse index"""
+        if self.eclipse_index is None:
+            return True
+        return not self.eclipse_index.in_shadow(self.clock.now if t is None else t)
+
+    def notify_monitor(self, dt, battery_before, charging):
+        """Tells the monitor that dt minutes have passed since the battery was at battery_before"""
+        if self.monitor is not None:
+            sunlight = self.in_sunlight() if self.eclipse_index is not None else getattr(self, "using_solar", True)
+            self.monitor.on_tick(dt, battery_before, self.battery_level, charging, sunlight)
+
     def update_power(self, dt):
         """Method to update the power over time, general consumption of the spacecraft"""
+        battery_before = self.battery_level
+        was_charging = self.solar_charging
     # Only consume if not charging
         if not self.solar_charging:
             consumption = self.consumption_rate * dt
+            consumed = min(consumption, self.battery_level)
+            if self.metrics is not None:
+                self.metrics.add("energy_consumed", consumed, "general")
+            if self.ledger is not None:
+                self.record_energy("general", -consumed)
             self.battery_level -= consumption
             self.battery_level = max(self.battery_level, 0)
             self.comms_subsystem.send_status(
@@ -33,18 +96,28 @@ class Power_Subsystem (Subsystem):
 
     #Activates solar charging when battery is less than 30%
         if self.battery_level < 30 and not self.solar_charging:
-            self.solar_charging = True
-            self.comms_subsystem.send_status(
-                "[Power] Low battery: Initializing solar charging",
-                skip_summary=True
-            )
+            self.start_solar_charging()
 
-    # Recharges the battery if solar charging is activated
-        if self.solar_charging:
+    # Recharges the battery if solar charging is activated, the charging waits while in Earth's shadow
+        if self.solar_charging and self.in_sunlight():
             self.recharge(dt)
 
+        if self.monitor is not None:
+            self.notify_monitor(dt, battery_before, was_charging or self.solar_charging)
+
+    def start_solar_charging(self):
+        """Starts a charge cycle because the battery went below 30%"""
+        self.solar_charging = True
+        if self.metrics is not None:
+            self.metrics.add("charge_cycles")
+        self.comms_subsystem.send_status(
+            "[Power] Low battery: Initializing solar charging",
+            skip_summary=True
+        )
+
     def recharge(self, dt):
         charge = self.charge_rate * dt
+        battery_before = self.battery_level
         self.battery_level += charge
         if self.battery_level >= 95:
             self.battery_level = 95
@@ -58,12 +131,21 @@ class Power_Subsystem (Subsystem):
                 f"[Power] Charging: +{charge:.2f}%, Battery Level: {self.battery_level:.2f}%",
                 skip_summary=True
             )
+        if self.ledger is not None:
+            self.record_energy("charging", self.battery_level - battery_before)
 
-    def consume_energy(self, amount, log=True):
-        """Method to update the power wherever an action is performed"""
+    def consume_energy(self, amount, log=True, consumer="other"):
+        """Method to update the power wherever an action is performed
+        consumer: subsystem that uses the energy (only used by the metrics)"""
         if self.battery_level > 0:
             consumed = min(self.battery_level, amount)
             self.battery_level -= consumed
+            if self.monitor is not None:
+                self.monitor.on_consume(consumed)
+            if self.metrics is not None:
+                self.metrics.add("energy_consumed", consumed, consumer)
+            if self.ledger is not None:
+                self.record_energy(consumer, -consumed)
             if log:
                 self.comms_subsystem.send_status(
                     f"[Power] Action Consumption: -{consumed:.2f}%, Battery Level: {self.battery_level:.2f}%",
@@ -71,11 +153,7 @@ class Power_Subsystem (Subsystem):
                 )
             # Check again if battery is low after the action
             if self.battery_level < 30 and not self.solar_charging:
-                self.solar_charging = True
-                self.comms_subsystem.send_status(
-                    "[Power] Low battery: Initializing solar charging",
-                    skip_summary=True
-                )
+                self.start_solar_charging()
             return True
         return False
 
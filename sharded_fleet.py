@@ -0,0 +1,230 @@
+import multiprocessing as mp
+import time
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+from fleet import (PAYLOAD_TYPES, consume_energy_arrays, update_operation_arrays, update_power_arrays)
+from Payload_Subsystem import PAYLOAD_CONSUMPTION
+
+# Columns of the fleet state, one row per spacecraft: name, dtype, shape of each row
+COLUMNS = (
+    ("battery", "f8", ()),
+    ("altitude", "f8", ()),
+    ("orientation", "f8", (3,)),
+    ("payload_runtime", "f8", ()),
+    ("solar_charging", "?", ()),
+    ("payload_type", "i1", ()),
+    ("payload_active", "?", ()),
+    ("in_earth_shadow", "?", ()),
+)
+
+# Commands written by the coordinator in the control row: command, dt, in_earth_shadow, ticks
+STOP, STEP, ACTIVATE, DEACTIVATE, SYNC = range(5)
+# Partial aggregates written by every shard after each command
+AGGREGATES = ("battery_sum", "battery_min", "charging", "payload_active", "payload_runtime")
+# Seconds between the checks that the workers are alive while the coordinator waits for them
+WORKER_POLL = 0.1
+
+
+def _layout(size, shards):
+    """Offset in the shared block of every column, the control row and the aggregates"""
+    columns = COLUMNS + (("control", "f8", (4,)), ("aggregates", "f8", (len(AGGREGATES),)))
+    layout = []
+    offset = 0
+    for name, dtype, shape in columns:
+        rows = shards if name == "aggregates" else 1 if name == "control" else size
+        layout.append((name, np.dtype(dtype), (rows,) + shape, offset))
+        offset += -(-rows * int(np.prod(shape, dtype=int)) * np.dtype(dtype).itemsize // 8) * 8
+    return layout, offset
+
+
+def _attach(buffer, size, shards):
+    """NumPy arrays over the shared block, nothing is copied"""
+    layout, _ = _layout(size, shards)
+    return {name: np.ndarray(shape, dtype, buffer, offset) for name, dtype, shape, offset in layout}
+
+
+def _serve_shard(arrays, start, stop, index, go, done, consumption_rate, charge_rate):
+    rows = slice(start, stop)
+    battery = arrays["battery"][rows]
+    solar_charging = arrays["solar_charging"][rows]
+    payload_type = arrays["payload_type"][rows]
+    active = arrays["payload_active"][rows]
+    runtime = arrays["payload_runtime"][rows]
+    in_earth_shadow = arrays["in_earth_shadow"][rows]
+    control = arrays["control"][0]
+    aggregates = arrays["aggregates"][index]
+    type_rates = np.array([PAYLOAD_CONSUMPTION[name] for name in PAYLOAD_TYPES])
+
+    while True:
+        go.acquire()  # The coordinator has written the command
+        command, dt, shadow, ticks = control
+        if command == STOP:
+            return
+        if command == STEP:
+            # One tick per command, same order as Fleet.step: payload operation followed by the power update
+            in_earth_shadow[:] = bool(shadow)
+            update_operation_arrays(battery, solar_charging, active, runtime, type_rates[payload_type], dt)
+            update_power_arrays(battery, solar_charging, dt, consumption_rate, charge_rate)
+        elif command == ACTIVATE:
+            active |= consume_energy_arrays(battery, solar_charging, 0.5, ~active)
+        elif command == DEACTIVATE:
+            active[:] = False
+            runtime[:] = 0.0
+            in_earth_shadow[:] = False
+        if command != STEP or ticks == 1:
+            aggregates[:] = (battery.sum(), battery.min() if len(battery) else np.inf, solar_charging.sum(),
+                             active.sum(), runtime.sum())
+        done.release()  # Results ready for the coordinator
+
+
+def _run_shard(name, size, shards, start, stop, index, go, done, consumption_rate, charge_rate):
+    """Worker process: advances rows start to stop of the shared arrays on every command"""
+    block = shared_memory.SharedMemory(name=name)
+    arrays = _attach(block.buf, size, shards)
+    try:
+        _serve_shard(arrays, start, stop, index, go, done, consumption_rate, charge_rate)
+    finally:
+        del arrays
+        block.close()
+
+
+def _release(block, workers):
+    """Stops the workers and frees the shared memory, from close() or when the fleet is collected"""
+    for worker in workers:
+        if worker.is_alive():
+            worker.terminate()
+        worker.join()
+    block.unlink()
+    try:
+        block.close()
+    except BufferError:
+        pass  # Some column is still referenced, the mapping goes away with it
+
+
+class Sharded_Fleet:
+    def __init__(self, size, shards=None, orbital_altitude=200, payload_type="SAR Radar", battery_level=100.0,
+                 timeout=60.0):
+        """
+        Fleet whose state lives in one multiprocessing.shared_memory block, split in shards of consecutive
+        rows that worker processes advance in parallel with the same batched rules as Fleet.
+        The coordinator and the workers share the arrays: nothing is pickled, and the columns (battery,
+        solar_charging, ...) and aggregates() are read without copying. Every command is synchronized with
+        semaphores, so each tick ends in every shard before the next one starts and results are deterministic.
+        Semaphores rather than multiprocessing barriers: a worker killed while waiting cannot leave them locked.
+
+        shards: number of worker processes (one per CPU by default)
+        timeout(s): longest wait for the workers per command (per tick in step), None to wait forever.
+        A command raises RuntimeError and the fleet is closed when a worker exits or the timeout passes.
+        Call close() at the end (or use it as a context manager), the shared memory is also released
+        when the fleet is garbage collected.
+        """
+        if payload_type not in PAYLOAD_CONSUMPTION:
+            raise ValueError(f"Unsupported payload type: {payload_type}")
+        self.size = size
+        self.shards = shards or min(mp.cpu_count(), max(size, 1))
+        self.timeout = timeout
+        self.consumption_rate = 0.5  # Consuption per minute
+        self.charge_rate = 2.5       # Charge per minute
+
+        self._go = [mp.Semaphore(0) for _ in range(self.shards)]
+        self._done = mp.Semaphore(0)
+        self._workers = []
+        _, nbytes = _layout(size, self.shards)
+        self._block = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+        self._finalizer = weakref.finalize(self, _release, self._block, self._workers)
+        self._arrays = _attach(self._block.buf, size, self.shards)
+        for name, _, _ in COLUMNS:
+            setattr(self, name, self._arrays[name])
+        self.battery[:] = battery_level
+        self.solar_charging[:] = False
+        self.altitude[:] = orbital_altitude
+        self.orientation[:] = 0.0
+        self.payload_type[:] = PAYLOAD_TYPES.index(payload_type)
+        self.payload_active[:] = False
+        self.payload_runtime[:] = 0.0
+        self.in_earth_shadow[:] = False
+
+        bounds = np.linspace(0, size, self.shards + 1).astype(int)
+        for k in range(self.shards):
+            worker = mp.Process(target=_run_shard, daemon=True,
+                                args=(self._block.name, size, self.shards, int(bounds[k]), int(bounds[k + 1]), k,
+                                      self._go[k], self._done, self.consumption_rate, self.charge_rate))
+            worker.start()
+            self._workers.append(worker)
+        self.sync()
+
+    def __len__(self):
+        return self.size
+
+    def _wait_workers(self):
+        """Waits until every shard has run the command, checking that the workers are still alive"""
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        for _ in self._workers:
+            while not self._done.acquire(timeout=WORKER_POLL):
+                failed = [f"shard {k} exited with code {worker.exitcode}"
+                          for k, worker in enumerate(self._workers) if not worker.is_alive()]
+                if failed or (deadline is not None and time.monotonic() > deadline):
+                    self._detach()
+                    raise RuntimeError("Sharded fleet stopped: " +
+                                       (", ".join(failed) or f"no answer from the workers in {self.timeout} s"))
+
+    def _command(self, command, dt=0.0, in_earth_shadow=False, ticks=1):
+        if self._arrays is None:
+            raise ValueError("The fleet is closed")
+        for remaining in range(max(int(ticks), 1), 0, -1):
+            # The shards compute the aggregates on the last tick only
+            self._arrays["control"][0] = (command, dt, float(in_earth_shadow), remaining)
+            for go in self._go:
+                go.release()
+            self._wait_workers()
+
+    def step(self, dt, in_earth_shadow=False, ticks=1):
+        """Advances every shard ticks times dt minutes: payload operation followed by the power update"""
+        self._command(STEP, dt, in_earth_shadow, ticks)
+
+    def activate_payload(self):
+        """Activates every payload that has enough power"""
+        self._command(ACTIVATE)
+
+    def deactivate_payload(self):
+        self._command(DEACTIVATE)
+
+    def sync(self):
+        """Recomputes the aggregates, e.g. after changing the columns from the coordinator"""
+        self._command(SYNC)
+
+    def aggregates(self):
+        """Fleet metrics combined from the partial results of the shards after the last command"""
+        partial = self._arrays["aggregates"]
+        return {
+            "mean_battery": float(partial[:, 0].sum() / self.size) if self.size else 0.0,
+            "min_battery": float(partial[:, 1].min()),
+            "charging": int(partial[:, 2].sum()),
+            "payload_active": int(partial[:, 3].sum()),
+            "payload_runtime": float(partial[:, 4].sum()),
+        }
+
+    def _detach(self):
+        for name, _, _ in COLUMNS:
+            delattr(self, name)
+        self._arrays = None
+        self._finalizer()
+
+    def close(self):
+        """Stops the workers and releases the shared memory"""
+        if self._arrays is None:
+            return
+        self._arrays["control"][0] = (STOP, 0.0, 0.0, 0)
+        for go in self._go:
+            go.release()
+        for worker in self._workers:
+            worker.join(self.timeout)  # _release terminates the workers that did not stop
+        self._detach()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,83 @@
+import gc
+import os
+import signal
+import threading
+import time
+import unittest
+
+import numpy as np
+from fleet import Fleet
+from sharded_fleet import Sharded_Fleet
+
+COLUMNS = ("battery", "solar_charging", "payload_active", "payload_runtime", "in_earth_shadow")
+
+
+def shared_segments():
+    return set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+
+
+class Sharded_Fleet_Test(unittest.TestCase):
+    def setUp(self):
+        before = shared_segments()
+        self.addCleanup(lambda: self.assertEqual(shared_segments() - before, set()))
+
+    def test_matches_fleet(self):
+        battery_level = np.random.default_rng(0).uniform(10, 100, 10_001)
+        fleet = Fleet(len(battery_level), battery_level=battery_level)
+        with Sharded_Fleet(len(battery_level), shards=3, battery_level=battery_level) as sharded:
+            for f in (fleet, sharded):
+                f.activate_payload()
+            for k in range(5):
+                fleet.step(1.0, k % 2 == 0)
+                sharded.step(1.0, k % 2 == 0)
+            for _ in range(20):
+                fleet.step(2.0)
+            sharded.step(2.0, ticks=20)
+            for f in (fleet, sharded):
+                f.deactivate_payload()
+                f.step(1.0)
+            for column in COLUMNS:
+                self.assertTrue(np.array_equal(getattr(fleet, column), getattr(sharded, column)), column)
+            aggregates = sharded.aggregates()
+        self.assertAlmostEqual(aggregates["mean_battery"], fleet.battery.mean())
+        self.assertEqual(aggregates["min_battery"], fleet.battery.min())
+        self.assertEqual(aggregates["charging"], fleet.solar_charging.sum())
+
+    def test_dead_worker_raises(self):
+        sharded = Sharded_Fleet(1000, shards=3)
+        sharded.step(1.0, ticks=3)
+        os.kill(sharded._workers[1].pid, signal.SIGKILL)
+        sharded._workers[1].join()
+        with self.assertRaisesRegex(RuntimeError, "shard 1"):
+            sharded.step(1.0)
+        with self.assertRaises(ValueError):
+            sharded.step(1.0)
+        sharded.close()
+
+    def test_worker_killed_during_step(self):
+        sharded = Sharded_Fleet(100_000, shards=2)
+        killer = threading.Timer(0.2, os.kill, (sharded._workers[0].pid, signal.SIGKILL))
+        killer.start()
+        self.addCleanup(killer.cancel)
+        start = time.perf_counter()
+        with self.assertRaises(RuntimeError):
+            while time.perf_counter() - start < 30:
+                sharded.step(1.0, ticks=1000)
+
+    def test_close(self):
+        sharded = Sharded_Fleet(1000, shards=2)
+        battery = sharded.battery  # A view that outlives the fleet
+        sharded.close()
+        sharded.close()
+        self.assertEqual(battery.shape, (1000,))
+        self.assertFalse(any(worker.is_alive() for worker in sharded._workers))
+
+    def test_released_when_collected(self):
+        sharded = Sharded_Fleet(1000, shards=2)
+        sharded.step(1.0)
+        del sharded
+        gc.collect()
+
+
+if __name__ == "__main__":
+    unittest.main()
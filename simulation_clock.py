@@ -0,0 +1,228 @@
+import functools
+import itertools
+import math
+import operator
+from fractions import Fraction
+
+
+def drain_levels(level, rate, minutes):
+    """
+    Battery after each of minutes calls to consume_energy(rate): the same repeated subtraction as the
+    per-minute loop (level - rate * k rounds differently), stopping at 0. Only for callers that need
+    every minute (Spacecraft.iter_orbit), the clock itself uses level_after.
+    """
+    levels = list(itertools.accumulate(itertools.repeat(rate, minutes), operator.sub, initial=level))[1:]
+    if levels and levels[-1] <= 0:
+        empty = next(k for k, value in enumerate(levels) if value <= 0)
+        levels[empty:] = [0.0] * (minutes - empty)
+    return levels
+
+
+def level_after(level, rate, minutes, threshold=None):
+    """
+    (minutes, level) after adding rate (negative to drain) every minute during minutes, with the same
+    rounding as the per-minute loop, and stopping at 0 when draining. With a threshold it stops at the
+    first minute below it (draining) or at or above it (charging).
+
+    Inside a binade [2**(e-1), 2**e) every addition rounds rate to the same multiple of the ulp, so the
+    levels are an exact arithmetic progression: the minutes to the threshold or to the end of the binade
+    are found in closed form and only the minute that changes binade is added as it is.
+    """
+    done = 0
+    while done < minutes:
+        if level <= 0 and rate < 0 and (threshold is None or threshold <= 0):
+            return minutes, level  # Empty, nothing more to drain
+        exponent = math.frexp(level)[1]
+        ulp = math.ldexp(1.0, exponent - 53)
+        units = Fraction(rate) / Fraction(ulp)
+        delta = round(units) * ulp
+        if level > 0 and delta and units.denominator != 2:  # Ties round to even, they depend on the level
+            position = Fraction(level)
+            if rate > 0:
+                inside = math.ceil((math.ldexp(1.0, exponent) - position - Fraction(rate)) / Fraction(delta))
+            else:
+                inside = math.floor((position + Fraction(rate) - math.ldexp(0.5, exponent)) / Fraction(-delta)) + 1
+            inside = min(max(inside, 0), minutes - done)
+            if threshold is not None:
+                crossing = (Fraction(threshold) - position) / Fraction(delta)
+                crossing = max(math.ceil(crossing) if rate > 0 else math.floor(crossing) + 1, 1)
+                if crossing <= inside:
+                    return done + crossing, level + crossing * delta
+            level += inside * delta
+            done += inside
+            if done == minutes:
+                break
+        level += rate
+        if level <= 0:
+            level = 0.0
+        done += 1
+        if threshold is not None and (level >= threshold if rate > 0 else level < threshold):
+            break
+    return done, level
+
+
+def _digits(first, last):
+    """Total number of digits of the minutes first to last"""
+    total = 0
+    digits = len(str(first))
+    while first <= last:
+        end = min(last, 10 ** digits - 1)
+        total += (end - first + 1) * digits
+        first, digits = end + 1, digits + 1
+    return total
+
+
+def _printed_levels(level, rate, minutes):
+    """Total length of f"{level:.2f}" for the levels of the next minutes charging rate per minute"""
+    total = 0
+    while minutes > 0:
+        width = len(f"{level + rate:.2f}")
+        # Below this bound every level keeps the width, the level that reaches it is checked as it prints
+        wider = math.nextafter(10.0 ** (width - 3) - 0.005, 0.0)
+        steps, level = level_after(level, rate, minutes, wider)
+        if level < wider:
+            return total + steps * width
+        total += (steps - 1) * width + len(f"{level:.2f}")
+        minutes -= steps
+    return total
+
+
+def sunlight_span(eclipse_index, now, limit):
+    """
+    (sunlight, minutes): whether minute now + 1 is in sunlight (always without an eclipse index) and for how
+    many of the next limit minutes it stays so
+    """
+    if eclipse_index is None:
+        return True, limit
+    change = eclipse_index.next_transition(now + 1)
+    span = limit if change is None else min(max(math.ceil(change - now) - 1, 1), limit)
+    # The minutes before the change share the state of the first one, fixed up if now + span rounds across it
+    while change is not None and span > 1 and now + span >= change:
+        span -= 1
+    while change is not None and span < limit and now + span + 1 < change:
+        span += 1
+    return not eclipse_index.in_shadow(now + 1), span
+
+
+@functools.lru_cache(maxsize=4096)
+def charging_minutes(level, solar_charging, charge_rate=2.5, consumption_rate=0.5, max_minutes=1000,
+                     eclipse_index=None, start=0.0):
+    """
+    Minutes that Simulation_Clock.run_charging_cycle would take from this battery level, starting at minute
+    start, without running it. The charging waits in the eclipse windows of eclipse_index.
+    Cached, planners ask for the same levels many times.
+    """
+    if level >= 95:
+        return 0
+    minutes = 0
+    if not solar_charging:
+        # Same minutes as update_power(1): consumption until the low battery trigger, which charges at once
+        minutes, level = level_after(level, -consumption_rate, max_minutes, 30)
+        if level >= 30:
+            return minutes
+        if eclipse_index is None or not eclipse_index.in_shadow(start + minutes):
+            level += charge_rate
+    while level < 95 and minutes < max_minutes:
+        sunlight, steps = sunlight_span(eclipse_index, start + minutes, max_minutes - minutes)
+        if sunlight:
+            steps, level = level_after(level, charge_rate, steps, 95)
+        minutes += steps
+    return minutes
+
+
+class Simulation_Clock:
+    def __init__(self, report_interval=60):
+        """
+        Mission clock that jumps from one event to the next instead of stepping every minute.
+        Between events no message is transmitted, so the battery level at the next event is found with
+        level_after (the same rounding as the per-minute loop, so the reported values match it exactly).
+
+        report_interval(min): minutes between the orbit reports
+        """
+        self.now = 0.0  # Minutes since the start of the mission
+        self.report_interval = report_interval
+
+    def advance(self, dt):
+        """Moves the clock dt minutes forward"""
+        self.now += dt
+
+    def run_orbit(self, power_system, comm_system, total_minutes, rate=0.2, reports=True):
+        """
+        Drains rate% per minute during total_minutes, the same as calling consume_energy(rate, log=False)
+        every minute. Only the events are simulated: the 30% low battery trigger, the reports
+        every report_interval minutes (when reports is True) and the end of the orbit. The ledger gets
+        one entry per interval between events, at its start.
+        """
+        minute = 0
+        while minute < total_minutes:
+            next_event = min((minute // self.report_interval + 1) * self.report_interval, total_minutes)
+            level = power_system.battery_level
+            steps = next_event - minute
+
+            low_battery = False
+            if level > 0:
+                threshold = None if power_system.solar_charging else 30
+                steps, power_system.battery_level = level_after(level, -rate, steps, threshold)
+                low_battery = threshold is not None and power_system.battery_level < threshold
+                if power_system.metrics is not None:
+                    power_system.metrics.add("energy_consumed", level - power_system.battery_level, "orbit")
+                power_system.record_energy("orbit", power_system.battery_level - level, self.now)
+            minute += steps
+            self.now += steps
+            power_system.notify_monitor(steps, level, False)
+
+            if low_battery:
+                power_system.start_solar_charging()
+            if reports and (minute % self.report_interval == 0 or minute == total_minutes):
+                comm_system.send_status(
+                    f"[Orbit] Minute {minute}: Remaining battery: {power_system.get_battery_level():.2f}%",
+                    skip_summary=True
+                )
+
+    def run_charging_cycle(self, power_system, comm_system, max_minutes=1000):
+        """
+        Charges the battery until 95% or until max_minutes, the same as calling update_power(1) every minute
+        (the charging waits in the eclipse windows of the power subsystem). The per-minute messages are not
+        transmitted, but they are counted and their characters recorded so the next summary costs the same
+        energy. The ledger gets one entry for each charge between eclipses, at its first minute.
+        Returns the minutes that the cycle took.
+        """
+        minutes = 0
+        while power_system.battery_level < 95 and minutes < max_minutes:
+            if not power_system.solar_charging:
+                # The minute that starts the charging is simulated as it is
+                comm_system.record_chars(len(f"[Time] → Minute {minutes + 1}"))
+                minutes += 1
+                self.now += 1
+                power_system.update_power(1)
+                continue
+
+            level = power_system.battery_level
+            sunlight, steps = sunlight_span(power_system.eclipse_index, self.now, max_minutes - minutes)
+            if not sunlight:
+                # Only the "[Time]" message of every minute in shadow, the battery does not change
+                comm_system.record_chars(steps * len("[Time] → Minute ") + _digits(minutes + 1, minutes + steps),
+                                         steps)
+                minutes += steps
+                self.now += steps
+                power_system.notify_monitor(steps, level, True)
+                continue
+
+            charge = power_system.charge_rate
+            steps, battery = level_after(level, charge, steps, 95)
+            full = battery >= 95
+            # One "[Time]" message per minute and one "Charging" message per minute but the last if it is full
+            charged = steps - 1 if full else steps
+            chars = steps * len("[Time] → Minute ") + _digits(minutes + 1, minutes + steps) + \
+                charged * len(f"[Power] Charging: +{charge:.2f}%, Battery Level: %") + \
+                _printed_levels(level, charge, charged)
+            comm_system.record_chars(chars, steps + charged)
+
+            power_system.battery_level = min(battery, 95)
+            power_system.record_energy("charging", power_system.battery_level - level, self.now + 1)
+            minutes += steps
+            self.now += steps
+            if full:
+                power_system.recharge(0)  # Caps the battery at 95% and stops the charging
+            power_system.notify_monitor(steps, level, True)
+        return minutes
@@ -0,0 +1,143 @@
+import math as m
+import random
+import unittest
+
+from Spacecraft import Spacecraft
+from simulation_clock import charging_minutes, level_after
+from telemetry_sinks import Ring_Buffer_Sink
+
+FOLDED = ("[Time] → Minute", "[Power] Charging: +")
+
+
+def make_spacecraft(orbital_period=2, battery_level=100.0, solar_charging=False):
+    spacecraft = Spacecraft(1332, "LEO", 200, orbital_period, 400, "USA", telemetry_sink=Ring_Buffer_Sink(100000))
+    spacecraft.power_subsystem.battery_level = battery_level
+    spacecraft.power_subsystem.solar_charging = solar_charging
+    return spacecraft
+
+
+def per_minute_orbit(spacecraft):
+    """The minute by minute loop that Simulation_Clock.run_orbit replaces"""
+    power, comms = spacecraft.power_subsystem, spacecraft.comms_subsystem
+    total_minutes = int(spacecraft.orbital_period * 60)
+    comms.send_status(f"[Orbit] Starting orbit simulation for {total_minutes} minutes.")
+    for minute in range(1, total_minutes + 1):
+        power.consume_energy(0.2, log=False, consumer="orbit")
+        if minute % 60 == 0 or minute == total_minutes:
+            comms.send_status(f"[Orbit] Minute {minute}: Remaining battery: {power.get_battery_level():.2f}%",
+                              skip_summary=True)
+    comms.send_status("[Orbit] Orbit simulation completed.")
+
+
+def per_minute_charging(spacecraft, max_minutes=1000):
+    """The minute by minute loop that Simulation_Clock.run_charging_cycle replaces, returns its minutes"""
+    power, comms = spacecraft.power_subsystem, spacecraft.comms_subsystem
+    minute = 1
+    while power.battery_level < 95 and minute <= max_minutes:
+        comms.send_status(f"[Time] → Minute {minute}", skip_summary=True)
+        spacecraft.clock.advance(1)
+        power.update_power(1)
+        minute += 1
+    return minute - 1
+
+
+def state(spacecraft):
+    """Everything the folded minutes change: the folded messages share sent_chars entries, so only their
+    sum and the entries that can trigger the next summary are compared"""
+    power, comms = spacecraft.power_subsystem, spacecraft.comms_subsystem
+    return (power.battery_level, power.solar_charging, comms.pending_chars, sum(comms.sent_chars),
+            min(len(comms.sent_chars), comms._messages_before_summary), comms.total_chars, comms.messages_sent)
+
+
+def per_minute_level(level, rate, minutes, threshold=None):
+    """The loop that level_after replaces"""
+    for minute in range(1, minutes + 1):
+        level = max(level + rate, 0.0)
+        if threshold is not None and (level >= threshold if rate > 0 else level < threshold):
+            return minute, level
+    return minutes, level
+
+
+def transmitted(spacecraft):
+    return [line for line in spacecraft.telemetry_sink.messages() if not any(tag in line for tag in FOLDED)]
+
+
+class Level_After_Test(unittest.TestCase):
+    def test_matches_per_minute_loop(self):
+        rng = random.Random(5)
+        cases = [(100.0, -0.2, 600, 30), (100.0, -0.2, 600, None), (0.3, -0.2, 5, None), (0.0, 2.5, 50, 95),
+                 (94.99, 2.5, 3, 95), (1e-9, 2.5, 40, 95), (0.7, -0.5, 3, 30)]
+        cases += [(rng.uniform(0, 100), rng.choice((-0.2, -0.5, -0.1, 2.5, 0.3)), rng.randrange(1, 2000),
+                   rng.choice((None, 9.995, 30, 95))) for _ in range(300)]
+        for level, rate, minutes, threshold in cases:
+            with self.subTest(level=level, rate=rate, minutes=minutes, threshold=threshold):
+                self.assertEqual(level_after(level, rate, minutes, threshold),
+                                 per_minute_level(level, rate, minutes, threshold))
+
+    def test_charging_minutes(self):
+        for battery_level in (0.0, 0.3, 12.345, 29.99, 30.0, 47.5, 94.99, 95.0):
+            for solar_charging in (False, True):
+                for max_minutes in (1000, 7, 1):
+                    with self.subTest(battery_level=battery_level, solar_charging=solar_charging,
+                                      max_minutes=max_minutes):
+                        reference = make_spacecraft(battery_level=battery_level, solar_charging=solar_charging)
+                        minutes = charging_minutes(battery_level, solar_charging, max_minutes=max_minutes,
+                                                   eclipse_index=reference.power_subsystem.eclipse_index)
+                        self.assertEqual(minutes, per_minute_charging(reference, max_minutes))
+
+
+class Orbit_Test(unittest.TestCase):
+    def test_matches_per_minute_loop(self):
+        for orbital_period in (1.5, 2, 7.25, 30):
+            for battery_level, solar_charging in ((100.0, False), (75.57, False), (31.3, False),
+                                                  (12.0, True), (0.1, True)):
+                with self.subTest(orbital_period=orbital_period, battery_level=battery_level):
+                    simulated = make_spacecraft(orbital_period, battery_level, solar_charging)
+                    reference = make_spacecraft(orbital_period, battery_level, solar_charging)
+                    simulated.simulate_orbit()
+                    per_minute_orbit(reference)
+                    self.assertEqual(simulated.telemetry_sink.messages(), reference.telemetry_sink.messages())
+                    self.assertEqual(state(simulated), state(reference))
+                    self.assertEqual(simulated.clock.now, int(orbital_period * 60))
+
+    def test_ledger_matches_per_minute_loop(self):
+        simulated = make_spacecraft(30, 80.0)
+        reference = make_spacecraft(30, 80.0)
+        simulated_ledger = simulated.enable_energy_ledger()
+        reference_ledger = reference.enable_energy_ledger()
+        simulated.simulate_orbit()
+        per_minute_orbit(reference)
+        self.assertAlmostEqual(simulated_ledger.energy("orbit"), reference_ledger.energy("orbit"))
+        self.assertLess(len(simulated_ledger), 60)  # One entry per interval between events, not per minute
+
+
+class Charging_Cycle_Test(unittest.TestCase):
+    def test_matches_per_minute_loop(self):
+        for battery_level in (0.0, 0.3, 7.49, 7.495, 12.345, 29.99, 30.0, 47.5, 94.99):
+            for solar_charging in (False, True):
+                for max_minutes in (1000, 7, 2):
+                    with self.subTest(battery_level=battery_level, solar_charging=solar_charging,
+                                      max_minutes=max_minutes):
+                        simulated = make_spacecraft(battery_level=battery_level, solar_charging=solar_charging)
+                        reference = make_spacecraft(battery_level=battery_level, solar_charging=solar_charging)
+                        minutes = simulated.clock.run_charging_cycle(
+                            simulated.power_subsystem, simulated.comms_subsystem, max_minutes)
+                        self.assertEqual(minutes, per_minute_charging(reference, max_minutes))
+                        self.assertEqual(transmitted(simulated), transmitted(reference))
+                        self.assertEqual(state(simulated), state(reference))
+
+    def test_waits_in_the_eclipse(self):
+        simulated = make_spacecraft(battery_level=20.0, solar_charging=True)
+        reference = make_spacecraft(battery_level=20.0, solar_charging=True)
+        entry, exit = simulated.power_subsystem.eclipse_index.windows(0, 120)[0]
+        for spacecraft in (simulated, reference):
+            spacecraft.clock.now = entry - 10.5
+        minutes = simulated.clock.run_charging_cycle(simulated.power_subsystem, simulated.comms_subsystem)
+        self.assertEqual(minutes, per_minute_charging(reference))
+        self.assertEqual(minutes, 30 + m.ceil(exit - entry))  # 30 minutes of sunlight to charge 75%
+        self.assertEqual(state(simulated), state(reference))
+        self.assertEqual(simulated.clock.now, reference.clock.now)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from Spacecraft import Spacecraft
+from telemetry_sinks import Ring_Buffer_Sink
+
+
+def make_spacecraft():
+    return Spacecraft(25544, "ISS", 420, 1.5, 420000, "International", telemetry_sink=Ring_Buffer_Sink(10000))
+
+
+def mission(spacecraft):
+    spacecraft.activate_payload("Cloud Seeding Device")
+    spacecraft.change_altitude(900)
+    spacecraft.change_orientation(10, 20, 30)
+    spacecraft.update_payload_operation(15)
+    spacecraft.simulate_orbit()
+    spacecraft.send_message("working")
+    spacecraft.report_status()
+
+
+class Snapshot_Test(unittest.TestCase):
+    def test_round_trip(self):
+        spacecraft = make_spacecraft()
+        spacecraft.activate_payload("SAR Radar")
+        spacecraft.change_orientation(5, 5, 5)
+        snapshot = spacecraft.snapshot()
+
+        restored = make_spacecraft()
+        restored.restore(snapshot)
+        self.assertEqual(restored.snapshot(), snapshot)
+
+    def test_branch_and_restore(self):
+        spacecraft = make_spacecraft()
+        spacecraft.activate_payload("SAR Radar")
+        snapshot = spacecraft.snapshot()
+        comms = spacecraft.comms_subsystem
+        before = (comms.messages_sent, comms.total_chars, list(comms.sent_chars))
+
+        for _ in range(3):
+            mission(spacecraft)  # A branch that is thrown away
+            spacecraft.restore(snapshot)
+            self.assertEqual((comms.messages_sent, comms.total_chars, list(comms.sent_chars)), before)
+            self.assertEqual(spacecraft.snapshot(), snapshot)
+
+    def test_restored_mission_matches(self):
+        original = make_spacecraft()
+        original.activate_payload("SAR Radar")
+        snapshot = original.snapshot()
+        mission(original)
+
+        branch = make_spacecraft()
+        branch.restore(snapshot)
+        mission(branch)
+        self.assertEqual(branch.snapshot(), original.snapshot())
+        self.assertEqual(branch.telemetry_sink.messages()[-20:], original.telemetry_sink.messages()[-20:])
+
+
+if __name__ == "__main__":
+    unittest.main()
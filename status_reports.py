@@ -0,0 +1,56 @@
+REPORT_TAG = "[Report]"
+
+
+class Delta_Report_Encoder:
+    def __init__(self, keyframe_every=10):
+        """
+        Builds compact incremental status reports: a keyframe with every field every keyframe_every reports,
+        and in between only the fields whose encoded value changed since the last report, e.g.
+        "[Report] K1 id=25544 bat=84.50 chg=0 alt=500 ..." then "[Report] D2 bat=83.90"
+        """
+        self.keyframe_every = keyframe_every
+        self.count = 0
+        self._last = {}
+
+    def encode(self, fields):
+        """fields: name -> encoded value (str). Returns the report and the fields that it contains"""
+        keyframe = self.count % self.keyframe_every == 0
+        self.count += 1
+        if keyframe:
+            changed = fields
+        else:
+            last = self._last
+            changed = {name: value for name, value in fields.items() if last.get(name) != value}
+        self._last = fields
+        header = f"{REPORT_TAG} {'K' if keyframe else 'D'}{self.count}"
+        if not changed:
+            return header, changed
+        return header + " " + " ".join(f"{name}={value}" for name, value in changed.items()), changed
+
+    def reset(self):
+        """The next report is a keyframe"""
+        self.count = 0
+        self._last = {}
+
+
+class Delta_Report_Decoder:
+    def __init__(self):
+        """Rebuilds the full state on the ground from a stream of reports (missed deltas wait for a keyframe)"""
+        self.state = {}
+        self.count = 0
+        self.synchronized = False
+
+    def decode(self, report):
+        """Applies one report and returns the current state, None until the first keyframe"""
+        header, *pairs = report[len(REPORT_TAG):].split()
+        kind, count = header[0], int(header[1:])
+        if kind == "K":
+            self.state = {}
+            self.synchronized = True
+        elif count != self.count + 1:
+            self.synchronized = False  # A delta was lost
+        self.count = count
+        for pair in pairs:
+            name, _, value = pair.partition("=")
+            self.state[name] = value
+        return self.state if self.synchronized else None
@@ -0,0 +1,67 @@
+import unittest
+
+from Spacecraft import Spacecraft
+from status_reports import REPORT_TAG, Delta_Report_Decoder, Delta_Report_Encoder
+from telemetry_sinks import Ring_Buffer_Sink
+
+
+def states(count):
+    for k in range(count):
+        yield {"id": "7", "bat": f"{90 - k // 3:.2f}", "chg": str(k // 5 % 2), "alt": "500" if k < 12 else "650"}
+
+
+class Delta_Report_Test(unittest.TestCase):
+    def test_decoder_rebuilds_every_state(self):
+        encoder = Delta_Report_Encoder(keyframe_every=4)
+        decoder = Delta_Report_Decoder()
+        for k, fields in enumerate(states(20)):
+            report, changed = encoder.encode(fields)
+            self.assertTrue(report.startswith(f"{REPORT_TAG} {'K' if k % 4 == 0 else 'D'}{k + 1}"))
+            self.assertEqual(changed, fields if k % 4 == 0 else
+                             {name: value for name, value in fields.items() if previous[name] != value})
+            self.assertEqual(decoder.decode(report), fields)
+            previous = fields
+
+    def test_lost_delta_waits_for_a_keyframe(self):
+        encoder = Delta_Report_Encoder(keyframe_every=5)
+        decoder = Delta_Report_Decoder()
+        for k, fields in enumerate(states(12)):
+            report, _ = encoder.encode(fields)
+            if k == 6:
+                continue  # Lost on the way down
+            state = decoder.decode(report)
+            if 6 < k < 10:
+                self.assertIsNone(state)
+            else:
+                self.assertEqual(state, fields)
+
+    def test_unchanged_state_sends_only_the_header(self):
+        encoder = Delta_Report_Encoder()
+        fields = next(states(1))
+        encoder.encode(fields)
+        self.assertEqual(encoder.encode(dict(fields)), (f"{REPORT_TAG} D2", {}))
+        encoder.reset()
+        self.assertEqual(encoder.encode(fields)[1], fields)
+
+
+class Spacecraft_Delta_Reports_Test(unittest.TestCase):
+    def test_ground_state_matches_the_spacecraft(self):
+        sink = Ring_Buffer_Sink(100000)
+        spacecraft = Spacecraft(9, "Delta", 500, 1.5, 400, "USA", telemetry_sink=sink)
+        spacecraft.enable_delta_reports(keyframe_every=3)
+        decoder = Delta_Report_Decoder()
+        for k in range(8):
+            if k == 2:
+                spacecraft.activate_payload("SAR Radar")
+            spacecraft.update_payload_operation(5, in_earth_shadow=False)
+            spacecraft.change_altitude(500 + 50 * (k % 3))
+            fields = {"id": "9"}  # Read before the report, sending it costs energy
+            for subsystem in (spacecraft.power_subsystem, spacecraft.altitude_control, spacecraft.payload_subsystem):
+                fields.update(subsystem.report_fields())
+            spacecraft.report_status()
+            report = [line for line in sink.messages() if REPORT_TAG in line][-1]
+            self.assertEqual(decoder.decode(report.partition(": ")[2]), fields)
+        self.assertEqual(decoder.count, 8)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,213 @@
+import math as m
+import numpy as np
+
+# Metrics followed by the detectors (all of them per minute)
+METRICS = ("drain_rate", "charge_rate", "message_rate", "payload_rate")
+MIN_STD = 0.1  # Avoids huge z-scores after a long run of identical samples
+
+
+def ewma_update(mean, var, x, alpha):
+    """One O(1) update of an exponentially weighted mean and variance, works with numbers and arrays"""
+    diff = x - mean
+    increment = alpha * diff
+    return mean + increment, (1 - alpha) * (var + diff * increment)
+
+
+class Rolling_Stats:
+    def __init__(self, window=30):
+        """Rolling mean and variance of a metric over roughly the last window samples, without storing them"""
+        self.alpha = 2.0 / (window + 1)
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+        self.last = 0.0
+
+    def update(self, x):
+        self.last = x
+        if self.count == 0:
+            self.mean = x
+        else:
+            self.mean, self.var = ewma_update(self.mean, self.var, x, self.alpha)
+        self.count += 1
+
+    def zscore(self, x):
+        """How many standard deviations x is above the current mean (the deviation has a floor of MIN_STD)"""
+        return (x - self.mean) / max(m.sqrt(self.var), MIN_STD)
+
+
+class Anomaly_Rule:
+    def __init__(self, name, metric, threshold, mode="above", when=None, warmup=10):
+        """
+        Rule evaluated after every time step.
+
+        metric: one of METRICS
+        mode: "above" or "below" compares the rolling mean with threshold,
+              "zscore" fails when the last sample is more than threshold standard deviations above the mean
+        when: None (always), "charging", "discharging" or "sunlight_charging"
+        warmup: samples needed before the rule is evaluated
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        if mode not in ("above", "below", "zscore"):
+            raise ValueError(f"Unknown mode: {mode}")
+        self.name = name
+        self.metric = metric
+        self.threshold = threshold
+        self.mode = mode
+        self.when = when
+        self.warmup = warmup
+
+
+DEFAULT_RULES = (
+    Anomaly_Rule("abnormal_drain", "drain_rate", 6.0, "zscore", when="discharging"),
+    Anomaly_Rule("excessive_drain", "drain_rate", 5.0, "above"),
+    Anomaly_Rule("stalled_charging", "charge_rate", 0.5, "below", when="sunlight_charging", warmup=1),
+    Anomaly_Rule("runaway_messages", "message_rate", 1000.0, "above"),
+)
+
+
+def _condition(when, charging, sunlight):
+    if when == "charging":
+        return charging
+    if when == "discharging":
+        return ~charging if isinstance(charging, np.ndarray) else not charging
+    if when == "sunlight_charging":
+        return charging & sunlight
+    return True
+
+
+class Streaming_Anomaly_Detector:
+    def __init__(self, rules=DEFAULT_RULES, window=30, on_alert=None):
+        """
+        Consumes the power, payload and comms events of one spacecraft as they happen
+        (see AnomalyDetectionSubsystem.attach_stream) and raises an alert when a rule starts to fail.
+
+        on_alert: function called with (rule, value) when an alert is raised
+        """
+        self.rules = list(rules)
+        self.on_alert = on_alert
+        self.stats = {metric: Rolling_Stats(window) for metric in METRICS}
+        self.alert_counts = {rule.name: 0 for rule in self.rules}
+        self.active_alerts = set()
+        self._consumed = 0.0
+        self._chars = 0
+        self._payload_energy = 0.0
+
+    def on_consume(self, amount):
+        self._consumed += amount
+
+    def on_message(self, chars):
+        self._chars += chars
+
+    def on_payload(self, dt, energy, success):
+        if success:
+            self._payload_energy += energy
+
+    def on_tick(self, dt, battery_before, battery_after, charging, sunlight=True):
+        """Closes a time step of dt minutes, updates the rolling statistics and evaluates the rules"""
+        if dt <= 0:
+            return
+        drain = (self._consumed + max(battery_before - battery_after, 0.0)) / dt
+        samples = {
+            "drain_rate": None if charging else drain,
+            "charge_rate": max(battery_after - battery_before, 0.0) / dt if charging else None,
+            "message_rate": self._chars / dt,
+            "payload_rate": self._payload_energy / dt,
+        }
+        self._consumed = 0.0
+        self._chars = 0
+        self._payload_energy = 0.0
+
+        # The z-scores compare the new sample with the statistics before it
+        zscores = {metric: self.stats[metric].zscore(x) for metric, x in samples.items() if x is not None}
+        for metric, x in samples.items():
+            if x is not None:
+                self.stats[metric].update(x)
+
+        for rule in self.rules:
+            value = samples[rule.metric]
+            stats = self.stats[rule.metric]
+            failing = False
+            if value is not None and stats.count >= rule.warmup and _condition(rule.when, charging, sunlight):
+                if rule.mode == "zscore":
+                    value = zscores[rule.metric]
+                    failing = value > rule.threshold
+                else:
+                    value = stats.mean
+                    failing = value > rule.threshold if rule.mode == "above" else value < rule.threshold
+            if failing and rule.name not in self.active_alerts:
+                self.active_alerts.add(rule.name)
+                self.alert_counts[rule.name] += 1
+                if self.on_alert is not None:
+                    self.on_alert(rule, value)
+            elif not failing:
+                self.active_alerts.discard(rule.name)
+
+
+class Fleet_Anomaly_Detector:
+    def __init__(self, size, rules=DEFAULT_RULES, window=30):
+        """Same rolling statistics and rules as Streaming_Anomaly_Detector, evaluated in batch for a whole fleet"""
+        self.size = size
+        self.rules = list(rules)
+        self.alpha = 2.0 / (window + 1)
+        self.mean = {metric: np.zeros(size) for metric in METRICS}
+        self.var = {metric: np.zeros(size) for metric in METRICS}
+        self.count = {metric: np.zeros(size, dtype=np.int64) for metric in METRICS}
+        self.active = {rule.name: np.zeros(size, dtype=bool) for rule in self.rules}
+        self.alert_counts = {rule.name: np.zeros(size, dtype=np.int64) for rule in self.rules}
+
+    def update(self, dt, drain, charge, messages=0.0, payload=0.0, charging=None, sunlight=True):
+        """
+        Closes a time step of dt minutes. drain, charge, messages and payload are the energy drained,
+        energy charged, characters sent and payload energy of every spacecraft during the step.
+        Returns a dict with the mask of the spacecraft that raised each alert in this step.
+        """
+        if charging is None:
+            charging = np.zeros(self.size, dtype=bool)
+        sunlight = np.broadcast_to(np.asarray(sunlight, dtype=bool), (self.size,))
+        samples = {
+            "drain_rate": np.broadcast_to(np.asarray(drain, dtype=float) / dt, (self.size,)),
+            "charge_rate": np.broadcast_to(np.asarray(charge, dtype=float) / dt, (self.size,)),
+            "message_rate": np.broadcast_to(np.asarray(messages, dtype=float) / dt, (self.size,)),
+            "payload_rate": np.broadcast_to(np.asarray(payload, dtype=float) / dt, (self.size,)),
+        }
+        observed = {metric: np.ones(self.size, dtype=bool) for metric in METRICS}
+        observed["drain_rate"] = ~charging
+        observed["charge_rate"] = charging
+
+        zscores = {}
+        for metric, x in samples.items():
+            mean, var, count, seen = self.mean[metric], self.var[metric], self.count[metric], observed[metric]
+            zscores[metric] = (x - mean) / np.maximum(np.sqrt(var), MIN_STD)
+            new_mean, new_var = ewma_update(mean, var, x, self.alpha)
+            first = count == 0
+            new_mean = np.where(first, x, new_mean)
+            new_var = np.where(first, 0.0, new_var)
+            self.mean[metric] = np.where(seen, new_mean, mean)
+            self.var[metric] = np.where(seen, new_var, var)
+            count += seen
+
+        raised = {}
+        for rule in self.rules:
+            evaluate = observed[rule.metric] & (self.count[rule.metric] >= rule.warmup)
+            evaluate &= _condition(rule.when, charging, sunlight)
+            if rule.mode == "zscore":
+                failing = zscores[rule.metric] > rule.threshold
+            elif rule.mode == "above":
+                failing = self.mean[rule.metric] > rule.threshold
+            else:
+                failing = self.mean[rule.metric] < rule.threshold
+            failing &= evaluate
+            raised[rule.name] = failing & ~self.active[rule.name]
+            self.alert_counts[rule.name] += raised[rule.name]
+            self.active[rule.name] = failing
+        return raised
+
+    def observe_fleet(self, fleet, battery_before, dt, charging_before=None, messages=0.0):
+        """Feeds one Fleet.step: battery_before is a copy of fleet.battery taken before the step"""
+        delta = fleet.battery - battery_before
+        charging = fleet.solar_charging.copy()
+        if charging_before is not None:
+            charging |= charging_before
+        return self.update(dt, np.maximum(-delta, 0.0), np.maximum(delta, 0.0), messages,
+                           charging=charging, sunlight=~fleet.in_earth_shadow)
@@ -0,0 +1,87 @@
+import unittest
+
+import numpy as np
+from Spacecraft import Spacecraft
+from streaming_anomaly import (DEFAULT_RULES, Anomaly_Rule, Fleet_Anomaly_Detector, Rolling_Stats,
+                               Streaming_Anomaly_Detector)
+from telemetry_sinks import Ring_Buffer_Sink
+
+
+class Rolling_Stats_Test(unittest.TestCase):
+    def test_matches_the_weighted_definition(self):
+        samples = np.random.default_rng(0).normal(3.0, 2.0, 400)
+        stats = Rolling_Stats(window=30)
+        for x in samples:
+            stats.update(x)
+        alpha = 2.0 / 31
+        weights = (1 - alpha) ** np.arange(len(samples) - 1, -1, -1)
+        weights[0] /= alpha  # The first sample starts the mean
+        mean = np.sum(weights * samples) * alpha
+        self.assertAlmostEqual(stats.mean, mean)
+        self.assertEqual(stats.count, 400)
+        self.assertAlmostEqual(np.sqrt(stats.var), 2.0, delta=0.6)
+
+
+class Streaming_Anomaly_Detector_Test(unittest.TestCase):
+    def test_fleet_detector_matches_one_detector_per_row(self):
+        rng = np.random.default_rng(1)
+        size, steps = 20, 300
+        before = rng.uniform(30, 100, (steps, size))
+        change = rng.normal(-0.5, 0.1, (steps, size))
+        change[rng.random((steps, size)) < 0.02] = -8.0  # Spikes of drain
+        charging = rng.random((steps, size)) < 0.3
+        change[charging] = np.where(rng.random(charging.sum()) < 0.5, 2.5, 0.0)
+        sunlight = rng.random((steps, size)) < 0.7
+        messages = rng.integers(0, 3000, (steps, size)).astype(float)
+        after = before + change
+
+        single = [Streaming_Anomaly_Detector() for _ in range(size)]
+        fleet = Fleet_Anomaly_Detector(size)
+        for t in range(steps):
+            fleet.update(1.0, np.maximum(-change[t], 0.0), np.maximum(change[t], 0.0), messages[t],
+                         charging=charging[t], sunlight=sunlight[t])
+            for k, detector in enumerate(single):
+                detector.on_message(messages[t, k])
+                detector.on_tick(1.0, before[t, k], after[t, k], bool(charging[t, k]), bool(sunlight[t, k]))
+
+        for rule in DEFAULT_RULES:
+            counts = [detector.alert_counts[rule.name] for detector in single]
+            self.assertEqual(fleet.alert_counts[rule.name].tolist(), counts, rule.name)
+            self.assertEqual(fleet.active[rule.name].tolist(),
+                             [rule.name in detector.active_alerts for detector in single])
+        self.assertGreater(sum(fleet.alert_counts["abnormal_drain"]), 0)
+        self.assertGreater(sum(fleet.alert_counts["stalled_charging"]), 0)
+        for metric in fleet.mean:
+            np.testing.assert_allclose(fleet.mean[metric], [detector.stats[metric].mean for detector in single])
+
+    def test_alert_is_raised_once_while_failing(self):
+        alerts = []
+        detector = Streaming_Anomaly_Detector([Anomaly_Rule("high", "drain_rate", 1.0, "above", warmup=1)],
+                                              on_alert=lambda rule, value: alerts.append(rule.name))
+        for drain in (0.5, 5.0, 5.0, 5.0, 0.0, 0.0, 0.0, 0.0, 0.0, 9.0):
+            detector.on_tick(1.0, 50.0, 50.0 - drain, False)
+        self.assertEqual(alerts, ["high", "high"])
+
+    def test_alerts_through_comms(self):
+        sink = Ring_Buffer_Sink(100000)
+        spacecraft = Spacecraft(1, "Stream", 200, 2, 400, "USA", telemetry_sink=sink)
+        detector = Streaming_Anomaly_Detector()
+        spacecraft.anomaly_detection.attach_stream(detector)
+        spacecraft.activate_payload("Cloud Seeding Device")
+        for _ in range(20):
+            spacecraft.payload_subsystem.update_operation(1, in_earth_shadow=False)
+            spacecraft.power_subsystem.update_power(1)  # Closes the time step of the detector
+        spacecraft.power_subsystem.consume_energy(15)  # Sudden drain, the battery stays above 30%
+        spacecraft.power_subsystem.update_power(1)
+        self.assertEqual(detector.alert_counts["abnormal_drain"], 1)
+        self.assertTrue(any("[ALERT] abnormal_drain" in line for line in sink.messages()))
+
+    def test_unknown_rule(self):
+        with self.assertRaises(ValueError):
+            Anomaly_Rule("bad", "temperature", 1.0)
+        with self.assertRaises(ValueError):
+            Anomaly_Rule("bad", "drain_rate", 1.0, mode="sideways")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,50 @@
+import importlib
+
+
 class Subsystem:
+    metrics = None  # Optional instrumentation.Metrics, hot paths only check that it is not None
+
     def status_report(self):
         raise NotImplementedError("This method should be overridden by subclasses.")
+
+    @classmethod
+    def build(cls, spacecraft):
+        """Creates the subsystem for a spacecraft, override it when the constructor needs arguments"""
+        return cls()
+
+    def connect(self, spacecraft):
+        """Attaches the subsystem to the other subsystems of the spacecraft, called right after it is added"""
+        pass
+
+    def report_fields(self):
+        """Compact fields of the incremental status reports: name -> encoded value (see status_reports)"""
+        return {}
+
+    def attach_metrics(self, metrics):
+        """Starts counting the events of this subsystem in an instrumentation.Metrics"""
+        self.metrics = metrics
+
+
+# Registered subsystems: name -> (module, class name). The module is only imported the first time
+# a spacecraft uses the subsystem.
+SUBSYSTEM_REGISTRY = {}
+
+
+def register_subsystem(name, module, class_name):
+    """Registers a subsystem class so a Spacecraft can be composed with it by name"""
+    SUBSYSTEM_REGISTRY[name] = (module, class_name)
+
+
+def get_subsystem_class(name):
+    """Imports (only the first time) and returns the class of a registered subsystem"""
+    if name not in SUBSYSTEM_REGISTRY:
+        raise ValueError(f"Unknown subsystem: {name}")
+    module, class_name = SUBSYSTEM_REGISTRY[name]
+    return getattr(importlib.import_module(module), class_name)
+
+
+register_subsystem("power", "power_subsystem", "Power_Subsystem")
+register_subsystem("comms", "comms_subsystem", "Communication_Subsystem")
+register_subsystem("payload", "Payload_Subsystem", "Payload_Subsystem")
+register_subsystem("altitude_control", "altitude_control_subsystem", "Altitude_Control_Subsystem")
+register_subsystem("anomaly_detection", "annomaly_detection_subsystem", "AnomalyDetectionSubsystem")
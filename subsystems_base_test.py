@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from Payload_Subsystem import Payload_Subsystem
+from Spacecraft import Spacecraft
+from subsystems_base import SUBSYSTEM_REGISTRY, get_subsystem_class, register_subsystem
+from telemetry_sinks import Null_Sink
+
+
+class Fixed_Rate_Payload(Payload_Subsystem):
+    """Payload whose every type consumes 0.1% per minute"""
+    def __init__(self):
+        super().__init__()
+        self.payload_consumption = {name: 0.1 for name in self.payload_consumption}
+
+
+class Subsystem_Registry_Test(unittest.TestCase):
+    def test_subsystems_are_imported_on_first_use(self):
+        code = (
+            "import sys\n"
+            "from Spacecraft import Spacecraft\n"
+            "from telemetry_sinks import Null_Sink\n"
+            "modules = ('numpy', 'altitude_control_subsystem', 'annomaly_detection_subsystem')\n"
+            "sc = Spacecraft(1, 'Lazy', 200, 2, 400, 'USA', telemetry_sink=Null_Sink())\n"
+            "print(*[name in sys.modules for name in modules])\n"
+            "sc.change_altitude(300)\n"
+            "print('altitude_control_subsystem' in sys.modules, 'annomaly_detection_subsystem' in sys.modules)\n"
+        )
+        output = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.split("\n")[:2], ["False False False", "True False"])
+
+    def test_replace_a_subsystem(self):
+        register_subsystem("fixed_rate_payload", __name__, "Fixed_Rate_Payload")
+        self.addCleanup(SUBSYSTEM_REGISTRY.pop, "fixed_rate_payload")
+        spacecraft = Spacecraft(1, "Custom", 200, 2, 400, "USA", telemetry_sink=Null_Sink(),
+                                subsystems={"payload_subsystem": "fixed_rate_payload"})
+        spacecraft.activate_payload("SAR Radar")
+        battery = spacecraft.power_subsystem.battery_level
+        spacecraft.payload_subsystem.update_operation(10, in_earth_shadow=False)
+        self.assertIsInstance(spacecraft.payload_subsystem, Fixed_Rate_Payload)
+        self.assertAlmostEqual(battery - spacecraft.power_subsystem.battery_level, 1.0)
+        self.assertIs(spacecraft.payload_subsystem.power_subsystem, spacecraft.power_subsystem)
+
+    def test_unknown_names(self):
+        with self.assertRaises(ValueError):
+            get_subsystem_class("warp_drive")
+        spacecraft = Spacecraft(1, "Unknown", 200, 2, 400, "USA", telemetry_sink=Null_Sink())
+        with self.assertRaises(AttributeError):
+            spacecraft.warp_drive
+        self.assertFalse(hasattr(spacecraft, "warp_drive"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,207 @@
+import bisect
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+# Fixed-size packed record: timestamp(min), subsystem tag, message kind, battery(%), chars, energy cost(%)
+RECORD = struct.Struct("<dBBdId")
+# Sidecar index: one entry per block of records with its first/last timestamp and a bit mask of the tags
+INDEX_HEADER = struct.Struct("<4sI")
+INDEX_ENTRY = struct.Struct("<ddQ")
+INDEX_MAGIC = b"TLIX"
+
+# Message kinds
+KIND_STATUS = 0   # Message sent with skip_summary, it does not consume energy
+KIND_MESSAGE = 1  # Message that paid its energy cost
+KIND_SUMMARY = 2  # Summary of the characters sent
+KIND_NAMES = ("status", "message", "summary")
+
+# Subsystem tags, taken from the "[Tag]" at the start of each message
+SUBSYSTEM_TAGS = (
+    "Other", "Comms", "Power", "Payload", "Payload Status", "Altitude", "Altitude Control",
+    "Orientation", "Orbit", "Time", "Battery", "ALERT", "STATUS", "ECLIPSE",
+    "ECLIPSE/MALFUNCTION", "POWER", "ERROR",
+)
+_TAG_CODES = {name: code for code, name in enumerate(SUBSYSTEM_TAGS)}
+
+Telemetry_Record = namedtuple("Telemetry_Record", "timestamp subsystem kind battery chars energy")
+
+
+def subsystem_tag(status):
+    """Returns the tag code of a message such as "[Power] Battery Level: 80%" (0 if it has no known tag)"""
+    if status.startswith("["):
+        return _TAG_CODES.get(status[1:status.find("]")], 0)
+    return 0
+
+
+def tag_code(subsystem):
+    """Accepts a tag name ("Power" or "[Power]") or a code and returns the code"""
+    if isinstance(subsystem, int):
+        return subsystem
+    subsystem = subsystem.strip("[]")
+    if subsystem not in _TAG_CODES:
+        raise ValueError(f"Unknown subsystem tag: {subsystem}")
+    return _TAG_CODES[subsystem]
+
+
+class Telemetry_Log_Writer:
+    def __init__(self, path, block_records=1024):
+        """
+        Append-only binary telemetry log. Records must be appended in time order. Each flush appends the
+        blocks finished since the last one to the sidecar index (path + ".idx") and rewrites the entry of
+        the open block, earlier entries are never rewritten.
+
+        block_records: number of records summarized by each index entry (an existing log keeps its own)
+        """
+        self.path = path
+        self.index_path = path + ".idx"
+        self.block_records = block_records
+        self._buffer = bytearray()
+        self._blocks = []  # (first timestamp, last timestamp, tag mask) of the full blocks not in the index yet
+        self._block = None  # Same for the block being written
+        self._block_count = 0
+        self._indexed = 0  # Full blocks already in the index
+
+        self.count = os.path.getsize(path) // RECORD.size if os.path.exists(path) else 0
+        if self.count:
+            self._resume()
+        self._file = open(path, "ab")
+        self._index = open(self.index_path, "r+b" if self._indexed else "wb")
+        if not self._indexed:
+            self._index.write(INDEX_HEADER.pack(INDEX_MAGIC, self.block_records))
+
+    def _resume(self):
+        """Continues an existing log: the full blocks come from the index, only the records after them are read"""
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "rb") as f:
+                header = f.read(INDEX_HEADER.size)
+                entries = (os.fstat(f.fileno()).st_size - INDEX_HEADER.size) // INDEX_ENTRY.size
+            if len(header) == INDEX_HEADER.size:
+                magic, block_records = INDEX_HEADER.unpack(header)
+                if magic == INDEX_MAGIC and block_records:
+                    self.block_records = block_records
+                    self._indexed = min(entries, self.count // block_records)
+        start = self._indexed * self.block_records
+        with open(self.path, "rb") as f:
+            f.seek(start * RECORD.size)
+            for record in RECORD.iter_unpack(f.read((self.count - start) * RECORD.size)):
+                self._track(record[0], record[1])
+
+    def _track(self, timestamp, tag):
+        if self._block is None:
+            self._block = [timestamp, timestamp, 0]
+        self._block[1] = timestamp
+        self._block[2] |= 1 << tag
+        self._block_count += 1
+        if self._block_count == self.block_records:
+            self._blocks.append(tuple(self._block))
+            self._block = None
+            self._block_count = 0
+
+    def append(self, timestamp, status, kind, battery, chars, energy):
+        """Adds one record, the subsystem tag is taken from the text of the message"""
+        tag = subsystem_tag(status) if isinstance(status, str) else status
+        self._buffer += RECORD.pack(timestamp, tag, kind, battery, chars, energy)
+        self._track(timestamp, tag)
+        self.count += 1
+        if len(self._buffer) >= 64 * 1024:
+            self.flush()
+
+    def flush(self):
+        self._file.write(self._buffer)
+        self._buffer.clear()
+        self._file.flush()
+        entries = self._blocks + ([tuple(self._block)] if self._block else [])
+        self._index.seek(INDEX_HEADER.size + self._indexed * INDEX_ENTRY.size)
+        self._index.write(b"".join(INDEX_ENTRY.pack(*entry) for entry in entries))
+        self._index.truncate()
+        self._index.flush()
+        self._indexed += len(self._blocks)
+        self._blocks.clear()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        self._index.close()
+
+
+class Telemetry_Log_Reader:
+    def __init__(self, path):
+        """Opens a telemetry log with memory mapping, records are decoded only when they are queried"""
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self.count = size // RECORD.size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self._view = memoryview(self._map) if self._map is not None else memoryview(b"")
+
+        self.block_records = self.count or 1
+        self._first_times, self._last_times, self._masks = [], [], []
+        index_path = path + ".idx"
+        if os.path.exists(index_path):
+            with open(index_path, "rb") as f:
+                data = f.read()
+            # A writer that has not flushed yet may not have written the header: no index
+            magic, block_records = INDEX_HEADER.unpack_from(data) if len(data) >= INDEX_HEADER.size else (None, 0)
+            if magic == INDEX_MAGIC and block_records:
+                self.block_records = block_records
+                for first, last, mask in INDEX_ENTRY.iter_unpack(data[INDEX_HEADER.size:]):
+                    self._first_times.append(first)
+                    self._last_times.append(last)
+                    self._masks.append(mask)
+        # Records written after the last index update are scanned as one extra block
+        indexed = min(len(self._masks) * self.block_records, self.count)
+        self._tail = indexed, self.count
+
+    def __len__(self):
+        return self.count
+
+    def record(self, i):
+        return Telemetry_Record(*RECORD.unpack_from(self._view, i * RECORD.size))
+
+    def _scan(self, first, last, start, end, tag, kind):
+        for record in RECORD.iter_unpack(self._view[first * RECORD.size:last * RECORD.size]):
+            if start is not None and record[0] < start:
+                continue
+            if end is not None and record[0] > end:
+                return True
+            if tag is not None and record[1] != tag:
+                continue
+            if kind is not None and record[2] != kind:
+                continue
+            yield Telemetry_Record(*record)
+        return False
+
+    def query(self, start=None, end=None, subsystem=None, kind=None):
+        """
+        Yields the records with start <= timestamp <= end, optionally only of one subsystem
+        (e.g. "Power") and one kind. Uses the index to skip the blocks out of range or without the subsystem.
+        """
+        tag = None if subsystem is None else tag_code(subsystem)
+        bit = 0 if tag is None else 1 << tag
+
+        block = 0 if start is None else bisect.bisect_left(self._last_times, start)
+        for block in range(block, len(self._masks)):
+            if end is not None and self._first_times[block] > end:
+                return
+            if bit and not self._masks[block] & bit:
+                continue
+            first = block * self.block_records
+            last = min(first + self.block_records, self.count)
+            finished = yield from self._scan(first, last, start, end, tag, kind)
+            if finished:
+                return
+        yield from self._scan(*self._tail, start, end, tag, kind)
+
+    def close(self):
+        self._view.release()
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
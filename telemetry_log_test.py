@@ -0,0 +1,117 @@
+import os
+import random
+import tempfile
+import unittest
+
+from Spacecraft import Spacecraft
+from telemetry_log import (INDEX_ENTRY, INDEX_HEADER, KIND_MESSAGE, KIND_STATUS, KIND_SUMMARY, RECORD, SUBSYSTEM_TAGS,
+                           Telemetry_Log_Reader, Telemetry_Log_Writer, tag_code)
+from telemetry_sinks import Null_Sink
+
+
+def random_records(count, seed=0):
+    rng = random.Random(seed)
+    timestamp = 0.0
+    for _ in range(count):
+        timestamp += rng.choice((0.0, 0.5, 1.0, 7.0))
+        yield timestamp, rng.randrange(len(SUBSYSTEM_TAGS)), rng.choice((KIND_STATUS, KIND_MESSAGE)), \
+            rng.uniform(0, 100), rng.randrange(200), rng.uniform(0, 1)
+
+
+class Telemetry_Log_Test(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "telemetry.bin")
+
+    def write(self, records, path=None, block_records=64):
+        writer = Telemetry_Log_Writer(path or self.path, block_records)
+        for record in records:
+            writer.append(*record)
+        writer.close()
+
+    def test_range_queries(self):
+        records = list(random_records(5000))
+        self.write(records)
+        with Telemetry_Log_Reader(self.path) as reader:
+            self.assertEqual(len(reader), len(records))
+            for start, end, subsystem, kind in ((None, None, None, None), (100.0, 900.0, None, None),
+                                                (None, 50.0, "Power", None), (2000.0, None, "ALERT", KIND_MESSAGE),
+                                                (500.0, 500.0, None, KIND_STATUS), (1e9, None, None, None)):
+                with self.subTest(start=start, end=end, subsystem=subsystem, kind=kind):
+                    tag = None if subsystem is None else tag_code(subsystem)
+                    expected = [record for record in records
+                                if (start is None or record[0] >= start) and (end is None or record[0] <= end)
+                                and tag in (None, record[1]) and kind in (None, record[2])]
+                    self.assertEqual([tuple(record) for record in reader.query(start, end, subsystem, kind)],
+                                     expected)
+
+    def test_reopen_matches_one_writer(self):
+        records = list(random_records(3000, seed=1))
+        other = self.path + ".one"
+        self.write(records, other)
+        for split in (0, 10, 64, 1000, 2999):
+            self.write(records[:split])
+            self.write(records[split:])
+            with self.subTest(split=split):
+                for suffix in ("", ".idx"):
+                    with open(self.path + suffix, "rb") as f, open(other + suffix, "rb") as g:
+                        self.assertEqual(f.read(), g.read())
+            os.remove(self.path)
+
+    def test_reopen_after_a_lost_index_update(self):
+        records = list(random_records(1000, seed=2))
+        self.write(records[:700])
+        with open(self.path + ".idx", "r+b") as f:
+            f.truncate(INDEX_HEADER.size + 3 * INDEX_ENTRY.size)  # As if the last flush did not reach the index
+        self.write(records[700:])
+        with Telemetry_Log_Reader(self.path) as reader:
+            self.assertEqual([tuple(record) for record in reader.query(300.0)],
+                             [record for record in records if record[0] >= 300.0])
+
+    def test_flush_keeps_the_finished_entries(self):
+        writer = Telemetry_Log_Writer(self.path, block_records=16)
+        records = random_records(1000, seed=3)
+        sizes = []
+        for k, record in enumerate(records):
+            writer.append(*record)
+            if k % 50 == 49:
+                writer.flush()
+                with open(self.path + ".idx", "rb") as f:
+                    sizes.append(f.read())
+        writer.close()
+        for before, after in zip(sizes, sizes[1:]):
+            # Only the entry of the open block changes, the rest is appended
+            kept = len(before) - INDEX_ENTRY.size
+            self.assertEqual(before[:kept], after[:kept])
+        self.assertEqual(os.path.getsize(self.path), 1000 * RECORD.size)
+
+    def test_live_log(self):
+        writer = Telemetry_Log_Writer(self.path, block_records=16)
+        with Telemetry_Log_Reader(self.path) as reader:  # Before the first flush
+            self.assertEqual(list(reader.query()), [])
+        records = list(random_records(100, seed=4))
+        for record in records:
+            writer.append(*record)
+        writer.flush()
+        with Telemetry_Log_Reader(self.path) as reader:
+            self.assertEqual([tuple(record) for record in reader.query(200.0)],
+                             [record for record in records if record[0] >= 200.0])
+        writer.close()
+
+    def test_spacecraft_log(self):
+        spacecraft = Spacecraft(1, "Log", 200, 2, 400, "USA", telemetry_sink=Null_Sink())
+        writer = spacecraft.open_telemetry_log(self.path)
+        spacecraft.activate_payload("SAR Radar")
+        spacecraft.simulate_orbit()
+        spacecraft.report_status()
+        writer.close()
+        with Telemetry_Log_Reader(self.path) as reader:
+            messages = [record for record in reader.query() if record.kind != KIND_SUMMARY]
+            self.assertEqual(len(messages), spacecraft.comms_subsystem.messages_sent)
+            self.assertEqual(sum(record.chars for record in messages), spacecraft.comms_subsystem.total_chars)
+            self.assertTrue(all(record.subsystem == tag_code("Power") for record in reader.query(subsystem="Power")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import collections
+
+
+class Telemetry_Sink:
+    """Destination of the lines written by the communication subsystem"""
+    enabled = True
+
+    def write(self, template, *args):
+        """Receives a line as a template and its arguments, it is only formatted by enabled sinks"""
+        self.emit(template.format(*args) if args else template)
+
+    def emit(self, line):
+        raise NotImplementedError("This method should be overridden by subclasses.")
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class Console_Sink(Telemetry_Sink):
+    """Prints every line, the original behaviour of send_status"""
+    def emit(self, line):
+        print(line)
+
+
+class Null_Sink(Telemetry_Sink):
+    """Discards every line without formatting it"""
+    enabled = False
+
+    def write(self, template, *args):
+        pass
+
+    def emit(self, line):
+        pass
+
+
+class Buffered_File_Sink(Telemetry_Sink):
+    def __init__(self, path, buffer_lines=1024):
+        """Appends the lines to a text file, writing them in blocks of buffer_lines"""
+        self.path = path
+        self.buffer_lines = buffer_lines
+        self._buffer = []
+        self._file = open(path, "a", encoding="utf-8")
+
+    def emit(self, line):
+        self._buffer.append(line)
+        if len(self._buffer) >= self.buffer_lines:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write("\n".join(self._buffer) + "\n")
+            self._buffer.clear()
+        self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+class Ring_Buffer_Sink(Telemetry_Sink):
+    def __init__(self, capacity=1000):
+        """Keeps only the last capacity lines in memory"""
+        self.lines = collections.deque(maxlen=capacity)
+
+    def emit(self, line):
+        self.lines.append(line)
+
+    def messages(self):
+        return list(self.lines)
+
+
+class Threaded_Sink(Telemetry_Sink):
+    def __init__(self, sink, max_queue=10000):
+        """Formats and writes the lines of another sink in a background thread,
+        send_status only puts them in a queue. Writing after close raises ValueError, like a closed file."""
+        import queue
+        import threading
+        self.sink = sink
+        self.closed = False
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, template, *args):
+        if self.closed:
+            raise ValueError("Write to a closed Threaded_Sink")
+        self._queue.put((template, args))
+
+    def emit(self, line):
+        self.write(line)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            self.sink.write(item[0], *item[1])
+            self._queue.task_done()
+
+    def flush(self):
+        """Waits until the background thread has written every queued line"""
+        self._queue.join()
+        self.sink.flush()
+
+    def close(self):
+        self.closed = True  # Nothing would drain the lines queued after this
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self.sink.close()
@@ -0,0 +1,77 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from Spacecraft import Spacecraft
+from telemetry_sinks import Buffered_File_Sink, Console_Sink, Null_Sink, Ring_Buffer_Sink, Threaded_Sink
+
+
+class Unformattable:
+    def __format__(self, spec):
+        raise AssertionError("A disabled sink formatted its line")
+
+
+def mission(sink):
+    spacecraft = Spacecraft(1, "Sinks", 200, 2, 400, "USA", telemetry_sink=sink)
+    spacecraft.activate_payload("SAR Radar")
+    for k in range(30):
+        spacecraft.update_payload_operation(1, in_earth_shadow=k % 2 == 0)
+    spacecraft.change_altitude(1500)
+    spacecraft.simulate_orbit()
+    spacecraft.report_status()
+    sink.close()
+    return spacecraft
+
+
+class Telemetry_Sinks_Test(unittest.TestCase):
+    def test_same_accounting_for_every_sink(self):
+        with contextlib.redirect_stdout(io.StringIO()) as printed:
+            console = mission(Console_Sink())
+        ring = Ring_Buffer_Sink(100000)
+        threaded = Ring_Buffer_Sink(100000)
+        for spacecraft in (mission(Null_Sink()), mission(ring), mission(Threaded_Sink(threaded))):
+            self.assertEqual(spacecraft.comms_subsystem.sent_chars, console.comms_subsystem.sent_chars)
+            self.assertEqual(spacecraft.comms_subsystem.total_chars, console.comms_subsystem.total_chars)
+            self.assertEqual(spacecraft.power_subsystem.battery_level, console.power_subsystem.battery_level)
+        self.assertEqual("".join(line + "\n" for line in ring.messages()), printed.getvalue())
+        self.assertEqual(threaded.messages(), ring.messages())
+
+    def test_null_sink_does_not_format(self):
+        Null_Sink().write("[Power] Battery Level: {:.2f}%", Unformattable())
+
+    def test_ring_buffer_keeps_the_last_lines(self):
+        sink = Ring_Buffer_Sink(3)
+        for k in range(10):
+            sink.write("line {}", k)
+        self.assertEqual(sink.messages(), ["line 7", "line 8", "line 9"])
+
+    def test_buffered_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "telemetry.txt")
+            sink = Buffered_File_Sink(path, buffer_lines=4)
+            for k in range(6):
+                sink.write("line {}", k)
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(f.read().splitlines(), [f"line {k}" for k in range(4)])
+            sink.close()
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(f.read().splitlines(), [f"line {k}" for k in range(6)])
+
+    def test_threaded_sink_after_close(self):
+        ring = Ring_Buffer_Sink()
+        sink = Threaded_Sink(ring)
+        sink.write("line {}", 1)
+        sink.close()
+        with self.assertRaises(ValueError):
+            sink.write("line {}", 2)
+        with self.assertRaises(ValueError):
+            sink.emit("line 3")
+        sink.flush()  # Nothing is left in the queue, so it returns
+        sink.close()
+        self.assertEqual(ring.messages(), ["line 1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import csv
+import itertools
+from collections import namedtuple
+
+# State of a spacecraft after each step of Spacecraft.iter_timeline
+FIELDS = ("time", "battery", "solar_charging", "altitude", "pitch", "roll", "yaw",
+          "payload_active", "payload_runtime")
+Timeline_Sample = namedtuple("Timeline_Sample", FIELDS)
+
+
+def sample(spacecraft):
+    """Current state of a spacecraft as a Timeline_Sample"""
+    power = spacecraft.power_subsystem
+    acs = spacecraft.altitude_control
+    payload = spacecraft.payload_subsystem
+    return Timeline_Sample(spacecraft.clock.now, power.battery_level, power.solar_charging, acs.altitude,
+                           *acs.orientation, payload.active, payload.total_runtime)
+
+
+def chunks(samples, size=1024):
+    """Groups samples in NumPy arrays of shape (size, len(FIELDS)), the last one can be shorter"""
+    import numpy as np
+    samples = iter(samples)
+    while True:
+        rows = list(itertools.islice(samples, size))
+        if not rows:
+            return
+        yield np.array(rows, dtype=float)
+
+
+def downsample(samples, every):
+    """Keeps one sample of every this many"""
+    return itertools.islice(samples, every - 1, None, every)
+
+
+def write_csv(samples, file):
+    """Writes the samples to a CSV file (path or open file) as they arrive, returns the number of rows"""
+    if isinstance(file, str):
+        with open(file, "w", newline="", encoding="utf-8") as f:
+            return write_csv(samples, f)
+    writer = csv.writer(file)
+    writer.writerow(FIELDS)
+    rows = 0
+    for row in samples:
+        writer.writerow(row)
+        rows += 1
+    return rows
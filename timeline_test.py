@@ -0,0 +1,100 @@
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from Spacecraft import Spacecraft
+from command_log import replay
+from telemetry_sinks import Null_Sink
+from timeline import FIELDS, chunks, downsample, write_csv
+
+
+def make_spacecraft(orbital_period=2):
+    return Spacecraft(1, "Timeline", 200, orbital_period, 400, "USA", telemetry_sink=Null_Sink())
+
+
+class Iter_Timeline_Test(unittest.TestCase):
+    def test_matches_step_by_step(self):
+        streamed = make_spacecraft()
+        manual = make_spacecraft()
+        for spacecraft in (streamed, manual):
+            spacecraft.activate_payload("SAR Radar")
+        samples = list(streamed.iter_timeline(90, step=2))
+
+        for sample in samples:
+            manual.payload_subsystem.update_operation(2)
+            manual.power_subsystem.update_power(2)
+            manual.clock.advance(2)
+            self.assertEqual(sample.battery, manual.power_subsystem.battery_level)
+            self.assertEqual(sample.time, manual.clock.now)
+        self.assertEqual(len(samples), 45)
+        self.assertEqual(streamed.snapshot(), manual.snapshot())
+
+    def test_last_step_is_shorter(self):
+        samples = list(make_spacecraft().iter_timeline(10, step=3))
+        self.assertEqual([sample.time for sample in samples], [3, 6, 9, 10])
+
+    def test_consumers(self):
+        samples = make_spacecraft().iter_timeline(100)
+        self.assertEqual([sample.time for sample in downsample(samples, 25)], [25, 50, 75, 100])
+        blocks = list(chunks(make_spacecraft().iter_timeline(100), size=30))
+        self.assertEqual([block.shape for block in blocks], [(30, len(FIELDS))] * 3 + [(10, len(FIELDS))])
+        out = io.StringIO()
+        self.assertEqual(write_csv(make_spacecraft().iter_timeline(5), out), 5)
+        self.assertEqual(out.getvalue().splitlines()[0], ",".join(FIELDS))
+
+
+class Iter_Orbit_Test(unittest.TestCase):
+    def test_matches_simulate_orbit(self):
+        for orbital_period, battery_level in ((2, 100.0), (30, 100.0), (3, 35.0)):
+            with self.subTest(orbital_period=orbital_period, battery_level=battery_level):
+                streamed = make_spacecraft(orbital_period)
+                reference = make_spacecraft(orbital_period)
+                streamed.power_subsystem.battery_level = reference.power_subsystem.battery_level = battery_level
+                minutes = np.concatenate(list(streamed.iter_orbit(chunk_size=100)))
+                levels = []
+                for _ in range(int(orbital_period * 60)):
+                    reference.power_subsystem.consume_energy(0.2, log=False)
+                    levels.append(reference.power_subsystem.battery_level)
+                self.assertEqual(list(minutes[:, 1]), levels)
+                self.assertEqual(minutes[-1, 0], streamed.clock.now)
+                self.assertEqual(streamed.power_subsystem.battery_level, levels[-1])
+
+    def test_advances_one_chunk_at_a_time(self):
+        spacecraft = make_spacecraft(orbital_period=3)
+        orbit = spacecraft.iter_orbit(chunk_size=16)
+        self.assertEqual(spacecraft.clock.now, 0)  # Nothing runs before the first chunk is taken
+        first = next(orbit)
+        self.assertEqual(spacecraft.clock.now, 16)
+        self.assertEqual(spacecraft.power_subsystem.battery_level, first[-1, 1])
+        second = next(orbit)
+        self.assertEqual(spacecraft.clock.now, 32)
+        self.assertEqual(spacecraft.power_subsystem.battery_level, second[-1, 1])
+
+
+class Recorded_Generators_Test(unittest.TestCase):
+    def test_replay_partly_consumed_generators(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "mission.log")
+        spacecraft = Spacecraft(25544, "ISS", 420, 1.5, 420000, "International", telemetry_sink=Null_Sink())
+        recorder = spacecraft.record_commands(path, checkpoint_every=1)
+        spacecraft.activate_payload("SAR Radar")
+        for _ in spacecraft.iter_timeline(30):
+            pass
+        spacecraft.report_status()
+        timeline = spacecraft.iter_timeline(100, step=5)
+        next(timeline)  # Only partly consumed
+        next(timeline)
+        spacecraft.change_altitude(800)
+        next(spacecraft.iter_orbit(chunk_size=16))
+        spacecraft.report_status()
+        recorder.close()
+
+        replayed = replay(path)
+        self.assertEqual(replayed.snapshot(), spacecraft.snapshot())
+
+
+if __name__ == "__main__":
+    unittest.main()